@@ -0,0 +1,120 @@
+"""Cold vs warm Maven compile latency on the bundled com.example.app project.
+
+Agents call ``maven_compile`` over and over in edit-compile loops. Without
+a daemon, every build starts a JVM, loads Maven's classes and resolves the
+plugins before any work is done. With ``MAVEN_DAEMON=yes`` builds go
+through mvnd, which pays that cost once and keeps the JVM warm.
+
+The cold runs use the launcher the server would pick without the daemon
+(``M2_HOME``, the Maven wrapper or ``mvn``). The warm runs use mvnd. mvnd's
+first build, which starts the daemon, is reported on its own. Before every
+run a source file is touched so the compiler has something to do, as it
+would after an edit.
+
+Usage::
+
+    python benchmarks/bench_maven.py [--runs 5] [--args "clean compile"] [--basedir DIR] [--json]
+
+Warm runs are skipped if mvnd isn't installed. Exits with status 2 if Java
+isn't found, and with status 1 if any build fails.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from maven_startup_mcp_server.builds import execute  # noqa: E402
+from maven_startup_mcp_server.toolchain import find_mvnd, resolve  # noqa: E402
+
+SOURCE = os.path.join("src", "main", "java", "com", "example", "app", "App.java")
+
+
+def toolchain_for(basedir, daemon):
+    """Resolve the toolchain for ``basedir`` with the daemon on or off."""
+    env = dict(os.environ, MAVEN_BASEDIR=basedir, MAVEN_DAEMON="yes" if daemon else "no")
+    return resolve(env)
+
+
+async def build_times(toolchain, args, runs):
+    """Seconds taken by each of ``runs`` builds; raises RuntimeError if one fails."""
+    source = os.path.join(toolchain.basedir, SOURCE)
+    times = []
+    for _ in range(runs):
+        if os.path.exists(source):
+            os.utime(source)
+        started = time.perf_counter()
+        result = await execute(toolchain.command + args, toolchain.basedir)
+        times.append(time.perf_counter() - started)
+        if not result.success:
+            raise RuntimeError(f"{shlex.join(result.args)} failed:\n" + "\n".join(result.log.tail(20)))
+    return times
+
+
+def stats(times):
+    return {
+        "runs": len(times),
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "max_s": max(times),
+    }
+
+
+async def measure(basedir, args, runs):
+    """Cold and warm build statistics; ``warm`` is None without mvnd."""
+    cold = toolchain_for(basedir, daemon=False)
+    results = {"cold": {"launcher": cold.maven_source, **stats(await build_times(cold, args, runs))}}
+    warm = toolchain_for(basedir, daemon=True)
+    if not warm.daemon:
+        results["warm"] = None
+        return results
+    first = await build_times(warm, args, 1)
+    results["warm"] = {"launcher": warm.maven_source, "first_s": first[0],
+                       **stats(await build_times(warm, args, runs))}
+    results["speedup"] = results["cold"]["median_s"] / results["warm"]["median_s"]
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="builds per mode")
+    parser.add_argument("--args", default="clean compile", help="Maven arguments for each build")
+    parser.add_argument("--basedir", default=ROOT, help="project to build (default: the bundled project)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    basedir = os.path.abspath(args.basedir)
+    if toolchain_for(basedir, daemon=False).java is None:
+        print("Java not found; install Java or set JAVA_HOME", file=sys.stderr)
+        return 2
+    if find_mvnd(os.environ)[0] is None:
+        print("mvnd not found (set MVND_HOME or add it to the PATH); measuring cold builds only", file=sys.stderr)
+    try:
+        results = asyncio.run(measure(basedir, shlex.split(args.args), args.runs))
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    cold, warm = results["cold"], results["warm"]
+    print(f"cold ({cold['launcher']}): median {cold['median_s']:.2f} s, "
+          f"min {cold['min_s']:.2f} s, max {cold['max_s']:.2f} s over {cold['runs']} builds")
+    if warm:
+        print(f"warm ({warm['launcher']}): median {warm['median_s']:.2f} s, "
+              f"min {warm['min_s']:.2f} s, max {warm['max_s']:.2f} s over {warm['runs']} builds; "
+              f"daemon start-up build {warm['first_s']:.2f} s")
+        print(f"speed-up: {results['speedup']:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
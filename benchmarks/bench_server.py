@@ -0,0 +1,220 @@
+"""Offline benchmarks for the MSSQL MCP server's result path.
+
+The server runs against the in-memory fake pyodbc driver from ``tests/``, so
+no database, ODBC driver or network is needed. The fake can add per-call
+latency to execute, fetch and connect, and generates results of any row
+count and column width, which keeps the numbers about the server's own
+work: pooling, streaming, encoding and the MCP handlers.
+
+Usage::
+
+    python benchmarks/bench_server.py                  # full run
+    python benchmarks/bench_server.py --quick          # small sizes, a few seconds
+    python benchmarks/bench_server.py --save baseline.json
+    python benchmarks/bench_server.py --compare baseline.json --tolerance 0.25
+
+With ``--compare`` the run exits with status 1 if any measurement is worse
+than the baseline by more than the tolerance. Compare runs from the same
+machine only.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "src"), os.path.join(ROOT, "tests")]
+
+import fake_pyodbc  # noqa: E402
+
+# Anything that imports pyodbc gets the fake; the pool is pointed at it below
+sys.modules["pyodbc"] = fake_pyodbc
+
+from mssql_mcp_server import pool as pool_module, server  # noqa: E402
+
+pool_module.pyodbc = fake_pyodbc
+
+# Measurements where a larger value is better; everything else is a cost
+HIGHER_IS_BETTER = ("calls_per_sec", "rows_per_sec", "mb_per_sec")
+
+QUICK = {"sizes": [(100, 4, 16), (2_000, 8, 32)], "calls": 20, "clients": [1, 4], "memory_rows": [1_000, 10_000]}
+FULL = {"sizes": [(100, 4, 16), (10_000, 8, 32), (100_000, 8, 32), (10_000, 32, 256)], "calls": 100,
+        "clients": [1, 4, 16], "memory_rows": [10_000, 100_000, 500_000]}
+
+
+def configure(**env):
+    """Start the server over with fresh settings, pools and caches."""
+    server.close_db()
+    fake_pyodbc.reset()
+    os.environ.update({"MSSQL_USER": "bench", "MSSQL_PASSWORD": "bench", "MSSQL_DATABASE": "bench",
+                       "MSSQL_LOG_SAMPLE_RATE": "0", "MSSQL_POOL_HEALTH_CHECK": "no"})
+    for name, value in env.items():
+        os.environ[name] = str(value)
+
+
+def percentile(samples, pct):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+async def run_query(query):
+    """Run execute_sql and follow continuation tokens; returns the text size in bytes."""
+    size = 0
+    arguments = {"query": query}
+    while True:
+        result = await server.call_tool("execute_sql", arguments)
+        texts = [r.text for r in result]
+        if texts and texts[0].startswith("Error "):
+            raise RuntimeError(texts[0])
+        note = texts[-1] if texts[-1].startswith("More rows available") else None
+        size += sum(len(t.encode("utf-8")) for t in (texts[:-1] if note else texts))
+        if note is None:
+            return size
+        token = note.split('continuation_token="')[1].split('"')[0]
+        arguments = {"continuation_token": token}
+
+
+async def bench_execute(rows, columns, width, calls):
+    """Sequential execute_sql throughput for one result shape."""
+    configure()
+    fake_pyodbc.add_synthetic_result(r"FROM bench", rows, columns, width)
+    latencies, size = [], 0
+    started = time.perf_counter()
+    for _ in range(calls):
+        call_started = time.perf_counter()
+        size += await run_query("SELECT * FROM bench")
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    return {
+        "calls_per_sec": calls / elapsed,
+        "rows_per_sec": rows * calls / elapsed,
+        "mb_per_sec": size / elapsed / 1e6,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def bench_concurrency(clients, calls, pool_size=5, execute_latency=0.002, fetch_latency=0.0005):
+    """execute_sql latency with ``clients`` concurrent callers against a slow fake server."""
+    configure(MSSQL_POOL_MAX_SIZE=pool_size)
+    fake_pyodbc.execute_latency = execute_latency
+    fake_pyodbc.fetch_latency = fetch_latency
+    fake_pyodbc.add_synthetic_result(r"FROM bench", 200, 6, 24)
+    latencies = []
+
+    async def client():
+        for _ in range(calls):
+            call_started = time.perf_counter()
+            await run_query("SELECT * FROM bench")
+            latencies.append(time.perf_counter() - call_started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+    return {
+        "calls_per_sec": clients * calls / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def bench_read_resource(calls, page_size=1000):
+    """Paged table reads through read_resource."""
+    configure()
+    fake_pyodbc.add_catalog({"dbo.bench": {"columns": ["id", "col1", "col2", "col3"], "key": ["id"]}})
+    fake_pyodbc.add_synthetic_result(r"TOP \(\?\) \* FROM \[bench\]", page_size, 4, 16)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(calls):
+        call_started = time.perf_counter()
+        await server.read_resource(f"mssql://bench/data?limit={page_size}")
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    return {
+        "calls_per_sec": calls / elapsed,
+        "rows_per_sec": page_size * calls / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def bench_memory(rows, columns=8, width=32):
+    """Peak Python memory allocated by the server while returning a whole result."""
+    configure()
+    # Rows are generated before tracing starts; only the server's own allocations count
+    fake_pyodbc.add_synthetic_result(r"FROM bench", rows, columns, width)
+    await run_query("SELECT * FROM bench")  # warm up imports and caches
+    tracemalloc.start()
+    try:
+        await run_query("SELECT * FROM bench")
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"peak_mb": peak / 1e6}
+
+
+async def run_benchmarks(plan):
+    results = {}
+    for rows, columns, width in plan["sizes"]:
+        results[f"execute_sql rows={rows} cols={columns} width={width}"] = \
+            await bench_execute(rows, columns, width, plan["calls"])
+    for clients in plan["clients"]:
+        results[f"execute_sql concurrent clients={clients}"] = await bench_concurrency(clients, plan["calls"] // 2)
+    results["read_resource page=1000"] = await bench_read_resource(plan["calls"])
+    for rows in plan["memory_rows"]:
+        results[f"memory rows={rows}"] = await bench_memory(rows)
+    server.close_db()
+    return results
+
+
+def report(results):
+    for name, values in results.items():
+        print(f"{name:<48} " + "  ".join(f"{key}={value:,.2f}" for key, value in values.items()))
+
+
+def compare(results, baseline, tolerance):
+    """Return one line per measurement that regressed by more than ``tolerance``."""
+    regressions = []
+    for name, values in results.items():
+        for key, value in values.items():
+            old = baseline.get(name, {}).get(key)
+            if not old:
+                continue
+            change = (old - value) / old if key in HIGHER_IS_BETTER else (value - old) / old
+            if change > tolerance:
+                regressions.append(f"{name} {key}: {old:,.2f} -> {value:,.2f} ({change:.0%} worse)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="small sizes for a smoke run")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file from an earlier --save")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression, as a fraction")
+    args = parser.parse_args(argv)
+    logging.getLogger("mssql_mcp_server").setLevel(logging.WARNING)
+
+    results = asyncio.run(run_benchmarks(QUICK if args.quick else FULL))
+    report(results)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
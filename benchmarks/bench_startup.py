@@ -0,0 +1,130 @@
+"""Cold-start import cost of the two MCP server packages.
+
+MCP clients launch a new server process per session, so import time is
+start-up latency. Each target is imported in a fresh interpreter under
+``python -X importtime``, and the report gives the median total import time
+and the slowest modules. Every target has a time budget and a list of
+modules it must not load; the driver, pyarrow and the other package are
+only loaded on first use.
+
+Usage::
+
+    python benchmarks/bench_startup.py [--runs 5] [--json]
+
+Exits with status 1 if a target goes over its budget or imports a module
+it shouldn't.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules loaded on first use, never at import
+DEFERRED = ("pyodbc", "pyarrow")
+SERVER_STACK = ("mcp", "pydantic", "asyncio")
+
+# target module -> (budget in ms, modules it must not import)
+TARGETS = {
+    "mssql_mcp_server": (25, DEFERRED + SERVER_STACK + ("maven_startup_mcp_server",)),
+    "maven_startup_mcp_server": (25, DEFERRED + SERVER_STACK + ("mssql_mcp_server",)),
+    # mcp (and pydantic under it) dominates these and can't be deferred
+    "mssql_mcp_server.server": (2500, DEFERRED + ("maven_startup_mcp_server",)),
+    "maven_startup_mcp_server.server": (2500, DEFERRED + ("mssql_mcp_server",)),
+}
+
+
+def parse_importtime(stderr):
+    """Return ``{module: (self_us, cumulative_us, depth)}`` from ``-X importtime`` output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def within(profile, module):
+    """Names of the modules imported while importing ``module``, itself included."""
+    pending = []
+    for name, (_, _, depth) in profile.items():
+        pending.append(name)
+        # importtime lists a module after everything it imported
+        if depth == 0:
+            if name == module:
+                return pending
+            pending = []
+    return []
+
+
+def import_profile(module):
+    """Import ``module`` in a fresh interpreter; returns the parsed importtime data."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, [os.path.join(ROOT, "src"), os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=env, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def measure(module, runs):
+    """Median import time of ``module`` in ms, the slowest modules and any forbidden ones loaded."""
+    budget, forbidden = TARGETS[module]
+    totals, profile = [], {}
+    for _ in range(runs):
+        profile = import_profile(module)
+        # The target's cumulative time covers everything it pulls in, but not the
+        # interpreter's own start-up imports (site, .pth hooks)
+        totals.append(profile[module][1] / 1000)
+    names = within(profile, module)
+    loaded = sorted(name for name in names if any(name == f or name.startswith(f + ".") for f in forbidden))
+    slowest = sorted(names, key=lambda name: profile[name][0], reverse=True)[:5]
+    return {
+        "import_ms": statistics.median(totals),
+        "budget_ms": budget,
+        "modules": len(names),
+        "slowest": [(name, profile[name][0] / 1000) for name in slowest],
+        "forbidden_loaded": [name for name in loaded if "." not in name] or loaded[:5],
+    }
+
+
+def problems(results):
+    """Return one line per target that is over budget or imports a deferred module."""
+    lines = []
+    for module, result in results.items():
+        if result["import_ms"] > result["budget_ms"]:
+            lines.append(f"{module}: {result['import_ms']:.1f} ms is over its {result['budget_ms']} ms budget")
+        if result["forbidden_loaded"]:
+            lines.append(f"{module}: imports {', '.join(result['forbidden_loaded'])} at start-up")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per target")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {module: measure(module, args.runs) for module in TARGETS}
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for module, result in results.items():
+            slowest = ", ".join(f"{name} {ms:.1f}" for name, ms in result["slowest"])
+            print(f"{module:<34} {result['import_ms']:8.1f} ms (budget {result['budget_ms']})  "
+                  f"{result['modules']} modules; slowest self ms: {slowest}")
+    failures = problems(results)
+    for line in failures:
+        print(f"OVER BUDGET {line}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
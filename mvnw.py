@@ -14,7 +14,7 @@ current_dir = Path(__file__).resolve().parent
 src_dir = current_dir / "src"
 sys.path.insert(0, str(src_dir))
 
-from maven_startup_mcp_server.maven_wrapper import run_maven, compile, run_tests, find_maven_basedir
+from maven_startup_mcp_server.maven_wrapper import run_maven, compile, run_tests, find_maven_basedir, configure_logging
 
 def main():
     """Main entry point for the Maven wrapper CLI."""
@@ -31,6 +31,7 @@ def main():
                         help='Raw Maven arguments to pass directly to Maven')
     
     args = parser.parse_args()
+    configure_logging()
     
     # Set base directory if provided
     if args.basedir:
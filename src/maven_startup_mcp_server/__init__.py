@@ -2,15 +2,28 @@
 
 Provides a Model Context Protocol (MCP) server that enables interaction with 
 Maven build system functions (compile, test, package, etc.).
+
+Importing the package is cheap: the server (and mcp with it) and the Maven
+wrapper are loaded on first use.
 """
 
-from . import server
-from .maven_wrapper import compile, run_tests, find_maven_basedir
-import asyncio
+import importlib
+
+WRAPPER_EXPORTS = ("compile", "run_tests", "find_maven_basedir")
 
 def main():
    """Main entry point for the package."""
+   import asyncio
+   from . import server
    asyncio.run(server.main())
 
+def __getattr__(name):
+    if name == "server":
+        return importlib.import_module(".server", __name__)
+    if name in WRAPPER_EXPORTS:
+        from . import maven_wrapper
+        return getattr(maven_wrapper, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Expose important items at package level
-__all__ = ['main', 'server', 'compile', 'run_tests', 'find_maven_basedir']
\ No newline at end of file
+__all__ = ['main', 'server', 'compile', 'run_tests', 'find_maven_basedir']
@@ -0,0 +1,128 @@
+"""Follow Maven's console output as it is produced.
+
+Maven reports its progress on stdout: the module being built, each plugin
+goal as it starts, Surefire test counts and the final result. ``BuildLog``
+is fed the output one line at a time. It turns those lines into
+``BuildEvent`` objects, which the server forwards as progress
+notifications, and adds up what the summary needs. Only the last
+``max_lines`` lines and the last ``max_errors`` error lines are kept, so a
+chatty build uses a fixed amount of memory however long it runs.
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass, field
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+LEVEL = re.compile(r"^\[(INFO|WARNING|WARN|ERROR|DEBUG)\] ?(.*)$")
+# "Building app 1.0-SNAPSHOT  [2/3]"; the jar/war plugins also log "Building jar: <path>"
+MODULE = re.compile(r"^Building (?!jar:|war:|ear:)(\S.*?) (\S+?)(?:\s+\[(\d+)/(\d+)\])?$")
+GOAL = re.compile(r"^--- (\S+?):(\S+?):(\S+) \((\S+)\) @ (\S+) ---$")
+TESTS = re.compile(r"Tests run: (\d+), Failures: (\d+), Errors: (\d+), Skipped: (\d+)")
+RESULT = re.compile(r"^BUILD (SUCCESS|FAILURE)$")
+TOTAL_TIME = re.compile(r"^Total time:\s+(.+?)\s*$")
+
+# Lifecycle phase each common goal is bound to by default
+GOAL_PHASES = {
+    "clean": "clean",
+    "resources": "process-resources",
+    "compile": "compile",
+    "testResources": "process-test-resources",
+    "testCompile": "test-compile",
+    "test": "test",
+    "jar": "package",
+    "war": "package",
+    "integration-test": "integration-test",
+    "verify": "verify",
+    "install": "install",
+    "deploy": "deploy",
+}
+
+
+@dataclass
+class BuildEvent:
+    """Something worth telling the client while the build runs."""
+    kind: str
+    message: str
+    data: dict = field(default_factory=dict)
+
+
+class BuildLog:
+    """Parsed state of one build's output, with a bounded tail of the raw lines."""
+
+    def __init__(self, max_lines=200, max_errors=50):
+        self.lines = deque(maxlen=max_lines)
+        self.errors = deque(maxlen=max_errors)
+        self.line_count = 0
+        self.modules = []
+        self.module_total = None
+        self.tests = {"run": 0, "failures": 0, "errors": 0, "skipped": 0}
+        self.result = None
+        self.total_time = None
+
+    def feed(self, line):
+        """Take one line of output; returns a BuildEvent if it marks progress, else None."""
+        line = ANSI_ESCAPE.sub("", line.rstrip("\r\n"))
+        self.lines.append(line)
+        self.line_count += 1
+        match = LEVEL.match(line)
+        if not match:
+            return None
+        level, text = match.groups()
+        if level == "ERROR":
+            self.errors.append(line)
+
+        if (match := MODULE.match(text)):
+            name, version, index, total = match.groups()
+            self.modules.append(name)
+            if total:
+                self.module_total = int(total)
+            position = f" [{index}/{total}]" if index else ""
+            return BuildEvent("module", f"Building {name} {version}{position}",
+                              {"module": name, "version": version,
+                               "index": int(index) if index else None, "total": self.module_total})
+        if (match := GOAL.match(text)):
+            plugin, version, goal, execution, module = match.groups()
+            phase = GOAL_PHASES.get(goal)
+            return BuildEvent("goal", f"{module}: {phase or goal} ({plugin}:{goal})",
+                              {"module": module, "plugin": plugin, "version": version, "goal": goal,
+                               "execution": execution, "phase": phase})
+        if (match := TESTS.search(text)):
+            counts = dict(zip(("run", "failures", "errors", "skipped"), map(int, match.groups())))
+            # Surefire logs one line per test class, then a per-module total without "in <class>"
+            if " in " not in text:
+                return None
+            for key, value in counts.items():
+                self.tests[key] += value
+            test_class = text.rsplit(" in ", 1)[1].strip()
+            return BuildEvent("tests", f"{test_class}: {self.describe_tests(counts)}",
+                              dict(counts, test_class=test_class))
+        if (match := RESULT.match(text)):
+            self.result = match.group(1)
+            return BuildEvent("result", f"BUILD {self.result}", {"result": self.result})
+        if (match := TOTAL_TIME.match(text)):
+            self.total_time = match.group(1)
+        return None
+
+    @staticmethod
+    def describe_tests(counts):
+        return (f"{counts['run']} run, {counts['failures']} failed, "
+                f"{counts['errors']} errors, {counts['skipped']} skipped")
+
+    def tail(self, count):
+        """The last ``count`` lines, error lines if there were any."""
+        lines = self.errors if self.errors else self.lines
+        return list(lines)[-count:]
+
+    def summary(self):
+        """A few lines on what was built and how it went."""
+        lines = []
+        if self.result:
+            lines.append(f"Result: BUILD {self.result}" + (f" (Maven total time {self.total_time})" if self.total_time else ""))
+        if self.modules:
+            total = f" of {self.module_total}" if self.module_total else ""
+            lines.append(f"Modules: {len(self.modules)}{total} ({', '.join(self.modules)})")
+        if self.tests["run"]:
+            lines.append(f"Tests: {self.describe_tests(self.tests)}")
+        lines.append(f"Output: {self.line_count} lines")
+        return "\n".join(lines)
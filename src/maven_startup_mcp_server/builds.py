@@ -0,0 +1,185 @@
+"""Run Maven builds without blocking the event loop.
+
+A build is started with ``asyncio.create_subprocess_exec`` from the argv
+list of the resolved toolchain; no shell is involved and no command string
+is assembled. The MCP server keeps answering other requests while a build
+runs. ``BuildRunner`` lets builds in different base directories run side by
+side (up to ``max_concurrent``), but runs builds in the same base directory
+one at a time, because two Maven processes writing the same ``target``
+directory corrupt each other's output.
+
+Maven runs in the JVM the wrapper or ``mvn`` script starts, and Surefire
+forks further JVMs for the tests. The build is therefore started in its own
+process group (a new session on POSIX, a new process group on Windows). On
+timeout or cancellation the whole group is asked to terminate, and is killed
+if it hasn't exited after ``grace`` seconds.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import time
+from dataclasses import dataclass
+
+from .build_log import BuildLog
+from .toolchain import WINDOWS
+
+logger = logging.getLogger("maven_startup_mcp_server.builds")
+
+# Longest output line read in one piece
+LINE_LIMIT = 1024 * 1024
+
+
+class BuildTimeoutError(TimeoutError):
+    """The build ran longer than its timeout and was killed."""
+
+    def __init__(self, timeout):
+        super().__init__(f"Build timed out after {timeout:g} seconds and was stopped")
+        self.timeout = timeout
+
+
+@dataclass
+class BuildResult:
+    """Outcome of one Maven process."""
+    args: list
+    basedir: str
+    returncode: int
+    log: BuildLog
+    seconds: float
+
+    @property
+    def success(self):
+        return self.returncode == 0
+
+
+def _group_options():
+    if WINDOWS:
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _signal_group(process, sig):
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def kill_process_tree(process, grace=5.0):
+    """Stop ``process`` and everything it started; SIGTERM first so the JVM can shut down cleanly."""
+    if WINDOWS:
+        # taskkill /T walks the child processes, which Windows doesn't group by session
+        killer = await asyncio.create_subprocess_exec(
+            "taskkill", "/T", "/F", "/PID", str(process.pid),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        await killer.wait()
+    else:
+        _signal_group(process, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), grace)
+        except asyncio.TimeoutError:
+            logger.warning(f"Build process {process.pid} ignored SIGTERM; killing its process group")
+        # Forked test JVMs can outlive the Maven process itself
+        _signal_group(process, signal.SIGKILL)
+    await process.wait()
+
+
+async def _pump(process, log, on_line, on_event):
+    """Feed the process output to ``log`` line by line until it exits."""
+    while True:
+        try:
+            raw = await process.stdout.readline()
+        except ValueError:
+            # A line longer than the stream limit; asyncio drops it and carries on
+            raw = b"[line too long, dropped]\n"
+        if not raw:
+            break
+        line = raw.decode(errors="replace")
+        event = log.feed(line)
+        if on_line is not None:
+            on_line(line)
+        if event is not None and on_event is not None:
+            await on_event(event)
+    await process.wait()
+
+
+async def execute(command, cwd, timeout=None, grace=5.0, log=None, on_line=None, on_event=None):
+    """Run ``command`` in ``cwd``, following its output as it is written.
+
+    Each line (stderr merged into stdout) goes to ``log`` and to
+    ``on_line(line)``; lines that mark progress are passed to ``await
+    on_event(event)``. Raises BuildTimeoutError after ``timeout`` seconds.
+    If the calling task is cancelled the process tree is stopped before
+    CancelledError propagates.
+    """
+    log = BuildLog() if log is None else log
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        *command, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT, limit=LINE_LIMIT, **_group_options())
+    logger.debug(f"Started build process {process.pid} in {cwd}")
+    try:
+        await asyncio.wait_for(_pump(process, log, on_line, on_event), timeout)
+    except asyncio.TimeoutError:
+        await kill_process_tree(process, grace)
+        raise BuildTimeoutError(timeout) from None
+    except BaseException:
+        # Cancelled, or on_event failed: don't leave Maven running
+        if process.returncode is None:
+            logger.info(f"Build interrupted; stopping process {process.pid} and its children")
+            await asyncio.shield(kill_process_tree(process, grace))
+        raise
+    return BuildResult(
+        args=list(command),
+        basedir=cwd,
+        returncode=process.returncode,
+        log=log,
+        seconds=time.perf_counter() - started,
+    )
+
+
+class BuildRunner:
+    """Runs builds concurrently across base directories and serially within one."""
+
+    def __init__(self, max_concurrent=4, timeout=None, grace=5.0):
+        self.timeout = timeout
+        self.grace = grace
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._locks = {}
+        self._running = {}
+        self._stats = {"started": 0, "succeeded": 0, "failed": 0, "timed_out": 0, "cancelled": 0}
+
+    async def run(self, toolchain, args, timeout=None, log=None, on_line=None, on_event=None):
+        """Run Maven with ``args`` using ``toolchain``; returns a BuildResult."""
+        basedir = toolchain.basedir
+        timeout = self.timeout if timeout is None else timeout
+        lock = self._locks.setdefault(basedir, asyncio.Lock())
+        async with lock, self._slots:
+            self._running[basedir] = (list(args), time.monotonic())
+            self._stats["started"] += 1
+            try:
+                result = await execute(toolchain.command + list(args), basedir, timeout or None, self.grace,
+                                       log=log, on_line=on_line, on_event=on_event)
+            except BuildTimeoutError:
+                self._stats["timed_out"] += 1
+                raise
+            except asyncio.CancelledError:
+                self._stats["cancelled"] += 1
+                raise
+            finally:
+                del self._running[basedir]
+        self._stats["succeeded" if result.success else "failed"] += 1
+        return result
+
+    def running(self):
+        """Base directories with a build in progress, with its arguments and age in seconds."""
+        now = time.monotonic()
+        return {basedir: (args, now - started) for basedir, (args, started) in self._running.items()}
+
+    def stats(self):
+        """Return a snapshot of the build counters."""
+        snapshot = dict(self._stats)
+        snapshot["running"] = len(self._running)
+        return snapshot
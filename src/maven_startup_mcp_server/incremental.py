@@ -0,0 +1,146 @@
+"""Decide how much of a compile actually has to run.
+
+``mvnw clean compile`` throws away ``target/classes`` and the compiler
+plugin's own incremental state under ``target/maven-status`` on every call,
+so even a one-line edit recompiles the whole project. After each
+successful compile an index of content hashes of ``pom.xml``,
+``src/main`` and ``src/test`` is written to ``target/``. The next compile
+compares the project against it:
+
+* nothing changed and ``target/classes`` is still there: a no-op, Maven
+  isn't started at all;
+* sources changed: ``compile`` without ``clean``, which leaves it to the
+  compiler plugin to recompile what is stale;
+* no index (first build, or ``target`` was cleaned), ``pom.xml`` changed,
+  or a clean build was asked for: ``clean compile``.
+
+Files whose size and modification time match the index are not hashed
+again, so checking an unchanged project costs one ``stat`` per file.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+
+logger = logging.getLogger("maven_startup_mcp_server.incremental")
+
+NOOP, INCREMENTAL, FULL = "no-op", "incremental", "full"
+
+INDEX_FILE = os.path.join("target", "mcp-compile-index.json")
+INDEX_VERSION = 1
+
+# Inputs of a compile, relative to the base directory
+INPUTS = ("pom.xml", os.path.join("src", "main"), os.path.join("src", "test"))
+BUILD_FILE = "pom.xml"
+
+
+@dataclass
+class CompilePlan:
+    """What a compile will do, and the index to save if it succeeds."""
+    mode: str
+    args: list
+    reason: str
+    files: dict = field(default_factory=dict)
+
+
+def index_path(basedir):
+    return os.path.join(basedir, INDEX_FILE)
+
+
+def load_index(basedir):
+    """Return ``{path: [size, mtime_ns, sha256]}`` from the last successful compile, or None."""
+    try:
+        with open(index_path(basedir), encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return None
+    return index.get("files")
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def input_files(basedir):
+    """Relative paths of every compile input that exists, in a stable order."""
+    paths = []
+    for entry in INPUTS:
+        full = os.path.join(basedir, entry)
+        if os.path.isfile(full):
+            paths.append(entry)
+        for root, dirs, files in os.walk(full):
+            dirs.sort()
+            paths.extend(os.path.relpath(os.path.join(root, name), basedir) for name in sorted(files))
+    return paths
+
+
+def scan(basedir, previous=None):
+    """Hash the compile inputs, reusing ``previous`` entries whose size and mtime are unchanged."""
+    previous = previous or {}
+    files = {}
+    for path in input_files(basedir):
+        try:
+            stat = os.stat(os.path.join(basedir, path))
+            known = previous.get(path)
+            if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+                files[path] = known
+            else:
+                files[path] = [stat.st_size, stat.st_mtime_ns, file_hash(os.path.join(basedir, path))]
+        except OSError:
+            # Deleted while scanning; it counts as removed
+            continue
+    return files
+
+
+def changed_files(previous, current):
+    """Paths added, removed or whose content differs."""
+    paths = set(previous) | set(current)
+    return sorted(p for p in paths if (previous.get(p) or [None] * 3)[2] != (current.get(p) or [None] * 3)[2])
+
+
+def plan_compile(basedir, clean=False):
+    """Work out whether a compile is a no-op, incremental or full."""
+    previous = load_index(basedir)
+    files = scan(basedir, previous)
+    if clean:
+        return CompilePlan(FULL, ["clean", "compile"], "clean build requested", files)
+    if previous is None:
+        return CompilePlan(FULL, ["clean", "compile"], "no previous build to compare with", files)
+    changed = changed_files(previous, files)
+    if BUILD_FILE in changed:
+        return CompilePlan(FULL, ["clean", "compile"], f"{BUILD_FILE} changed", files)
+    if not changed and os.path.isdir(os.path.join(basedir, "target", "classes")):
+        return CompilePlan(NOOP, [], f"nothing changed in {len(files)} files", files)
+    if not changed:
+        return CompilePlan(INCREMENTAL, ["compile"], "target/classes is missing", files)
+    names = ", ".join(changed[:5]) + (f" and {len(changed) - 5} more" if len(changed) > 5 else "")
+    count = f"{len(changed)} file changed" if len(changed) == 1 else f"{len(changed)} files changed"
+    return CompilePlan(INCREMENTAL, ["compile"], f"{count} ({names})", files)
+
+
+def save_index(basedir, plan):
+    """Record the inputs ``plan`` was made from as successfully compiled."""
+    path = index_path(basedir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "files": plan.files}, f)
+    os.replace(temporary, path)
+
+
+def discard_index(basedir):
+    """Forget the last successful compile, so the next one isn't skipped."""
+    try:
+        os.remove(index_path(basedir))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Could not remove the compile index: {e}")
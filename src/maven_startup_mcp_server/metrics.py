@@ -0,0 +1,62 @@
+"""Build and tool-call metrics in the Prometheus text exposition format.
+
+Only histograms are kept: tool-call latency, whole-build duration labelled
+with the last lifecycle phase asked for, and the time spent in each phase
+the build actually ran. The metric types and exporters live in the shared
+``mcp_metrics`` module. The rendered text can be served over HTTP, written
+to a file for the node_exporter textfile collector after every build, or
+read through the ``maven://metrics`` resource.
+"""
+
+import time
+
+# Re-exported so the server imports everything metrics-related from here
+from mcp_metrics import Registry, start_http_server, write_textfile
+
+# Seconds; builds run from a few seconds to tens of minutes
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+# Lifecycle phases in order; a build is labelled with the last one it runs
+LIFECYCLE_PHASES = ("clean", "validate", "compile", "test-compile", "test", "package",
+                    "verify", "install", "deploy", "site")
+
+# Time from starting Maven to its first plugin goal: JVM start-up and reading the projects
+STARTUP = "startup"
+
+
+def build_phase(args):
+    """Return the last lifecycle phase named in Maven arguments, or "other" (plugin goals only)."""
+    phases = [arg for arg in args if arg in LIFECYCLE_PHASES]
+    return phases[-1] if phases else "other"
+
+
+class PhaseTimer:
+    """Splits a build's running time between the phases its goals ran in.
+
+    Fed the build's ``goal`` events as they arrive; each goal's time runs
+    until the next goal starts. Goals not bound to a known phase are counted
+    under the goal's own name.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._current = None
+        self._since = None
+        self.seconds = {}
+
+    def event(self, event):
+        if event.kind == "goal":
+            self._switch(event.data["phase"] or event.data["goal"])
+
+    def _switch(self, phase):
+        now = self._clock()
+        if self._current is not None:
+            self.seconds[self._current] = self.seconds.get(self._current, 0.0) + now - self._since
+        self._current, self._since = phase, now
+
+    def finish(self, total):
+        """Close the last phase; what ``total`` leaves before the first goal is counted as start-up."""
+        self._switch(None)
+        seconds = dict(self.seconds)
+        seconds[STARTUP] = max(total - sum(seconds.values()), 0.0)
+        return seconds
@@ -1,18 +1,180 @@
 import asyncio
 import logging
 import os
+import shlex
+import time
 from mcp.server import Server
 from mcp.types import Resource, Tool, TextContent
 from pydantic import AnyUrl
-from .maven_wrapper import compile, run_tests, find_maven_basedir
+from mcp_common import RequestLog
+from .build_log import BuildLog
+from .builds import BuildRunner, BuildTimeoutError
+from .maven_wrapper import compile_args, configure_logging, get_toolchain, test_args, toolchain_stats
+from .incremental import NOOP, discard_index, plan_compile, save_index
+from .metrics import DURATION_BUCKETS, PhaseTimer, Registry, build_phase, start_http_server, write_textfile
+from .settings import MavenSettings
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger("maven_startup_mcp_server")
 
+# Lines of output a failed build's result ends with
+ERROR_TAIL_LINES = 30
+
+# Settings are resolved once, at startup or on first use
+_settings = None
+_request_log = None
+_runner = None
+
+def get_settings() -> MavenSettings:
+    """Return the server settings, loading them on first use."""
+    global _settings
+    if _settings is None:
+        _settings = MavenSettings.load()
+    return _settings
+
+def get_request_log() -> RequestLog:
+    """Return the sampled tool-call logger."""
+    global _request_log
+    if _request_log is None:
+        _request_log = RequestLog(logger, get_settings().log_sample_rate, preview="command")
+    return _request_log
+
+def record_call(name, arguments, elapsed, outcome):
+    """Log a finished tool call.
+
+    Runs in call_tool's ``finally``, so invalid settings must not raise here
+    and replace the tool's own exception.
+    """
+    try:
+        request_log = get_request_log()
+    except ValueError as e:
+        logger.warning(f"Tool call {name} not logged: {e}")
+        return
+    request_log.record(name, arguments, elapsed, outcome)
+
+# Metrics live for the whole process
+metrics = Registry(DURATION_BUCKETS)
+TOOL_SECONDS = metrics.histogram(
+    "maven_mcp_tool_call_seconds", "Tool call latency by tool and outcome", ("tool", "outcome"))
+BUILD_SECONDS = metrics.histogram(
+    "maven_build_duration_seconds", "Whole Maven build duration by the last lifecycle phase asked for and result",
+    ("target", "result"))
+PHASE_SECONDS = metrics.histogram(
+    "maven_build_phase_seconds", "Time Maven builds spent in each lifecycle phase, and starting up", ("phase",))
+
+def get_runner() -> BuildRunner:
+    """Return the build runner, created on first use."""
+    global _runner
+    if _runner is None:
+        settings = get_settings()
+        _runner = BuildRunner(max_concurrent=settings.max_builds, timeout=settings.build_timeout)
+    return _runner
+
+def get_basedir(arguments: dict) -> str | None:
+    """Return the ``basedir`` tool argument as an absolute path, or None for the default project."""
+    basedir = arguments.get("basedir")
+    if not basedir:
+        return None
+    if not os.path.isdir(basedir):
+        raise ValueError(f"basedir {basedir!r} is not a directory")
+    return os.path.abspath(basedir)
+
+def progress_reporter():
+    """Return an async callback that sends build events as progress notifications.
+
+    Returns None outside a request or when the client sent no progress token.
+    """
+    try:
+        context = app.request_context
+    except LookupError:
+        return None
+    token = context.meta.progressToken if context.meta else None
+    if token is None:
+        return None
+    sent = 0
+
+    async def report(event):
+        nonlocal sent
+        sent += 1
+        try:
+            await context.session.send_progress_notification(
+                token, sent, message=event.message, related_request_id=str(context.request_id))
+        except Exception as e:
+            # A client that stopped listening shouldn't fail the build
+            logger.debug(f"Could not send build progress: {e}")
+
+    return report
+
+async def run_build(phase, args, basedir=None):
+    """Run Maven with ``args`` without blocking the event loop.
+
+    Returns ``(success, outcome, log)``: whether it succeeded, the duration
+    or reason it failed, and the parsed output. The whole duration is
+    recorded under ``phase``, and the time spent in each phase the build ran
+    separately.
+    """
+    started = time.perf_counter()
+    success = False
+    log = BuildLog(max_lines=get_settings().output_lines)
+    timer = PhaseTimer()
+    report = progress_reporter()
+
+    async def on_event(event):
+        timer.event(event)
+        if report is not None:
+            await report(event)
+
+    try:
+        # Resolution may download the Maven wrapper, so it runs off the event loop
+        toolchain = await asyncio.to_thread(get_toolchain, basedir)
+        if toolchain.java is None:
+            return False, "Java not found; install Java or set JAVA_HOME", None
+        logger.info(f"Running Maven {shlex.join(args)} in {toolchain.basedir}")
+        try:
+            result = await get_runner().run(toolchain, args, log=log, on_line=log_line, on_event=on_event)
+        except BuildTimeoutError as e:
+            logger.error(str(e))
+            return False, str(e), log
+        except FileNotFoundError as e:
+            logger.error(f"Maven could not be started: {e}")
+            return False, "Maven could not be started; install Maven, set M2_HOME or set JAVA_HOME to use the wrapper", None
+        success = result.success
+        for name, seconds in timer.finish(result.seconds).items():
+            PHASE_SECONDS.observe(seconds, phase=name)
+        if success:
+            return True, f"{result.seconds:.1f} s", log
+        logger.error(f"Maven exited with code {result.returncode} after {result.seconds:.1f} s")
+        return False, f"exit code {result.returncode}", log
+    finally:
+        BUILD_SECONDS.observe(time.perf_counter() - started, target=phase, result="success" if success else "failure")
+        textfile = get_settings().metrics_textfile
+        if textfile:
+            try:
+                write_textfile(metrics, textfile)
+            except OSError as e:
+                logger.warning(f"Could not write metrics to {textfile}: {e}")
+
+def log_line(line):
+    """Pass Maven output to the server log as it arrives."""
+    logger.debug(f"mvn: {line.rstrip()}")
+
+def build_text(label, success, outcome, log):
+    """Tool result for a finished build: outcome, summary and, on failure, the last errors.
+
+    Returns ``(content, success)`` so callers never have to read the outcome back out of the text.
+    """
+    if success:
+        text = f"{label} completed successfully ({outcome})."
+    else:
+        text = f"{label} failed: {outcome}."
+    if log is not None:
+        text += f"\n{log.summary()}"
+        if not success and log.line_count:
+            text += "\n\nLast output:\n" + "\n".join(log.tail(ERROR_TAIL_LINES))
+    return [TextContent(type="text", text=text)], success
+
+# Cheapest build that still starts the daemon and loads the project
+WARM_UP_ARGS = ["-q", "validate"]
+
 # Initialize server
 app = Server("maven_startup_mcp_server")
 
@@ -20,7 +182,7 @@ app = Server("maven_startup_mcp_server")
 async def list_resources() -> list[Resource]:
     """List Maven resources."""
     # Add Maven resource
-    maven_basedir = find_maven_basedir()
+    maven_basedir = get_settings().basedir
     resources = [
         Resource(
             uri="maven://project",
@@ -39,22 +201,40 @@ async def list_resources() -> list[Resource]:
             name="Maven Modules",
             mimeType="text/plain",
             description="Maven project modules"
+        ),
+        Resource(
+            uri="maven://toolchain",
+            name="Maven Toolchain",
+            mimeType="text/plain",
+            description="Resolved Java and Maven executables, versions and resolution timing"
         )
     ]
+    if get_settings().metrics:
+        resources.append(Resource(
+            uri="maven://metrics",
+            name="Maven Metrics",
+            mimeType="text/plain",
+            description="Tool latency and build durations in Prometheus text format"
+        ))
     return resources
 
 @app.read_resource()
 async def read_resource(uri: AnyUrl) -> str:
     """Read Maven resource contents."""
     uri_str = str(uri)
-    logger.info(f"Reading resource: {uri_str}")
+    logger.debug(f"Reading resource: {uri_str}")
     
     if uri_str == "maven://project":
-        maven_basedir = find_maven_basedir()
-        return f"Maven project information:\nBase directory: {maven_basedir}\n"
+        maven_basedir = get_settings().basedir
+        text = f"Maven project information:\nBase directory: {maven_basedir}\n"
+        running = get_runner().running()
+        if running:
+            text += "Running builds:\n" + "".join(
+                f"  {basedir}: {shlex.join(args)} ({age:.0f} s)\n" for basedir, (args, age) in running.items())
+        return text
     
     elif uri_str == "maven://pom":
-        maven_basedir = find_maven_basedir()
+        maven_basedir = get_settings().basedir
         pom_path = os.path.join(maven_basedir, "pom.xml")
         
         try:
@@ -67,7 +247,7 @@ async def read_resource(uri: AnyUrl) -> str:
             return f"Error reading POM file: {str(e)}"
     
     elif uri_str == "maven://modules":
-        maven_basedir = find_maven_basedir()
+        maven_basedir = get_settings().basedir
         modules = []
         
         # Check for src/main and src/test directories
@@ -81,20 +261,43 @@ async def read_resource(uri: AnyUrl) -> str:
             
         return f"Maven project modules:\n" + "\n".join(modules)
     
+    elif uri_str == "maven://toolchain":
+        toolchain = await asyncio.to_thread(get_toolchain)
+        stats = toolchain_stats()
+        return (f"{toolchain.describe()}\n"
+                f"Cache: {stats['hits']} hits, {stats['resolutions']} resolutions, "
+                f"{stats['check_seconds'] * 1000:.1f} ms spent checking for changes")
+    
+    elif uri_str == "maven://metrics":
+        if not get_settings().metrics:
+            raise ValueError("The metrics resource is disabled (set MAVEN_METRICS=true)")
+        return metrics.render()
+    
     else:
         raise ValueError(f"Invalid URI scheme: {uri_str}")
 
+BASEDIR_PROPERTY = {
+    "type": "string",
+    "description": "Optional project directory to build instead of MAVEN_BASEDIR; builds in different directories run concurrently"
+}
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available Maven tools."""
-    logger.info("Listing tools...")
+    logger.debug("Listing tools...")
     return [
         Tool(
             name="maven_compile",
-            description="Run Maven compile (equivalent to mvnw clean compile)",
+            description="Run Maven compile. Skips Maven when pom.xml and the sources are unchanged since the last successful compile, and only cleans when needed; the result says whether the build was a no-op, incremental or full",
             inputSchema={
                 "type": "object",
-                "properties": {},
+                "properties": {
+                    "clean": {
+                        "type": "boolean",
+                        "description": "Optional flag to force a full clean compile"
+                    },
+                    "basedir": BASEDIR_PROPERTY
+                },
                 "required": []
             }
         ),
@@ -107,7 +310,8 @@ async def list_tools() -> list[Tool]:
                     "test_name": {
                         "type": "string",
                         "description": "Optional specific test name to run (equivalent to -Dtest=TestName)"
-                    }
+                    },
+                    "basedir": BASEDIR_PROPERTY
                 },
                 "required": []
             }
@@ -121,7 +325,8 @@ async def list_tools() -> list[Tool]:
                     "skip_tests": {
                         "type": "boolean",
                         "description": "Optional flag to skip tests during packaging"
-                    }
+                    },
+                    "basedir": BASEDIR_PROPERTY
                 },
                 "required": []
             }
@@ -135,7 +340,8 @@ async def list_tools() -> list[Tool]:
                     "command": {
                         "type": "string",
                         "description": "Maven command to run (without 'mvnw' prefix)"
-                    }
+                    },
+                    "basedir": BASEDIR_PROPERTY
                 },
                 "required": ["command"]
             }
@@ -145,32 +351,53 @@ async def list_tools() -> list[Tool]:
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     """Execute Maven operations."""
-    logger.info(f"Calling tool: {name} with arguments: {arguments}")
-    
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        result, success = await dispatch_tool(name, arguments)
+        outcome = "ok" if success else "failed"
+        return result
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        TOOL_SECONDS.observe(elapsed, tool=name, outcome=outcome)
+        record_call(name, arguments, elapsed, outcome)
+
+async def dispatch_tool(name: str, arguments: dict) -> tuple[list[TextContent], bool]:
+    """Route a tool call to its handler; returns the result and whether the build succeeded."""
+    basedir = get_basedir(arguments)
     if name == "maven_compile":
-        logger.info("Running Maven compile...")
-        success = compile()
+        clean = arguments.get("clean", False)
+        if not get_settings().incremental:
+            logger.info("Running Maven compile...")
+            success, outcome, log = await run_build("compile", compile_args(), basedir)
+            return build_text("Maven compile", success, outcome, log)
+        project = basedir or get_settings().basedir
+        plan = await asyncio.to_thread(plan_compile, project, clean)
+        if plan.mode == NOOP:
+            logger.info(f"Skipping Maven compile: {plan.reason}")
+            return [TextContent(type="text", text=f"Maven compile skipped (no-op build: {plan.reason}).")], True
+        logger.info(f"Running {plan.mode} Maven compile: {plan.reason}")
+        success, outcome, log = await run_build("compile", plan.args, basedir)
+        # Saved only after a success, so a failed build is never mistaken for an up-to-date one
         if success:
-            return [TextContent(type="text", text="Maven compile completed successfully.")]
+            await asyncio.to_thread(save_index, project, plan)
         else:
-            return [TextContent(type="text", text="Maven compile failed. Check logs for details.")]
+            await asyncio.to_thread(discard_index, project)
+        return build_text("Maven compile", success, f"{outcome}; {plan.mode} build: {plan.reason}", log)
     
     elif name == "maven_test":
         test_name = arguments.get("test_name")
         if test_name:
             logger.info(f"Running Maven test for {test_name}...")
-            success = run_tests(test_name)
-            if success:
-                return [TextContent(type="text", text=f"Maven test for {test_name} completed successfully.")]
-            else:
-                return [TextContent(type="text", text=f"Maven test for {test_name} failed. Check logs for details.")]
+            success, outcome, log = await run_build("test", test_args(test_name), basedir)
+            return build_text(f"Maven test for {test_name}", success, outcome, log)
         else:
             logger.info("Running all Maven tests...")
-            success = run_tests()
-            if success:
-                return [TextContent(type="text", text="Maven tests completed successfully.")]
-            else:
-                return [TextContent(type="text", text="Maven tests failed. Check logs for details.")]
+            success, outcome, log = await run_build("test", test_args(), basedir)
+            return build_text("Maven tests", success, outcome, log)
     
     elif name == "maven_package":
         skip_tests = arguments.get("skip_tests", False)
@@ -179,15 +406,9 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         cmd = ["package"]
         if skip_tests:
             cmd.append("-DskipTests")
-            
-        # Use the run_maven function from maven_wrapper
-        from .maven_wrapper import run_maven
-        success = run_maven(cmd)
         
-        if success:
-            return [TextContent(type="text", text="Maven package completed successfully.")]
-        else:
-            return [TextContent(type="text", text="Maven package failed. Check logs for details.")]
+        success, outcome, log = await run_build("package", cmd, basedir)
+        return build_text("Maven package", success, outcome, log)
     
     elif name == "maven_run":
         command = arguments.get("command")
@@ -196,29 +417,43 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         
         logger.info(f"Running Maven command: {command}...")
         
-        # Use the run_maven function from maven_wrapper
-        from .maven_wrapper import run_maven
-        success = run_maven(command.split())
-        
-        if success:
-            return [TextContent(type="text", text=f"Maven command '{command}' completed successfully.")]
-        else:
-            return [TextContent(type="text", text=f"Maven command '{command}' failed. Check logs for details.")]
+        # Split like a shell would, but the arguments go to Maven as a list and no shell runs
+        args = shlex.split(command)
+        success, outcome, log = await run_build(build_phase(args), args, basedir)
+        return build_text(f"Maven command '{command}'", success, outcome, log)
     
     else:
         raise ValueError(f"Unknown tool: {name}")
 
+async def warm_up_daemon():
+    """Start the mvnd daemon with a quiet ``validate`` so the first real build finds it warm."""
+    try:
+        toolchain = await asyncio.to_thread(get_toolchain)
+        if not toolchain.daemon:
+            return
+        logger.info("Warming up the Maven daemon...")
+        result = await get_runner().run(toolchain, WARM_UP_ARGS)
+        logger.info(f"Maven daemon ready after {result.seconds:.1f} s (exit code {result.returncode})")
+    except (OSError, BuildTimeoutError) as e:
+        logger.warning(f"Could not warm up the Maven daemon: {e}")
+
 async def main():
     """Main entry point to run the MCP server."""
     from mcp.server.stdio import stdio_server
     
+    configure_logging()
     logger.info("Starting Maven MCP server...")
     
-    # Log Maven configuration
-    maven_basedir = find_maven_basedir()
-    logger.info(f"Maven base directory: {maven_basedir}")
+    # Resolve and validate settings up front rather than on the first request
+    settings = get_settings()
+    logger.info(f"Maven base directory: {settings.basedir}")
+    metrics_server = None
+    if settings.metrics_port:
+        metrics_server = start_http_server(metrics, settings.metrics_host, settings.metrics_port)
     
     async with stdio_server() as (read_stream, write_stream):
+        # Builds in the same base directory queue behind the warm-up, so they reuse its JVM
+        warm_up = asyncio.create_task(warm_up_daemon())
         try:
             await app.run(
                 read_stream,
@@ -228,6 +463,10 @@ async def main():
         except Exception as e:
             logger.error(f"Server error: {str(e)}", exc_info=True)
             raise
+        finally:
+            if metrics_server is not None:
+                metrics_server.shutdown()
+            warm_up.cancel()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,52 @@
+"""Maven server settings, resolved once at startup.
+
+The project base directory is read once here instead of on every resource
+read and tool call. Only MAVEN_BASEDIR and the working directory are
+consulted; the Java and Maven executables are resolved by the toolchain
+resolver on the first build, off the event loop.
+"""
+
+import os
+from dataclasses import dataclass
+
+from mcp_common import EnvReader
+
+from .toolchain import find_basedir
+
+@dataclass(frozen=True)
+class MavenSettings:
+    basedir: str
+    log_sample_rate: float
+    metrics: bool = False
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 0
+    metrics_textfile: str | None = None
+    max_builds: int = 4
+    build_timeout: float = 0.0
+    output_lines: int = 200
+    incremental: bool = True
+
+    @classmethod
+    def load(cls, environ=None):
+        """Build settings from the environment; raises ValueError listing every invalid setting."""
+        env = os.environ if environ is None else environ
+        reader = EnvReader(env)
+        value, flag, errors = reader.value, reader.flag, reader.errors
+
+        settings = cls(
+            basedir=find_basedir(env),
+            log_sample_rate=value("MAVEN_LOG_SAMPLE_RATE", "0.1", float,
+                                  lambda v: 0 <= v <= 1, "must be between 0 and 1"),
+            metrics=flag("MAVEN_METRICS", "no"),
+            metrics_host=env.get("MAVEN_METRICS_HOST", "127.0.0.1"),
+            metrics_port=value("MAVEN_METRICS_PORT", "0", int,
+                               lambda v: 0 <= v <= 65535, "must be a TCP port number or 0"),
+            metrics_textfile=env.get("MAVEN_METRICS_TEXTFILE") or None,
+            max_builds=value("MAVEN_MAX_BUILDS", "4", int, lambda v: v >= 1, "must be at least 1"),
+            build_timeout=value("MAVEN_BUILD_TIMEOUT", "0", float,
+                                lambda v: v >= 0, "must be 0 (no timeout) or more"),
+            output_lines=value("MAVEN_OUTPUT_LINES", "200", int, lambda v: v >= 1, "must be at least 1"),
+            incremental=flag("MAVEN_INCREMENTAL", "yes"),
+        )
+        reader.check()
+        return settings
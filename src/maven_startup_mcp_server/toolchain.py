@@ -0,0 +1,278 @@
+"""Resolve the Java and Maven toolchain once and reuse it across builds.
+
+Working out how to run Maven means finding the project base directory, a
+Java executable and a Maven launcher (the ``mvnd`` daemon client when
+MAVEN_DAEMON is set, ``$M2_HOME/bin/mvn``, the project's Maven wrapper or
+``mvn`` on the PATH). The result is kept in a
+``Toolchain``. Before every build the resolver takes a fingerprint of
+everything the choice depends on: the relevant environment variables and
+the modification times of the files it picked or looked for. The toolchain
+is only resolved again when that fingerprint changes. Checking costs a few
+``stat`` calls and never starts a process; versions are read from the
+JDK's ``release`` file and the Maven distribution's file names.
+"""
+
+import logging
+import os
+import platform
+import re
+import shlex
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger("maven_startup_mcp_server.toolchain")
+
+# Environment variables the resolution depends on
+ENV_VARS = ("MAVEN_BASEDIR", "JAVA_HOME", "M2_HOME", "PATH", "MAVEN_OPTS", "MAVEN_DEBUG_OPTS",
+            "MAVEN_DAEMON", "MVND_HOME")
+
+WRAPPER_MAIN = "org.apache.maven.wrapper.MavenWrapperMain"
+
+WINDOWS = platform.system() == "Windows"
+
+
+@dataclass(frozen=True)
+class Toolchain:
+    """How Maven is run for one project, and where each piece was found."""
+
+    basedir: str
+    java: str | None
+    java_source: str
+    java_version: str | None
+    maven: str | None
+    maven_source: str
+    maven_version: str | None
+    command: list = field(default_factory=list)
+    resolved_at: float = 0.0
+    seconds: float = 0.0
+    daemon: bool = False
+
+    def describe(self):
+        """Multi-line summary for the diagnostic resource."""
+        lines = [
+            f"Base directory: {self.basedir}",
+            f"Java: {self.java or 'not found'} ({self.java_source}"
+            + (f", version {self.java_version})" if self.java_version else ")"),
+            f"Maven: {self.maven or 'not found'} ({self.maven_source}"
+            + (f", version {self.maven_version})" if self.maven_version else ")"),
+            f"Command: {shlex.join(self.command)}",
+            f"Daemon: {'yes, mvnd keeps a warm JVM between builds' if self.daemon else 'no, every build starts a JVM'}",
+            f"Resolved: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.resolved_at))} "
+            f"in {self.seconds * 1000:.1f} ms",
+        ]
+        return "\n".join(lines)
+
+
+def executable_name(name):
+    """File name of a launcher on this platform: java.exe and mvn.cmd on Windows."""
+    if not WINDOWS:
+        return name
+    return f"{name}.exe" if name == "java" else f"{name}.cmd"
+
+
+def find_basedir(env):
+    """Return MAVEN_BASEDIR, or the working directory when it isn't set."""
+    return env.get("MAVEN_BASEDIR") or os.getcwd()
+
+
+def daemon_enabled(env):
+    """Whether MAVEN_DAEMON asks for builds to go through mvnd."""
+    return env.get("MAVEN_DAEMON", "no").lower() in ("yes", "true", "1")
+
+
+def find_mvnd(env):
+    """Return ``(path, source)`` of the mvnd client from MVND_HOME or the PATH, or ``(None, None)``."""
+    if env.get("MVND_HOME"):
+        candidate = Path(env["MVND_HOME"]) / "bin" / executable_name("mvnd")
+        if candidate.exists():
+            return str(candidate), "MVND_HOME"
+    mvnd = _which("mvnd", env)
+    return (mvnd, "PATH") if mvnd else (None, None)
+
+
+def java_home_of(java):
+    """The JDK directory a java executable belongs to, following symlinks."""
+    return Path(os.path.realpath(java)).parent.parent
+
+
+def read_java_version(java_home):
+    """Read JAVA_VERSION from a JDK's ``release`` file, or None."""
+    try:
+        with open(Path(java_home) / "release", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("JAVA_VERSION="):
+                    return line.split("=", 1)[1].strip().strip('"')
+    except OSError:
+        pass
+    return None
+
+
+def read_maven_version(maven_home):
+    """Read the version from ``lib/maven-core-<version>.jar`` in a Maven distribution, or None."""
+    try:
+        for entry in os.scandir(Path(maven_home) / "lib"):
+            match = re.fullmatch(r"maven-core-(.+)\.jar", entry.name)
+            if match:
+                return match.group(1)
+    except OSError:
+        pass
+    return None
+
+
+def read_wrapper_version(properties):
+    """Read the Maven version from the wrapper's ``distributionUrl``, or None."""
+    try:
+        with open(properties, encoding="utf-8") as f:
+            match = re.search(r"apache-maven-([^/]+?)-bin\.zip", f.read())
+    except OSError:
+        return None
+    return match.group(1) if match else None
+
+
+def _which(name, env):
+    return shutil.which(executable_name(name), path=env.get("PATH"))
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def fingerprint(env, toolchain=None):
+    """Everything a resolution depends on; equal fingerprints mean the same toolchain."""
+    basedir = find_basedir(env)
+    # Only .mvn and the wrapper files: the project directory itself changes
+    # whenever a build creates or cleans target/
+    wrapper = Path(basedir) / ".mvn" / "wrapper"
+    paths = [Path(basedir) / ".mvn", wrapper / "maven-wrapper.jar", wrapper / "maven-wrapper.properties"]
+    if env.get("JAVA_HOME"):
+        paths.append(Path(env["JAVA_HOME"]) / "bin" / executable_name("java"))
+    if env.get("M2_HOME"):
+        paths.append(Path(env["M2_HOME"]) / "bin" / executable_name("mvn"))
+    if env.get("MVND_HOME"):
+        paths.append(Path(env["MVND_HOME"]) / "bin" / executable_name("mvnd"))
+    if toolchain is not None:
+        paths.extend(p for p in (toolchain.java, toolchain.maven) if p)
+    # Installing or removing a java or mvn on the PATH changes its directory's mtime
+    paths.extend(p for p in env.get("PATH", "").split(os.pathsep) if p)
+    return (tuple(env.get(name) for name in ENV_VARS), tuple((str(p), _mtime(p)) for p in paths))
+
+
+def resolve(env, download_wrapper=None):
+    """Work out the toolchain from scratch.
+
+    ``download_wrapper(basedir)`` is called when the project has no wrapper
+    JAR and M2_HOME doesn't provide Maven; it returns True if it fetched one.
+    """
+    started = time.perf_counter()
+    basedir = find_basedir(env)
+
+    java, java_source, java_version = None, "not found", None
+    if env.get("JAVA_HOME"):
+        candidate = Path(env["JAVA_HOME"]) / "bin" / executable_name("java")
+        if candidate.exists():
+            java, java_source = str(candidate), "JAVA_HOME"
+            java_version = read_java_version(env["JAVA_HOME"])
+        else:
+            logger.warning(f"JAVA_HOME is set to an invalid directory: {env['JAVA_HOME']}")
+    if java is None:
+        java = _which("java", env)
+        if java:
+            java_source = "PATH"
+            java_version = read_java_version(java_home_of(java))
+
+    opts = [opt for name in ("MAVEN_OPTS", "MAVEN_DEBUG_OPTS")
+            for opt in shlex.split(env.get(name, ""), posix=not WINDOWS)]
+    project_dir = f"-Dmaven.multiModuleProjectDirectory={basedir}"
+    wrapper = Path(basedir) / ".mvn" / "wrapper"
+    wrapper_jar = wrapper / "maven-wrapper.jar"
+
+    maven, maven_source, maven_version, command, daemon = None, "not found", None, [], False
+    if daemon_enabled(env):
+        mvnd, where = find_mvnd(env)
+        if mvnd:
+            maven, maven_source, daemon = mvnd, f"mvnd from {where}", True
+            # mvnd ships the Maven it embeds under <mvnd home>/mvn
+            maven_version = read_maven_version(Path(os.path.realpath(mvnd)).parent.parent / "mvn")
+            # Batch mode keeps mvnd to Maven's plain line-by-line output
+            command = [mvnd, "-B"]
+        else:
+            logger.warning("MAVEN_DAEMON is set but mvnd was not found; every build will start a new JVM")
+    if maven is None and env.get("M2_HOME"):
+        candidate = Path(env["M2_HOME"]) / "bin" / executable_name("mvn")
+        if candidate.exists():
+            maven, maven_source = str(candidate), "M2_HOME"
+            maven_version = read_maven_version(env["M2_HOME"])
+            command = [maven]
+    if maven is None and java is not None:
+        if wrapper_jar.exists() or (download_wrapper is not None and download_wrapper(basedir)):
+            maven, maven_source = str(wrapper_jar), "Maven wrapper"
+            maven_version = read_wrapper_version(wrapper / "maven-wrapper.properties")
+            command = [java, *opts, project_dir, "-classpath", str(wrapper_jar), WRAPPER_MAIN]
+    if maven is None:
+        system_mvn = _which("mvn", env)
+        if system_mvn:
+            maven, maven_source = system_mvn, "PATH"
+            maven_version = read_maven_version(Path(os.path.realpath(system_mvn)).parent.parent)
+        else:
+            logger.warning("Maven not found! Install Maven or provide JAVA_HOME to use the wrapper.")
+        command = [system_mvn or executable_name("mvn"), project_dir]
+
+    return Toolchain(
+        basedir=basedir,
+        java=java,
+        java_source=java_source,
+        java_version=java_version,
+        maven=maven,
+        maven_source=maven_source,
+        maven_version=maven_version,
+        command=command,
+        resolved_at=time.time(),
+        seconds=time.perf_counter() - started,
+        daemon=daemon,
+    )
+
+
+class ToolchainResolver:
+    """Caches the resolved toolchain until its fingerprint changes."""
+
+    def __init__(self, download_wrapper=None):
+        self.download_wrapper = download_wrapper
+        self._toolchain = None
+        self._fingerprint = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "resolutions": 0, "check_seconds": 0.0}
+
+    def get(self, env=None):
+        """Return the current toolchain, resolving it again only if something it depends on changed."""
+        env = os.environ if env is None else env
+        with self._lock:
+            started = time.perf_counter()
+            current = fingerprint(env, self._toolchain)
+            self._stats["check_seconds"] += time.perf_counter() - started
+            if self._toolchain is not None and current == self._fingerprint:
+                self._stats["hits"] += 1
+                return self._toolchain
+            toolchain = resolve(env, self.download_wrapper)
+            self._toolchain = toolchain
+            # Taken again so it covers the files this resolution picked
+            self._fingerprint = fingerprint(env, toolchain)
+            self._stats["resolutions"] += 1
+        logger.info(f"Resolved Maven toolchain in {toolchain.seconds * 1000:.1f} ms: "
+                    f"Java from {toolchain.java_source}, Maven from {toolchain.maven_source}")
+        return toolchain
+
+    def invalidate(self):
+        """Force the next get() to resolve from scratch."""
+        with self._lock:
+            self._toolchain = None
+
+    def stats(self):
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            return dict(self._stats)
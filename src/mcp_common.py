@@ -0,0 +1,84 @@
+"""Settings parsing and request logging shared by the MSSQL and Maven servers.
+
+Like ``mcp_metrics``, this module imports neither server package, so each
+can use it without loading the other.
+"""
+
+import json
+import logging
+import random
+
+TRUE_VALUES = ("yes", "true", "1")
+
+# Characters of the previewed argument kept in a log record
+PREVIEW_CHARS = 200
+
+
+class EnvReader:
+    """Reads typed settings from an environment mapping, collecting every problem.
+
+    Invalid values are recorded in ``errors`` and replaced by their defaults,
+    so one pass reports everything that is wrong instead of the first thing.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self.errors = []
+
+    def value(self, name, default, convert=str, check=None, message=None):
+        """Convert ``name`` (or ``default``) and check it, noting an error if either fails."""
+        raw = self.env.get(name, default)
+        try:
+            result = convert(raw)
+        except (TypeError, ValueError):
+            self.errors.append(f"{name}={raw!r} is not a valid {convert.__name__}")
+            return convert(default)
+        if check is not None and not check(result):
+            self.errors.append(f"{name}={raw!r}: {message}")
+        return result
+
+    def flag(self, name, default):
+        """Whether ``name`` (or ``default``) is yes, true or 1."""
+        return self.env.get(name, default).lower() in TRUE_VALUES
+
+    def check(self):
+        """Raise ValueError listing every problem found so far."""
+        if self.errors:
+            raise ValueError("Invalid configuration: " + "; ".join(self.errors))
+
+
+class RequestLog:
+    """Logs tool calls as structured records, sampling the successful ones.
+
+    Logging every argument of every call at INFO is costly for large queries
+    and payloads. Each call is summarized as one JSON object (tool, outcome,
+    duration, argument names and a shortened ``preview`` argument) and
+    successful calls are only logged for a sampled fraction; failures are
+    always logged.
+    """
+
+    def __init__(self, logger, sample_rate=0.1, preview="query"):
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.preview = preview
+
+    def sampled(self):
+        if self.sample_rate >= 1:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def record(self, tool, arguments, seconds, outcome="ok"):
+        """Log one call; the record is only built when it will be written."""
+        failed = outcome != "ok"
+        level = logging.WARNING if failed else logging.INFO
+        if not self.logger.isEnabledFor(level) or not (failed or self.sampled()):
+            return
+        fields = {"tool": tool, "outcome": outcome, "ms": round(seconds * 1000, 1),
+                  "args": sorted(arguments or {})}
+        text = (arguments or {}).get(self.preview)
+        if isinstance(text, str):
+            fields[f"{self.preview}_chars"] = len(text)
+            fields[self.preview] = " ".join(text[:PREVIEW_CHARS * 2].split())[:PREVIEW_CHARS]
+        if not failed and self.sample_rate < 1:
+            fields["sample_rate"] = self.sample_rate
+        self.logger.log(level, "request " + json.dumps(fields, default=str), extra={"request": fields})
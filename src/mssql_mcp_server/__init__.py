@@ -1,19 +1,35 @@
-from . import server
-import asyncio
+"""MSSQL MCP Server package.
 
-# Import Maven functionality
-try:
-    from maven_startup_mcp_server.maven_wrapper import compile, run_tests, find_maven_basedir
-    has_maven = True
-except ImportError:
-    has_maven = False
+Importing the package is cheap. The server module, and with it mcp and the
+ODBC driver, is loaded the first time ``server`` or ``main()`` is used. The
+Maven helpers are re-exported the same way, when the Maven package is
+installed.
+"""
+
+import importlib
+import importlib.util
+
+MAVEN_EXPORTS = ("compile", "run_tests", "find_maven_basedir")
+
+# Checked without importing the Maven package
+has_maven = importlib.util.find_spec("maven_startup_mcp_server") is not None
 
 def main():
    """Main entry point for the package."""
+   import asyncio
+   from . import server
    asyncio.run(server.main())
 
+def __getattr__(name):
+    if name == "server":
+        return importlib.import_module(".server", __name__)
+    if name in MAVEN_EXPORTS and has_maven:
+        from maven_startup_mcp_server import maven_wrapper
+        return getattr(maven_wrapper, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Expose important items at package level
 if has_maven:
     __all__ = ['main', 'server', 'compile', 'run_tests', 'find_maven_basedir']
 else:
-    __all__ = ['main', 'server']
\ No newline at end of file
+    __all__ = ['main', 'server']
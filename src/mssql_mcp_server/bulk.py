@@ -0,0 +1,71 @@
+"""Bulk loading through pyodbc ``fast_executemany``.
+
+With ``fast_executemany`` enabled pyodbc binds a whole batch of parameter
+rows as arrays and sends them in one round trip, instead of one INSERT per
+row.
+"""
+
+import csv
+import io
+import logging
+import time
+
+from .pagination import quote_identifier
+
+logger = logging.getLogger("mssql_mcp_server.bulk")
+
+
+def parse_rows(rows, columns):
+    """Normalize a bulk payload into a list of tuples ordered like ``columns``.
+
+    ``rows`` is either a JSON array of arrays/objects or a CSV string without
+    a header; empty CSV fields become NULL.
+    """
+    if isinstance(rows, str):
+        parsed = [tuple(None if value == "" else value for value in record)
+                  for record in csv.reader(io.StringIO(rows)) if record]
+    elif isinstance(rows, list):
+        parsed = []
+        for record in rows:
+            if isinstance(record, dict):
+                missing = [c for c in columns if c not in record]
+                if missing:
+                    raise ValueError(f"Row is missing columns: {', '.join(missing)}")
+                parsed.append(tuple(record[c] for c in columns))
+            else:
+                parsed.append(tuple(record))
+    else:
+        raise ValueError("Rows must be a JSON array or a CSV string")
+
+    for number, record in enumerate(parsed, start=1):
+        if len(record) != len(columns):
+            raise ValueError(f"Row {number} has {len(record)} values, expected {len(columns)}")
+    return parsed
+
+
+def bulk_insert(pool, table, columns, rows, batch_size=1000):
+    """Insert rows in batches inside a single transaction.
+
+    Returns a dict with the row and batch counts and the elapsed time. Any
+    failure rolls the whole load back.
+    """
+    column_list = ", ".join(quote_identifier(c) for c in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    sql = f"INSERT INTO {quote_identifier(table)} ({column_list}) VALUES ({placeholders})"
+
+    started = time.perf_counter()
+    batches = 0
+    with pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.fast_executemany = True
+            try:
+                for start in range(0, len(rows), batch_size):
+                    cursor.executemany(sql, rows[start:start + batch_size])
+                    batches += 1
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+    elapsed = time.perf_counter() - started
+    logger.info(f"Bulk inserted {len(rows)} rows into {table} in {batches} batches ({elapsed:.3f}s)")
+    return {"rows": len(rows), "batches": batches, "seconds": elapsed}
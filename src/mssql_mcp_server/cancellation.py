@@ -0,0 +1,86 @@
+"""Query timeouts and cancellation.
+
+Statements run on executor threads, so the event loop can't interrupt them
+directly. A ``QueryHandle`` is passed to the worker, which attaches the
+cursor it is using. The loop can then call ``cursor.cancel()`` (ODBC
+SQLCancel, which is safe to call from another thread) when the MCP request
+is cancelled or the watchdog timer fires.
+"""
+
+import threading
+
+# SQLSTATEs reported for a statement timeout and for a cancelled statement
+TIMEOUT_SQLSTATES = ("HYT00", "HYT01")
+CANCELLED_SQLSTATES = ("HY008",)
+
+
+class QueryTimeoutError(TimeoutError):
+    """The statement ran longer than its timeout and was cancelled."""
+
+    def __init__(self, timeout):
+        super().__init__(f"Query timed out after {timeout:g} seconds and was cancelled on the server")
+        self.timeout = timeout
+
+
+class QueryCancelledError(RuntimeError):
+    """The statement was cancelled because its request was cancelled."""
+
+    def __init__(self):
+        super().__init__("Query was cancelled")
+
+
+def sqlstate(error):
+    """Return the SQLSTATE pyodbc puts first in an error's args, if any."""
+    args = getattr(error, "args", ())
+    if args and isinstance(args[0], str) and len(args[0]) == 5:
+        return args[0]
+    return None
+
+
+class QueryHandle:
+    """Cancellation handle shared by the event loop and one worker thread."""
+
+    def __init__(self, timeout=0):
+        self.timeout = timeout
+        self.cancelled = False
+        self.timed_out = False
+        self._cursor = None
+        self._lock = threading.Lock()
+
+    def attach(self, cursor):
+        """Register the cursor about to run; refuse if already cancelled."""
+        with self._lock:
+            if self.cancelled:
+                raise self._error()
+            self._cursor = cursor
+
+    def detach(self):
+        with self._lock:
+            self._cursor = None
+
+    def cancel(self, timed_out=False):
+        """Cancel the attached statement, or the next one to be attached."""
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            self.timed_out = timed_out
+            cursor = self._cursor
+        if cursor is not None:
+            try:
+                cursor.cancel()
+            except Exception:
+                # The statement may have finished between the check and the cancel
+                pass
+
+    def _error(self):
+        return QueryTimeoutError(self.timeout) if self.timed_out else QueryCancelledError()
+
+    def translate(self, error):
+        """Map a driver error caused by a timeout or cancel to a specific error."""
+        state = sqlstate(error)
+        if self.timed_out or state in TIMEOUT_SQLSTATES:
+            return QueryTimeoutError(self.timeout)
+        if self.cancelled or state in CANCELLED_SQLSTATES:
+            return QueryCancelledError()
+        return error
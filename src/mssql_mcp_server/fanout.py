@@ -0,0 +1,110 @@
+"""Running one read query on many connection profiles and merging the results.
+
+Each target runs on its own pooled connection in a worker thread; the server
+caps how many run at once. Rows from every target are merged into a single
+result with a leading ``source`` column naming the profile they came from.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+
+from .cancellation import QueryHandle
+from .formats import make_encoder
+
+logger = logging.getLogger("mssql_mcp_server.fanout")
+
+SOURCE_COLUMN = ("source", str, None, None, None, None, False)
+
+
+@dataclass
+class TargetResult:
+    """Outcome of the query on one profile."""
+
+    name: str
+    description: list | None = None
+    rows: list = field(default_factory=list)
+    truncated: bool = False
+    error: str | None = None
+    seconds: float = 0.0
+
+
+def query_target(pool, name, query, params=None, max_rows=1000, handle=None):
+    """Run a read query on one profile's pool and return its first result set.
+
+    At most ``max_rows`` rows are kept; the connection is released (and its
+    transaction rolled back) before returning.
+    """
+    handle = handle or QueryHandle()
+    result = TargetResult(name)
+    started = time.perf_counter()
+    with pool.connection() as conn:
+        if handle.timeout:
+            conn.timeout = math.ceil(handle.timeout)
+        pool.note_statement(conn, query)
+        with conn.cursor() as cursor:
+            handle.attach(cursor)
+            try:
+                cursor.execute(query, *(params or []))
+                while not cursor.description and cursor.nextset():
+                    pass
+                if cursor.description:
+                    result.description = cursor.description
+                    result.rows = cursor.fetchmany(max_rows + 1)
+                    if len(result.rows) > max_rows:
+                        result.rows = result.rows[:max_rows]
+                        result.truncated = True
+            except Exception as e:
+                error = handle.translate(e)
+                if error is not e:
+                    raise error from e
+                raise
+            finally:
+                handle.detach()
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def merge_results(results, fmt, max_bytes):
+    """Merge target results into one encoded result with a ``source`` column.
+
+    Targets whose columns differ from the first target with rows are marked
+    as failed rather than merged. Rows stop once ``max_bytes`` is reached.
+    Returns the encoded text and whether it was cut short by the byte budget.
+    """
+    first = next((r for r in results if r.error is None and r.description), None)
+    if first is None:
+        return None, False
+    columns = [d[0] for d in first.description]
+    encoder = make_encoder(fmt, [SOURCE_COLUMN] + list(first.description))
+    size = encoder.begin() + encoder.footer_size
+    count = 0
+    for result in results:
+        if result.error is not None or not result.description:
+            continue
+        if [d[0] for d in result.description] != columns:
+            result.error = f"columns differ from {first.name}: {', '.join(d[0] for d in result.description)}"
+            result.rows = []
+            continue
+        for row in result.rows:
+            piece, piece_size = encoder.encode((result.name, *row))
+            if count and size + piece_size > max_bytes:
+                return encoder.finish(), True
+            encoder.append(piece)
+            size += piece_size
+            count += 1
+    return encoder.finish(), False
+
+
+def summarize(results):
+    """One line per target with its row count or error and its latency."""
+    lines = []
+    for result in results:
+        elapsed = f"{result.seconds * 1000:.0f} ms"
+        if result.error is not None:
+            lines.append(f"{result.name}: error after {elapsed}: {result.error}")
+        else:
+            rows = f"{len(result.rows)} rows" + (" (truncated)" if result.truncated else "")
+            lines.append(f"{result.name}: {rows} in {elapsed}")
+    return "\n".join(lines)
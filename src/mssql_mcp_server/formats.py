@@ -0,0 +1,417 @@
+"""Output formats for query results.
+
+``csv`` stays the default. ``json`` keeps NULLs, numbers and booleans typed.
+``arrow`` returns a base64 Arrow IPC stream inline, while ``arrow_file`` and
+``parquet`` write the whole result to a spool directory batch by batch. An
+Arrow file holds one fetch batch in memory at a time; Parquet buffers batches
+until a row group is full, which is at most ``row_group_bytes`` of Arrow data
+(MSSQL_PARQUET_ROW_GROUP_BYTES). The columnar formats need the optional
+pyarrow package.
+
+Inline encoders are fed a fetched batch at a time by ``ResultStream``
+through ``begin`` / ``encode_batch`` / ``append_batch`` / ``finish``. The
+batch's per-row sizes let a chunk stop exactly at its row or byte budget.
+``encode`` / ``append`` do the same for a single row.
+"""
+
+import base64
+import datetime
+import decimal
+import io
+import itertools
+import json
+import logging
+import operator
+import os
+import re
+import time
+import uuid
+
+from .lazy import pa, pq
+
+logger = logging.getLogger("mssql_mcp_server.formats")
+
+INLINE_FORMATS = ("csv", "json", "arrow")
+SPOOL_FORMATS = ("arrow_file", "parquet")
+OUTPUT_FORMATS = INLINE_FORMATS + SPOOL_FORMATS
+
+# Spooled results get a directory of their own under the spool directory, and
+# only files named the way spool_result names them are ever cleaned up
+RESULTS_DIR = "results"
+SPOOLED_NAME = re.compile(r"^[0-9a-f]{32}\.(arrows|parquet)$")
+
+# Most rows buffered per Parquet row group; tiny row groups compress poorly.
+# Wide rows reach the byte limit first.
+PARQUET_ROW_GROUP_ROWS = 65536
+PARQUET_ROW_GROUP_BYTES = 64 * 1024 * 1024
+
+
+def check_format(fmt):
+    """Validate an output format name, including its optional dependency."""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {fmt}. Expected one of: {', '.join(OUTPUT_FORMATS)}")
+    if fmt not in ("csv", "json") and not pa.available():
+        raise ValueError(f"Output format '{fmt}' requires the pyarrow package")
+    return fmt
+
+
+def json_value(value):
+    """Convert a pyodbc value to something JSON can carry without loss."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    return str(value)
+
+
+def csv_binary(value):
+    return "0x" + bytes(value).hex()
+
+
+def csv_decimal(value):
+    text = str(value)
+    # str() switches to exponent notation for very small or large values
+    return text if "E" not in text else format(value, "f")
+
+
+# Text for cursor.description type codes whose str() doesn't suit CSV; the
+# rest (numbers, strings, dates and times in ISO format) use str()
+CSV_TYPES = {
+    bool: ("0", "1").__getitem__,
+    decimal.Decimal: csv_decimal,
+    bytes: csv_binary,
+    bytearray: csv_binary,
+}
+
+# Type codes whose text is never empty and never holds a comma, quote or line break
+CSV_PLAIN_TYPES = (int, float, datetime.datetime, datetime.date, datetime.time, *CSV_TYPES)
+
+
+def csv_field(value):
+    """Encode one CSV field: NULL is an empty field, the empty string is ``""``."""
+    if value is None:
+        return ""
+    text = CSV_TYPES.get(type(value), str)(value)
+    if not text:
+        return '""'
+    if '"' in text or "," in text or "\n" in text or "\r" in text:
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def csv_text_column(values):
+    return list(map(str, values))
+
+
+def csv_bool_column(values):
+    return list(map(("0", "1").__getitem__, values))
+
+
+def csv_binary_column(values):
+    return list(map("0x".__add__, map(operator.methodcaller("hex"), values)))
+
+
+def csv_decimal_column(values):
+    texts = list(map(str, values))
+    if any(map(operator.contains, texts, itertools.repeat("E"))):
+        return list(map(csv_decimal, values))
+    return texts
+
+
+# The same conversions as CSV_TYPES, applied to a whole column at C speed
+CSV_COLUMNS = {
+    bool: csv_bool_column,
+    decimal.Decimal: csv_decimal_column,
+    bytes: csv_binary_column,
+    bytearray: csv_binary_column,
+}
+
+
+# Converters that turn NULL into "None", which no other value of their types
+# produces, so NULLs can be blanked afterwards in one pass
+CSV_NULL_SAFE = (csv_text_column, csv_decimal_column)
+CSV_NULL_FIELDS = {"None": ""}
+
+
+class CsvEncoder:
+    """Comma-separated text with a header line (RFC 4180 quoting).
+
+    Rows are encoded a fetched batch at a time, column by column: the batch
+    is transposed, each column converted with one ``map`` picked from the
+    ``cursor.description`` type code, and the rows joined back together, so
+    no Python code runs per cell. A text column holding NULLs, empty
+    strings or characters that need quoting falls back to ``csv_field`` for
+    that column only. Text is written to one buffer that is reused for every chunk.
+    """
+
+    footer_size = 0
+
+    def __init__(self, description):
+        self.columns = [desc[0] for desc in description]
+        # (column converter, may need quoting, values are already str)
+        self._plan = [(CSV_COLUMNS.get(desc[1], csv_text_column), desc[1] not in CSV_PLAIN_TYPES, desc[1] is str)
+                      for desc in description]
+        self._buf = io.StringIO()
+
+    def begin(self):
+        self._buf.seek(0)
+        self._buf.truncate()
+        header = ",".join(map(csv_field, self.columns))
+        self._buf.write(header)
+        return len(header.encode("utf-8"))
+
+    def _column(self, convert, text, is_str, values):
+        """Return a column's fields and whether they are all ASCII."""
+        nulls = None in values
+        if nulls and (text or convert not in CSV_NULL_SAFE):
+            return list(map(csv_field, values)), False
+        try:
+            fields = values if is_str else convert(values)
+            if not text:
+                return (list(map(CSV_NULL_FIELDS.get, fields, fields)) if nulls else fields), True
+            joined = "".join(fields)
+        except (TypeError, AttributeError, ValueError, IndexError):
+            # A value not matching its column's type code
+            return list(map(csv_field, values)), False
+        if "," in joined or '"' in joined or "\n" in joined or "\r" in joined or "" in fields:
+            return list(map(csv_field, values)), False
+        return fields, joined.isascii()
+
+    def encode_batch(self, rows):
+        """Return the lines for ``rows`` and their sizes in bytes, each counting its newline."""
+        ascii = True
+        columns = []
+        for plan, values in zip(self._plan, zip(*rows)):
+            fields, column_ascii = self._column(*plan, values)
+            columns.append(fields)
+            ascii = ascii and column_ascii
+        lines = list(map(",".join, zip(*columns)))
+        lengths = map(len, lines) if ascii else map(len, map(str.encode, lines))
+        return lines, list(map((1).__add__, lengths))
+
+    def append_batch(self, lines):
+        if lines:
+            self._buf.write("\n")
+            self._buf.write("\n".join(lines))
+
+    def encode(self, row):
+        lines, sizes = self.encode_batch([row])
+        return lines[0], sizes[0]
+
+    def append(self, piece):
+        self._buf.write("\n")
+        self._buf.write(piece)
+
+    def finish(self):
+        return self._buf.getvalue()
+
+
+class JsonEncoder:
+    """``{"columns": [...], "rows": [[...], ...]}`` with typed values."""
+
+    footer_size = 2
+
+    def __init__(self, description):
+        self.columns = [desc[0] for desc in description]
+
+    def begin(self):
+        self._buf = io.StringIO()
+        self._count = 0
+        header = '{"columns": ' + json.dumps(self.columns) + ', "rows": ['
+        self._buf.write(header)
+        return len(header.encode("utf-8"))
+
+    def encode(self, row):
+        piece = json.dumps([json_value(v) for v in row])
+        # One byte for the comma before it, which the first row doesn't need
+        return piece, 1 + (len(piece) if piece.isascii() else len(piece.encode("utf-8")))
+
+    def append(self, piece):
+        if self._count:
+            self._buf.write(",")
+        self._buf.write(piece)
+        self._count += 1
+
+    def encode_batch(self, rows):
+        pieces, sizes = [], []
+        for row in rows:
+            piece, size = self.encode(row)
+            pieces.append(piece)
+            sizes.append(size)
+        return pieces, sizes
+
+    def append_batch(self, pieces):
+        for piece in pieces:
+            self.append(piece)
+
+    def finish(self, extra=None):
+        self._buf.write("]")
+        for key, value in (extra or {}).items():
+            self._buf.write(f", {json.dumps(key)}: {json.dumps(value)}")
+        self._buf.write("}")
+        return self._buf.getvalue()
+
+
+def _arrow_type(type_code, precision, scale):
+    if type_code is bool:
+        return pa.bool_()
+    if type_code is int:
+        return pa.int64()
+    if type_code is float:
+        return pa.float64()
+    if type_code is decimal.Decimal:
+        if precision and 0 < precision <= 38:
+            return pa.decimal128(precision, scale or 0)
+        return pa.string()
+    if type_code is datetime.datetime:
+        return pa.timestamp("us")
+    if type_code is datetime.date:
+        return pa.date32()
+    if type_code is datetime.time:
+        return pa.time64("us")
+    if type_code in (bytes, bytearray):
+        return pa.binary()
+    return pa.string()
+
+
+def arrow_schema(description):
+    """Build an Arrow schema from ``cursor.description`` type codes."""
+    return pa.schema([
+        pa.field(name, _arrow_type(type_code, precision, scale))
+        for name, type_code, _, _, precision, scale, _ in description
+    ])
+
+
+def record_batch(schema, rows):
+    """Transpose fetched rows into an Arrow record batch."""
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_string(field.type):
+            values = [None if v is None else str(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class ArrowEncoder:
+    """Base64-encoded Arrow IPC stream holding one record batch per chunk.
+
+    Row sizes are estimates (fixed width for numbers and dates, actual
+    length for text and binary, plus base64 overhead), so the byte budget is
+    approximate for this format.
+    """
+
+    footer_size = 0
+
+    def __init__(self, description):
+        self.schema = arrow_schema(description)
+
+    def begin(self):
+        self._rows = []
+        return 0
+
+    def encode(self, row):
+        size = 0
+        for value in row:
+            size += len(value) if isinstance(value, (str, bytes, bytearray)) else 8
+        return row, size * 4 // 3 + 1
+
+    def append(self, piece):
+        self._rows.append(piece)
+
+    def encode_batch(self, rows):
+        return rows, [self.encode(row)[1] for row in rows]
+
+    def append_batch(self, rows):
+        self._rows.extend(rows)
+
+    def finish(self):
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, self.schema) as writer:
+            writer.write_batch(record_batch(self.schema, self._rows))
+        self._rows = []
+        return base64.b64encode(sink.getvalue().to_pybytes()).decode("ascii")
+
+
+ENCODERS = {"csv": CsvEncoder, "json": JsonEncoder, "arrow": ArrowEncoder}
+
+
+def make_encoder(fmt, description):
+    """Return the inline encoder for a format."""
+    return ENCODERS[fmt](description)
+
+
+def encode_rows(encoder, rows, **finish_kwargs):
+    """Encode a bounded list of rows in one go."""
+    encoder.begin()
+    pieces, _ = encoder.encode_batch(rows)
+    encoder.append_batch(pieces)
+    return encoder.finish(**finish_kwargs)
+
+
+def cleanup_spool(spool_dir, ttl):
+    """Delete result files spool_result wrote more than ttl seconds ago; anything else is left alone."""
+    results = os.path.join(spool_dir, RESULTS_DIR)
+    if not os.path.isdir(results):
+        return
+    cutoff = time.time() - ttl
+    for entry in os.scandir(results):
+        if not SPOOLED_NAME.match(entry.name):
+            continue
+        try:
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError as e:
+            logger.debug(f"Could not remove spooled file {entry.path}: {e}")
+
+
+def spool_result(cursor, fmt, spool_dir, batch_size=500, row_group_bytes=PARQUET_ROW_GROUP_BYTES):
+    """Write the rest of a cursor's rows to a file under ``spool_dir``.
+
+    Rows go from fetchmany batches straight into record batches, so the full
+    result is never held in memory. A Parquet row group is written once it
+    holds ``PARQUET_ROW_GROUP_ROWS`` rows or ``row_group_bytes`` bytes of
+    record batches. Returns ``(path, rows, size_in_bytes)``.
+    """
+    results = os.path.join(spool_dir, RESULTS_DIR)
+    os.makedirs(results, exist_ok=True)
+    extension = "arrows" if fmt == "arrow_file" else "parquet"
+    path = os.path.join(results, f"{uuid.uuid4().hex}.{extension}")
+    schema = arrow_schema(cursor.description)
+    total = 0
+    pending = []  # Parquet batches waiting to fill a row group
+    pending_rows = pending_bytes = 0
+
+    if fmt == "arrow_file":
+        writer = pa.ipc.new_stream(path, schema)
+    else:
+        writer = pq.ParquetWriter(path, schema)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            total += len(rows)
+            batch = record_batch(schema, rows)
+            if fmt == "arrow_file":
+                writer.write_batch(batch)
+                continue
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            pending_bytes += batch.nbytes
+            if pending_rows >= PARQUET_ROW_GROUP_ROWS or pending_bytes >= row_group_bytes:
+                writer.write_table(pa.Table.from_batches(pending, schema=schema))
+                pending = []
+                pending_rows = pending_bytes = 0
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending, schema=schema))
+        writer.close()
+    except BaseException:
+        writer.close()
+        os.remove(path)
+        raise
+    return path, total, os.path.getsize(path)
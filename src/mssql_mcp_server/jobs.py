@@ -0,0 +1,313 @@
+"""Background query jobs for queries that outlast a tool call.
+
+``submit_query`` hands the query to a ``JobManager`` and returns a job id at
+once. At most ``max_running`` jobs run at a time on the manager's own worker
+threads; up to ``max_queued`` more wait their turn. A job streams its first
+row-returning result set to a JSON Lines file under ``<spool_dir>/jobs``,
+one row per line, so memory stays bounded by the fetch batch size. The client
+polls ``job_status`` and reads the spilled rows page by page with
+``fetch_job_results``. Finished jobs and their files are removed ``ttl``
+seconds after they finish.
+"""
+
+import json
+import logging
+import math
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .cancellation import QueryCancelledError, QueryHandle, QueryTimeoutError
+from .formats import json_value, make_encoder
+
+logger = logging.getLogger("mssql_mcp_server.jobs")
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# A file offset is remembered every this many rows so a page read seeks close to its first row
+INDEX_INTERVAL = 1000
+
+# Type codes that survive the JSON round trip; everything else comes back as text
+JSON_TYPES = (bool, int, float)
+
+
+@dataclass
+class Job:
+    """One submitted query and what is known about its progress."""
+
+    id: str
+    query: str
+    params: list
+    timeout: float
+    path: str
+    state: str = QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    columns: list | None = None
+    rows: int = 0
+    rows_affected: int = -1
+    size: int = 0
+    error: str | None = None
+    offsets: list = field(default_factory=lambda: [0])
+    handle: QueryHandle = field(default_factory=QueryHandle)
+    future: object = None
+    on_finish: object = None
+
+    def describe(self):
+        """One-line summary of the job's state."""
+        now = time.time()
+        if self.state == QUEUED:
+            return f"Job {self.id}: queued for {now - self.submitted_at:.1f}s"
+        elapsed = (self.finished_at or now) - self.started_at
+        if self.state == RUNNING:
+            return f"Job {self.id}: running for {elapsed:.1f}s, {self.rows} rows so far"
+        if self.state == DONE:
+            if self.columns is None:
+                return f"Job {self.id}: done in {elapsed:.1f}s. Rows affected: {self.rows_affected}"
+            return f"Job {self.id}: done in {elapsed:.1f}s, {self.rows} rows ({self.size} bytes) ready to fetch"
+        return f"Job {self.id}: {self.state} after {elapsed:.1f}s" + (f": {self.error}" if self.error else "")
+
+
+class JobManager:
+    """Runs submitted queries in the background and keeps their spilled results.
+
+    Jobs use connections from the server pool, so ``max_running`` should stay
+    below the pool size to leave room for interactive calls. ``get_pool`` is
+    called as each job starts, so jobs submitted after a settings reload use
+    the new pool while those already running keep their connection.
+    """
+
+    def __init__(self, get_pool, spool_dir, max_running=2, max_queued=16, ttl=3600.0, batch_size=500):
+        self.get_pool = get_pool
+        # A directory of its own, so cleanup_spool's shorter TTL never removes job results
+        self.spool_dir = os.path.join(spool_dir, "jobs")
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix="mssql-job")
+
+    def submit(self, query, params=None, timeout=0, on_finish=None):
+        """Queue a query and return its job; raises ValueError when the queue is full.
+
+        ``on_finish(job)`` is called on the worker thread once a job that
+        started has finished, whether it succeeded or not.
+        """
+        self.prune()
+        with self._lock:
+            waiting = sum(1 for job in self._jobs.values() if job.state == QUEUED)
+            if waiting >= self.max_queued:
+                raise ValueError(f"Too many queued jobs ({waiting}); try again once some have finished")
+            job_id = secrets.token_hex(8)
+            job = Job(job_id, query, list(params or []), timeout,
+                      os.path.join(self.spool_dir, f"{job_id}.jsonl"), handle=QueryHandle(timeout),
+                      on_finish=on_finish)
+            self._jobs[job_id] = job
+            job.future = self._executor.submit(self._run, job)
+        logger.info(f"Submitted job {job_id}")
+        return job
+
+    def get(self, job_id):
+        """Return a job by id; raises ValueError if unknown or expired."""
+        self.prune()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise ValueError(f"Unknown or expired job: {job_id}")
+        return job
+
+    def list(self):
+        """Return every job still kept, oldest first."""
+        self.prune()
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.submitted_at)
+
+    def counts(self):
+        """Return the number of kept jobs in each state."""
+        with self._lock:
+            states = [job.state for job in self._jobs.values()]
+        return {state: states.count(state) for state in (QUEUED, RUNNING) + FINISHED_STATES}
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns False if it had already finished."""
+        job = self.get(job_id)
+        with self._lock:
+            if job.state in FINISHED_STATES:
+                return False
+            if job.state == QUEUED and job.future.cancel():
+                self._finish(job, CANCELLED)
+                return True
+        job.handle.cancel()
+        return True
+
+    def _finish(self, job, state, error=None):
+        job.state = state
+        job.error = error
+        job.finished_at = time.time()
+        if job.started_at is None:
+            job.started_at = job.finished_at
+
+    def _run(self, job):
+        with self._lock:
+            if job.state != QUEUED:
+                return
+            job.state = RUNNING
+            job.started_at = time.time()
+        try:
+            self._spill(job)
+        except QueryTimeoutError as e:
+            state, error = FAILED, str(e)
+        except QueryCancelledError:
+            state, error = CANCELLED, None
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            state, error = FAILED, str(e)
+        else:
+            state, error = DONE, None
+        if state != DONE:
+            self._remove_file(job)
+        with self._lock:
+            self._finish(job, state, error)
+        logger.info(job.describe())
+        if job.on_finish is not None:
+            try:
+                job.on_finish(job)
+            except Exception as e:
+                logger.warning(f"Job {job.id} completion callback failed: {e}")
+
+    def _spill(self, job):
+        handle = job.handle
+        deadline = time.monotonic() + job.timeout if job.timeout else None
+        pool = self.get_pool()
+        with pool.connection() as conn:
+            if job.timeout:
+                conn.timeout = math.ceil(job.timeout)
+            pool.note_statement(conn, job.query)
+            with conn.cursor() as cursor:
+                handle.attach(cursor)
+                try:
+                    cursor.execute(job.query, *job.params)
+                    while not cursor.description:
+                        if cursor.rowcount >= 0:
+                            job.rows_affected = max(job.rows_affected, 0) + cursor.rowcount
+                        if not cursor.nextset():
+                            break
+                    if cursor.description:
+                        self._write_rows(job, cursor, deadline)
+                        # Drain later result sets so the batch runs to completion
+                        while cursor.nextset():
+                            pass
+                except Exception as e:
+                    error = handle.translate(e)
+                    if error is not e:
+                        raise error from e
+                    raise
+                finally:
+                    handle.detach()
+                conn.commit()
+
+    def _write_rows(self, job, cursor, deadline):
+        job.columns = [(desc[0], desc[1] if desc[1] in JSON_TYPES else str) for desc in cursor.description]
+        os.makedirs(self.spool_dir, exist_ok=True)
+        with open(job.path, "wb") as f:
+            while True:
+                if deadline is not None and time.monotonic() > deadline:
+                    # The ODBC timeout only covers execution; this bounds the fetch
+                    job.handle.cancel(timed_out=True)
+                if job.handle.cancelled:
+                    raise QueryTimeoutError(job.timeout) if job.handle.timed_out else QueryCancelledError()
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    f.write(json.dumps([json_value(v) for v in row]).encode("utf-8") + b"\n")
+                    job.rows += 1
+                    if job.rows % INDEX_INTERVAL == 0:
+                        job.offsets.append(f.tell())
+            job.size = f.tell()
+
+    def read(self, job, offset=0, max_rows=1000, max_bytes=4 * 1024 * 1024, fmt="csv"):
+        """Encode spilled rows starting at row ``offset``, up to ``max_rows`` rows or ``max_bytes``.
+
+        At least one row is returned even if it alone exceeds ``max_bytes``.
+        Returns the text and the number of rows in it.
+        """
+        if job.state != DONE:
+            raise ValueError(job.describe())
+        if job.columns is None:
+            raise ValueError(f"Job {job.id} returned no rows. Rows affected: {job.rows_affected}")
+        if offset < 0:
+            raise ValueError("Offset must not be negative")
+        description = [(name, type_code, None, None, None, None, True) for name, type_code in job.columns]
+        encoder = make_encoder(fmt, description)
+        size = encoder.begin() + encoder.footer_size
+        count = 0
+        with open(job.path, "rb") as f:
+            checkpoint = min(offset // INDEX_INTERVAL, len(job.offsets) - 1)
+            f.seek(job.offsets[checkpoint])
+            for _ in range(offset - checkpoint * INDEX_INTERVAL):
+                if not f.readline():
+                    break
+            for line in f:
+                if count >= max_rows:
+                    break
+                piece, piece_size = encoder.encode(json.loads(line))
+                if count and size + piece_size > max_bytes:
+                    break
+                encoder.append(piece)
+                size += piece_size
+                count += 1
+        return encoder.finish(), count
+
+    def prune(self):
+        """Forget finished jobs older than the TTL and delete their files."""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.state in FINISHED_STATES and job.finished_at < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            self._remove_file(job)
+            logger.debug(f"Expired job {job.id}")
+
+    def _remove_file(self, job):
+        try:
+            os.remove(job.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove job file {job.path}: {e}")
+
+    def close(self, wait=True):
+        """Cancel every job, stop the workers and delete the spilled results."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            self._jobs.clear()
+        for job in jobs:
+            if job.future is not None:
+                job.future.cancel()
+            job.handle.cancel()
+        self._executor.shutdown(wait=wait)
+        if wait:
+            for job in jobs:
+                self._remove_file(job)
+        else:
+            # Running jobs may still be writing; let them finish, then clear up what's left
+            threading.Thread(target=self._cleanup_after, args=(jobs,), daemon=True).start()
+
+    def _cleanup_after(self, jobs):
+        for job in jobs:
+            if job.future is not None and not job.future.cancelled():
+                try:
+                    job.future.result()
+                except Exception:
+                    pass
+            self._remove_file(job)
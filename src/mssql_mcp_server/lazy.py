@@ -0,0 +1,55 @@
+"""Deferred imports for the driver and optional dependencies.
+
+MCP clients start a fresh server process for every session, so everything
+imported at start-up delays the first response. pyodbc loads the ODBC
+driver manager and pyarrow is large; neither is needed until the first
+query or the first columnar result. Modules refer to them through a
+``LazyModule``, which imports the real module on first attribute access.
+``except pyodbc.Error`` works as usual: the attribute is only looked up
+once an exception is being matched.
+"""
+
+import importlib
+import importlib.util
+
+
+class LazyModule:
+    """Stand-in for a module that is imported the first time it is used.
+
+    ``submodules`` are imported along with it, for packages such as pyarrow
+    whose submodules aren't loaded by the package itself.
+    """
+
+    def __init__(self, name, *submodules):
+        self._name = name
+        self._submodules = submodules
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            module = importlib.import_module(self._name)
+            for submodule in self._submodules:
+                importlib.import_module(submodule)
+            self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def available(self):
+        """Whether the module can be imported, checked without importing it."""
+        if self._module is not None:
+            return True
+        try:
+            return importlib.util.find_spec(self._name) is not None
+        except ValueError:
+            return False
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+pyodbc = LazyModule("pyodbc")
+pa = LazyModule("pyarrow", "pyarrow.ipc")
+pq = LazyModule("pyarrow.parquet")
@@ -0,0 +1,52 @@
+"""MSSQL server metrics in the Prometheus text exposition format.
+
+The metric types and exporters live in the shared ``mcp_metrics`` module;
+this module adds the bucket sets for query latency and result sizes and a
+writer that refreshes the textfile-collector file periodically. Gauges such
+as pool occupancy are read from their sources only when the metrics are
+rendered, which can also happen through an MCP resource.
+"""
+
+import logging
+import threading
+
+# Registry and start_http_server are re-exported for the server
+from mcp_metrics import Registry, start_http_server, write_textfile
+
+logger = logging.getLogger("mssql_mcp_server.metrics")
+
+# Seconds; spans sub-millisecond cache hits to multi-minute queries
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+SIZE_BUCKETS = (10, 100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+class TextfileWriter:
+    """Rewrites a textfile-collector file every ``interval`` seconds from a daemon thread."""
+
+    def __init__(self, registry, path, interval=15.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-textfile", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                write_textfile(self.registry, self.path)
+            except OSError as e:
+                logger.warning(f"Could not write metrics to {self.path}: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self):
+        """Stop the writer after one last write."""
+        self._stop.set()
+        self._thread.join(timeout=5)
+        try:
+            write_textfile(self.registry, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics to {self.path}: {e}")
@@ -0,0 +1,293 @@
+"""Execution plan capture for query triage.
+
+The estimated plan comes from ``SET SHOWPLAN_XML ON``, which compiles the
+batch without running it. The actual plan comes from ``SET STATISTICS XML
+ON`` together with ``SET STATISTICS IO, TIME ON``; the query really runs, so
+it is wrapped in a transaction that is always rolled back. The showplan XML is
+summarized into a compact operator tree rather than returned verbatim.
+"""
+
+import logging
+import math
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+
+from .cancellation import QueryHandle
+
+logger = logging.getLogger("mssql_mcp_server.plans")
+
+SHOWPLAN_NS = "{http://schemas.microsoft.com/sqlserver/2004/07/showplan}"
+
+# Number of operators listed under "Top operators"
+TOP_OPERATORS = 5
+
+# Driver/server prefixes pyodbc leaves on informational messages
+MESSAGE_PREFIX = re.compile(r"^(\[[^\]]*\]\s*)+")
+
+
+@dataclass
+class PlanOperator:
+    """One RelOp node of a showplan."""
+
+    node_id: int
+    physical_op: str
+    logical_op: str
+    estimate_rows: float
+    subtree_cost: float
+    target: str = ""
+    actual_rows: int | None = None
+    actual_executions: int | None = None
+    logical_reads: int | None = None
+    elapsed_ms: int | None = None
+    children: list["PlanOperator"] = field(default_factory=list)
+
+    @property
+    def own_cost(self):
+        """Estimated cost of this operator alone, without its inputs."""
+        return max(self.subtree_cost - sum(c.subtree_cost for c in self.children), 0.0)
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+@dataclass
+class PlanStatement:
+    """One statement of the plan with its root operator."""
+
+    text: str
+    cost: float
+    root: PlanOperator | None
+    missing_indexes: list[str] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+
+def _child_relops(elem):
+    """Yield the RelOps directly below ``elem``, skipping nested operators."""
+    for child in elem:
+        if child.tag == SHOWPLAN_NS + "RelOp":
+            yield child
+        else:
+            yield from _child_relops(child)
+
+
+def _own_elements(elem, tag):
+    """Yield ``tag`` elements belonging to this RelOp rather than its children."""
+    for child in elem:
+        if child.tag == SHOWPLAN_NS + "RelOp":
+            continue
+        if child.tag == SHOWPLAN_NS + tag:
+            yield child
+        yield from _own_elements(child, tag)
+
+
+def _target(elem):
+    for obj in _own_elements(elem, "Object"):
+        parts = [obj.get(a) for a in ("Schema", "Table", "Index") if obj.get(a)]
+        if parts:
+            return ".".join(parts)
+    return ""
+
+
+def _parse_relop(elem):
+    op = PlanOperator(
+        node_id=int(elem.get("NodeId", 0)),
+        physical_op=elem.get("PhysicalOp", ""),
+        logical_op=elem.get("LogicalOp", ""),
+        estimate_rows=float(elem.get("EstimateRows", 0)),
+        subtree_cost=float(elem.get("EstimatedTotalSubtreeCost", 0)),
+        target=_target(elem),
+    )
+    runtime = elem.find(SHOWPLAN_NS + "RunTimeInformation")
+    if runtime is not None:
+        threads = runtime.findall(SHOWPLAN_NS + "RunTimeCountersPerThread")
+        op.actual_rows = sum(int(t.get("ActualRows", 0)) for t in threads)
+        op.actual_executions = sum(int(t.get("ActualExecutions", 0)) for t in threads)
+        if any(t.get("ActualLogicalReads") is not None for t in threads):
+            op.logical_reads = sum(int(t.get("ActualLogicalReads", 0)) for t in threads)
+        if any(t.get("ActualElapsedms") is not None for t in threads):
+            op.elapsed_ms = max(int(t.get("ActualElapsedms", 0)) for t in threads)
+    op.children = [_parse_relop(child) for child in _child_relops(elem)]
+    return op
+
+
+def _missing_index(group):
+    impact = float(group.get("Impact", 0))
+    for index in group.iter(SHOWPLAN_NS + "MissingIndex"):
+        columns = {}
+        for column_group in index.findall(SHOWPLAN_NS + "ColumnGroup"):
+            names = [c.get("Name", "") for c in column_group.findall(SHOWPLAN_NS + "Column")]
+            columns[column_group.get("Usage", "")] = ", ".join(names)
+        keys = ", ".join(columns[u] for u in ("EQUALITY", "INEQUALITY") if columns.get(u))
+        text = f"{index.get('Schema', '')}.{index.get('Table', '')} ({keys})"
+        if columns.get("INCLUDE"):
+            text += f" INCLUDE ({columns['INCLUDE']})"
+        return f"{text}, estimated impact {impact:.0f}%"
+    return None
+
+
+def parse_showplan(xml_text):
+    """Parse showplan XML into a list of ``PlanStatement``."""
+    root = ET.fromstring(xml_text)
+    statements = []
+    for stmt in root.iter(SHOWPLAN_NS + "StmtSimple"):
+        plan = stmt.find(SHOWPLAN_NS + "QueryPlan")
+        relop = plan.find(SHOWPLAN_NS + "RelOp") if plan is not None else None
+        statement = PlanStatement(
+            text=" ".join((stmt.get("StatementText") or "").split()),
+            cost=float(stmt.get("StatementSubTreeCost", 0)),
+            root=_parse_relop(relop) if relop is not None else None,
+        )
+        if plan is not None:
+            for group in plan.iter(SHOWPLAN_NS + "MissingIndexGroup"):
+                hint = _missing_index(group)
+                if hint:
+                    statement.missing_indexes.append(hint)
+            for warnings in plan.iter(SHOWPLAN_NS + "Warnings"):
+                # Some warnings are flag attributes, others child elements
+                statement.warnings.extend(name for name, value in warnings.attrib.items() if value in ("1", "true"))
+                statement.warnings.extend(child.tag.replace(SHOWPLAN_NS, "") for child in warnings)
+        statements.append(statement)
+    return statements
+
+
+def _format_rows(value):
+    return f"{value:.0f}" if value >= 1 or value == 0 else f"{value:.2f}"
+
+
+def _describe(op, total):
+    name = op.physical_op
+    if op.logical_op and op.logical_op != op.physical_op:
+        name += f" ({op.logical_op})"
+    if op.target:
+        name += f" {op.target}"
+    details = [f"est rows {_format_rows(op.estimate_rows)}"]
+    if op.actual_rows is not None:
+        details.append(f"actual rows {op.actual_rows}")
+        if op.actual_executions and op.actual_executions > 1:
+            details.append(f"executions {op.actual_executions}")
+    if op.logical_reads:
+        details.append(f"logical reads {op.logical_reads}")
+    if op.elapsed_ms is not None:
+        details.append(f"{op.elapsed_ms} ms")
+    if total:
+        details.append(f"cost {op.own_cost / total:.0%}")
+    return f"[{op.node_id}] {name}: {', '.join(details)}"
+
+
+def format_plan(statements, actual=False, messages=()):
+    """Render parsed statements as a compact operator tree plus summary."""
+    lines = []
+    for number, statement in enumerate(statements, start=1):
+        if lines:
+            lines.append("")
+        kind = "Actual" if actual else "Estimated"
+        lines.append(f"{kind} plan for statement {number} (cost {statement.cost:.4g}): {statement.text}")
+        if statement.root is None:
+            continue
+        total = statement.root.subtree_cost
+
+        def render(op, depth):
+            lines.append("  " * depth + "- " + _describe(op, total))
+            for child in op.children:
+                render(child, depth + 1)
+
+        render(statement.root, 0)
+
+        costly = sorted(statement.root.walk(), key=lambda op: op.own_cost, reverse=True)[:TOP_OPERATORS]
+        if total:
+            lines.append("Top operators by estimated cost:")
+            for op in costly:
+                lines.append(f"  {op.own_cost / total:.0%} [{op.node_id}] {op.physical_op}"
+                             + (f" {op.target}" if op.target else ""))
+        for hint in statement.missing_indexes:
+            lines.append(f"Missing index: {hint}")
+        if statement.warnings:
+            lines.append(f"Warnings: {', '.join(sorted(set(statement.warnings)))}")
+    if messages:
+        lines.append("")
+        lines.append("Statistics:")
+        lines.extend(f"  {m}" for m in messages)
+    return "\n".join(lines)
+
+
+def _collect_messages(cursor, messages):
+    for _, text in getattr(cursor, "messages", None) or []:
+        text = MESSAGE_PREFIX.sub("", text).strip()
+        if text:
+            messages.append(text)
+
+
+def _is_showplan(cursor):
+    return bool(cursor.description) and "Showplan" in cursor.description[0][0]
+
+
+def capture_plan(pool, query, params=None, actual=False, handle=None, batch_size=500):
+    """Return ``(showplan_xml_documents, messages)`` for a query.
+
+    With ``actual`` the query runs inside a transaction that is rolled back;
+    its own result rows are read and discarded.
+    """
+    handle = handle or QueryHandle()
+    settings = ("SET STATISTICS XML ON", "SET STATISTICS IO, TIME ON") if actual else ("SET SHOWPLAN_XML ON",)
+    plans, messages = [], []
+    conn = pool.acquire()
+    cursor = None
+    broken = False
+    try:
+        if handle.timeout:
+            conn.timeout = math.ceil(handle.timeout)
+        cursor = conn.cursor()
+        # SET SHOWPLAN_XML must be alone in its batch
+        for setting in settings:
+            cursor.execute(setting)
+        handle.attach(cursor)
+        pool.note_statement(conn, query)
+        try:
+            cursor.execute(query, *(params or []))
+            while True:
+                _collect_messages(cursor, messages)
+                if _is_showplan(cursor):
+                    plans.extend(row[0] for row in cursor.fetchall())
+                elif cursor.description:
+                    while cursor.fetchmany(batch_size):
+                        pass
+                if not cursor.nextset():
+                    break
+            _collect_messages(cursor, messages)
+        except Exception as e:
+            error = handle.translate(e)
+            if error is not e:
+                raise error from e
+            raise
+        finally:
+            handle.detach()
+            if actual:
+                conn.rollback()
+            try:
+                for setting in reversed(settings):
+                    cursor.execute(setting.replace(" ON", " OFF"))
+            except Exception as e:
+                # A connection left in showplan mode would answer every later query with a plan
+                logger.warning(f"Could not reset plan settings, discarding connection: {e}")
+                broken = True
+    finally:
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception as e:
+                logger.debug(f"Error closing plan cursor: {e}")
+        pool.release(conn, discard=broken)
+    return plans, messages
+
+
+def explain_sql(pool, query, params=None, actual=False, include_xml=False, handle=None):
+    """Capture a query's plan and return the summary text plus optional raw XML."""
+    plans, messages = capture_plan(pool, query, params, actual, handle)
+    if not plans:
+        raise ValueError("The server returned no execution plan for this query")
+    statements = [s for xml_text in plans for s in parse_showplan(xml_text)]
+    summary = format_plan(statements, actual, messages)
+    return summary, "\n".join(plans) if include_xml else None
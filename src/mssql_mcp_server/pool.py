@@ -0,0 +1,300 @@
+"""Bounded pyodbc connection pool shared by all MCP handlers.
+
+Opening a pyodbc connection costs a full TDS login (and TLS handshake), so the
+server keeps a small set of connections alive for its whole lifetime and hands
+them out per request instead of calling ``connect()`` every time.
+
+Session state outlives a request on a pooled connection. The transaction,
+autocommit and query timeout are reset on release. A connection that ran a
+statement changing anything else (``USE``, session ``SET`` options,
+temporary tables, ``EXECUTE AS``, ...) is closed instead of being reused,
+so the next caller always starts in the configured database with the
+driver's default options. State set inside a procedure or dynamic SQL ends
+with it, so only the statement text the server sends needs checking.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+
+from .lazy import pyodbc
+
+from .statements import StatementCache, StatementStats
+
+logger = logging.getLogger("mssql_mcp_server.pool")
+
+# Statements whose effect lasts for the rest of the session
+SESSION_PATTERN = re.compile(
+    r"\bUSE\s+[\[\w]"
+    r"|\bSET\s+(ROWCOUNT|TEXTSIZE|TRANSACTION\s+ISOLATION|LOCK_TIMEOUT|DEADLOCK_PRIORITY|LANGUAGE"
+    r"|DATEFORMAT|DATEFIRST|IDENTITY_INSERT|XACT_ABORT|NOCOUNT|ANSI_\w+|ARITHABORT|ARITHIGNORE"
+    r"|QUOTED_IDENTIFIER|CONCAT_NULL_YIELDS_NULL|NUMERIC_ROUNDABORT|IMPLICIT_TRANSACTIONS|CONTEXT_INFO"
+    r"|STATISTICS|SHOWPLAN_\w+|FMTONLY|NOEXEC|PARSEONLY|FORCEPLAN|CURSOR_CLOSE_ON_COMMIT"
+    r"|QUERY_GOVERNOR_COST_LIMIT)\b(?!\s*=)"
+    r"|(?<![\w@#$])##?[A-Za-z_]"
+    r"|\bsp_set_session_context\b|\bEXEC(UTE)?\s+AS\b|\bDECLARE\s+\w+\s+CURSOR\b|\bOPEN\s+SYMMETRIC\s+KEY\b",
+    re.IGNORECASE,
+)
+# String literals and comments, which can mention any of the above harmlessly
+SKIPPED_TEXT = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def changes_session(sql):
+    """Whether ``sql`` leaves state behind on its connection once it has run."""
+    return bool(SESSION_PATTERN.search(SKIPPED_TEXT.sub(" ", sql)))
+
+
+@dataclass
+class PoolStats:
+    """Counters describing how the pool has been used."""
+    checkouts: int = 0
+    creates: int = 0
+    connect_time: float = 0.0
+    waits: int = 0
+    wait_time: float = 0.0
+    evictions: int = 0
+    failed_health_checks: int = 0
+    timeouts: int = 0
+    session_discards: int = 0
+
+
+class ConnectionPool:
+    """Thread-safe pool of pyodbc connections.
+
+    Connections are created lazily up to ``max_size``; callers beyond that
+    block until a connection is returned or ``acquire_timeout`` expires.
+    Idle connections are reused most-recently-used first, and those idle for
+    longer than ``idle_timeout`` seconds are closed (down to ``min_size``).
+    Each connection carries a cache of up to ``statement_cache_size``
+    prepared statements that lives as long as the connection.
+    """
+
+    def __init__(self, connection_string, min_size=1, max_size=5, idle_timeout=300.0,
+                 acquire_timeout=30.0, health_check=True, statement_cache_size=32):
+        if max_size < 1:
+            raise ValueError("Pool max_size must be at least 1")
+        if min_size < 0 or min_size > max_size:
+            raise ValueError("Pool min_size must be between 0 and max_size")
+
+        self.connection_string = connection_string
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.health_check = health_check
+        self.statement_cache_size = statement_cache_size
+        self.statement_stats = StatementStats()
+
+        self._statements = {}  # connection -> StatementCache
+        self._changed = set()  # checked-out connections whose session state was changed
+        self._idle = deque()  # (connection, returned_at) pairs, most recent last
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = PoolStats()
+
+    def _create(self):
+        started = time.monotonic()
+        conn = pyodbc.connect(self.connection_string)
+        with self._cond:
+            self._stats.creates += 1
+            self._stats.connect_time += time.monotonic() - started
+        return conn
+
+    def _is_healthy(self, conn):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            return True
+        except Exception as e:
+            logger.warning(f"Pooled connection failed health check: {e}")
+            return False
+
+    def _reset(self, conn):
+        """Roll back and restore the connection attributes a request may have changed.
+
+        Other session state can't be undone here; note_statement() marks
+        connections that have any so release() closes them instead.
+        """
+        conn.rollback()
+        if conn.autocommit:
+            conn.autocommit = False
+        if conn.timeout:
+            conn.timeout = 0
+
+    def _close_quietly(self, conn):
+        with self._cond:
+            statements = self._statements.pop(conn, None)
+        if statements is not None:
+            statements.close()
+        try:
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled connection: {e}")
+
+    def _evict_idle_locked(self):
+        """Pop connections idle past idle_timeout; caller holds the lock."""
+        expired = []
+        if self.idle_timeout is None or self.idle_timeout <= 0:
+            return expired
+        cutoff = time.monotonic() - self.idle_timeout
+        # Oldest connections sit at the left of the deque.
+        while self._idle and self._idle[0][1] < cutoff and self._size > self.min_size:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._stats.evictions += 1
+            expired.append(conn)
+        return expired
+
+    def open(self):
+        """Pre-create min_size connections."""
+        created = []
+        with self._cond:
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+        try:
+            for _ in range(max(missing, 0)):
+                created.append(self._create())
+        finally:
+            with self._cond:
+                self._size -= max(missing, 0) - len(created)
+                now = time.monotonic()
+                self._idle.extend((conn, now) for conn in created)
+                self._cond.notify_all()
+        logger.info(f"Connection pool opened with {len(created)} connection(s) (max {self.max_size})")
+
+    def acquire(self, timeout=None):
+        """Check a connection out of the pool, creating one if there is room."""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            conn = None
+            waited = False
+            expired = []
+            wait_started = time.monotonic()
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    expired.extend(self._evict_idle_locked())
+                    if self._idle:
+                        conn, _ = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._stats.timeouts += 1
+                        raise TimeoutError(
+                            f"Timed out after {timeout}s waiting for a database connection "
+                            f"(pool max_size={self.max_size})"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                if waited:
+                    self._stats.waits += 1
+                    self._stats.wait_time += time.monotonic() - wait_started
+                self._in_use += 1
+
+            for stale in expired:
+                self._close_quietly(stale)
+
+            if conn is None:
+                try:
+                    conn = self._create()
+                except BaseException:
+                    self._forget(count_eviction=False)
+                    raise
+            elif self.health_check and not self._is_healthy(conn):
+                with self._cond:
+                    self._stats.failed_health_checks += 1
+                self._close_quietly(conn)
+                self._forget(count_eviction=True)
+                continue
+
+            with self._cond:
+                self._stats.checkouts += 1
+            return conn
+
+    def _forget(self, count_eviction):
+        """Give back the slot of a checked-out connection that was closed."""
+        with self._cond:
+            self._size -= 1
+            self._in_use -= 1
+            if count_eviction:
+                self._stats.evictions += 1
+            self._cond.notify()
+
+    def note_statement(self, conn, sql):
+        """Record that ``sql`` runs on checked-out ``conn``; closes it on release if it changes the session."""
+        if changes_session(sql):
+            with self._cond:
+                self._changed.add(conn)
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, closing it if it can't be reused."""
+        with self._cond:
+            if conn in self._changed:
+                self._changed.discard(conn)
+                self._stats.session_discards += 1
+                discard = True
+        if not discard:
+            try:
+                self._reset(conn)
+            except Exception as e:
+                logger.warning(f"Discarding pooled connection that failed to reset: {e}")
+                discard = True
+
+        with self._cond:
+            if not (discard or self._closed):
+                self._in_use -= 1
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+                return
+        self._close_quietly(conn)
+        self._forget(count_eviction=True)
+
+    def statements(self, conn):
+        """Return the prepared statement cache of a checked-out connection."""
+        with self._cond:
+            cache = self._statements.get(conn)
+            if cache is None:
+                cache = self._statements[conn] = StatementCache(conn, self.statement_cache_size)
+        return cache
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that checks a connection out and always returns it."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close idle connections and refuse further checkouts."""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+        logger.info("Connection pool closed")
+
+    def stats(self):
+        """Return a snapshot of the pool counters and current occupancy."""
+        with self._cond:
+            snapshot = asdict(self._stats)
+            snapshot.update(size=self._size, idle=len(self._idle), in_use=self._in_use,
+                            max_size=self.max_size, min_size=self.min_size)
+        return snapshot
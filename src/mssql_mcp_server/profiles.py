@@ -0,0 +1,146 @@
+"""Named connection profiles for running one query on many databases.
+
+Profiles are read from the JSON file named by ``MSSQL_PROFILES_FILE``::
+
+    {
+      "defaults": {"server": "sql01", "user": "reader", "password_env": "SHARD_PASSWORD"},
+      "profiles": {
+        "shard01": {"database": "shop_01", "tags": ["shard"]},
+        "shard02": {"database": "shop_02", "tags": ["shard"]},
+        "reporting": {"server": "sql02", "database": "reports"}
+      }
+    }
+
+Settings missing from a profile come from ``defaults`` and then from the
+usual ``MSSQL_*`` environment variables. ``password_env`` names an
+environment variable holding the password so it needn't be in the file.
+Each profile gets its own small connection pool, created on first use.
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+
+from .pool import ConnectionPool
+
+logger = logging.getLogger("mssql_mcp_server.profiles")
+
+# Connection settings a profile may set, with the environment variable and default used otherwise
+SETTINGS = {
+    "driver": ("MSSQL_DRIVER", "SQL Server"),
+    "server": ("MSSQL_HOST", "localhost"),
+    "user": ("MSSQL_USER", None),
+    "password": ("MSSQL_PASSWORD", None),
+    "database": ("MSSQL_DATABASE", None),
+    "trusted_server_certificate": ("TrustServerCertificate", "yes"),
+    "trusted_connection": ("Trusted_Connection", "no"),
+}
+
+
+def build_connection_string(config):
+    """Build an ODBC connection string from a connection config dict."""
+    return (f"Driver={config['driver']};Server={config['server']};UID={config['user']};"
+            f"PWD={config['password']};Database={config['database']};"
+            f"TrustServerCertificate={config['trusted_server_certificate']};"
+            f"Trusted_Connection={config['trusted_connection']};")
+
+
+@dataclass
+class Profile:
+    """One named connection target."""
+
+    name: str
+    config: dict
+    tags: list[str] = field(default_factory=list)
+
+    @property
+    def connection_string(self):
+        return build_connection_string(self.config)
+
+
+def _resolve(name, spec, defaults, environ):
+    merged = {**defaults, **spec}
+    password_env = merged.pop("password_env", None)
+    if password_env:
+        merged.setdefault("password", environ.get(password_env))
+    config = {}
+    for key, (env, default) in SETTINGS.items():
+        value = merged.get(key)
+        config[key] = value if value is not None else environ.get(env, default)
+    missing = [key for key in ("user", "password", "database") if not config[key]]
+    if missing:
+        raise ValueError(f"Profile '{name}' is missing: {', '.join(missing)}")
+    tags = merged.get("tags") or []
+    if not isinstance(tags, list):
+        raise ValueError(f"Profile '{name}' tags must be a list")
+    return Profile(name, config, [str(t) for t in tags])
+
+
+def load_profiles(path, environ=None):
+    """Read and validate a profiles file; returns profiles keyed by name.
+
+    Settings a profile leaves out are looked up in ``environ`` (by default
+    the process environment).
+    """
+    environ = os.environ if environ is None else environ
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Could not read connection profiles from {path}: {e}")
+    specs = data.get("profiles")
+    if not isinstance(specs, dict) or not specs:
+        raise ValueError(f"No profiles defined in {path}")
+    defaults = data.get("defaults") or {}
+    return {name: _resolve(name, spec or {}, defaults, environ) for name, spec in specs.items()}
+
+
+class ProfileRegistry:
+    """Profiles plus a lazily created connection pool per profile."""
+
+    def __init__(self, profiles, pool_size=2, acquire_timeout=30.0, health_check=True):
+        self.profiles = profiles
+        self.pool_size = pool_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check = health_check
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def select(self, targets=None):
+        """Resolve profile names and tags to profiles; all profiles when targets is empty."""
+        if not targets:
+            return list(self.profiles.values())
+        selected = {}
+        for target in targets:
+            if target in self.profiles:
+                selected[target] = self.profiles[target]
+                continue
+            tagged = [p for p in self.profiles.values() if target in p.tags]
+            if not tagged:
+                raise ValueError(f"Unknown connection profile or tag: {target}")
+            selected.update((p.name, p) for p in tagged)
+        return list(selected.values())
+
+    def pool(self, name):
+        """Return the connection pool for a profile, creating it on first use."""
+        with self._lock:
+            pool = self._pools.get(name)
+            if pool is None:
+                pool = self._pools[name] = ConnectionPool(
+                    self.profiles[name].connection_string,
+                    min_size=0,
+                    max_size=self.pool_size,
+                    acquire_timeout=self.acquire_timeout,
+                    health_check=self.health_check,
+                )
+            return pool
+
+    def close(self):
+        """Close every profile's pool."""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
@@ -0,0 +1,109 @@
+"""Optional LRU cache for read-only ``execute_sql`` results.
+
+Agents tend to re-run the same exploratory SELECT many times in a row. When
+enabled, complete results of deterministic SELECT statements are kept in
+memory for a short TTL, keyed by the normalized statement text and database,
+so a repeat is answered without a round trip to SQL Server.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Functions whose result changes between executions
+VOLATILE_PATTERN = re.compile(
+    r"\b(GETDATE|GETUTCDATE|SYSDATETIME|SYSUTCDATETIME|SYSDATETIMEOFFSET|CURRENT_TIMESTAMP"
+    r"|NEWID|NEWSEQUENTIALID|RAND|CRYPT_GEN_RANDOM|NEXT\s+VALUE\s+FOR)\b"
+    r"|@@",
+    re.IGNORECASE,
+)
+# SELECT ... INTO creates a table, and a CTE can feed a DML statement
+WRITE_PATTERN = re.compile(r"\b(INTO|INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+READ_PATTERN = re.compile(r"^(SELECT|WITH)\b", re.IGNORECASE)
+LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'")
+
+
+def normalize_query(query):
+    """Collapse whitespace outside string literals and drop a trailing semicolon."""
+    parts = []
+    last = 0
+    for match in LITERAL_PATTERN.finditer(query):
+        parts.append(" ".join(query[last:match.start()].split()))
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(" ".join(query[last:].split()))
+    normalized = " ".join(p for p in parts if p).strip()
+    return normalized.rstrip(";").rstrip()
+
+
+def is_read_only(query):
+    """Whether a statement is a single query (SELECT, or WITH ... SELECT) that writes nothing."""
+    text = LITERAL_PATTERN.sub("''", query).strip()
+    if not READ_PATTERN.match(text) or ";" in text.rstrip(";"):
+        return False
+    return not WRITE_PATTERN.search(text)
+
+
+def is_cacheable(query):
+    """Whether a statement is a deterministic, read-only query."""
+    return is_read_only(query) and not VOLATILE_PATTERN.search(LITERAL_PATTERN.sub("''", query))
+
+
+class ResultCache:
+    """LRU cache bounded by entry count and total bytes, with a per-entry TTL."""
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, ttl=30.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key):
+        """Return a cached value, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._drop_locked(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        """Store a value of ``size`` bytes, evicting least recently used entries."""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop_locked(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop_locked(oldest)
+                self._stats["evictions"] += 1
+
+    def _drop_locked(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return a snapshot of the cache counters and occupancy."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update(entries=len(self._entries), bytes=self._bytes)
+        return snapshot
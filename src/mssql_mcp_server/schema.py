@@ -0,0 +1,208 @@
+"""In-process cache of the database catalog.
+
+``list_resources`` and keyset paging need table names, columns and key
+columns. Loading them means several catalog queries, so the result is cached.
+Within ``ttl`` the cached catalog is served without touching the database.
+After that a single cheap version probe (table count and latest
+``sys.tables.modify_date``) decides whether the catalog is still current or
+has to be reloaded.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+
+from .lazy import pyodbc
+
+logger = logging.getLogger("mssql_mcp_server.schema")
+
+VERSION_QUERY = "SELECT COUNT(*), MAX(modify_date) FROM sys.tables"
+
+TABLES_QUERY = """
+SELECT s.name, t.name, t.object_id,
+       SUM(CASE WHEN p.index_id IN (0, 1) THEN p.row_count ELSE 0 END)
+FROM sys.tables t
+JOIN sys.schemas s ON s.schema_id = t.schema_id
+LEFT JOIN sys.dm_db_partition_stats p ON p.object_id = t.object_id
+GROUP BY s.name, t.name, t.object_id
+"""
+
+# sys.dm_db_partition_stats needs VIEW DATABASE STATE; sys.partitions does not.
+TABLES_FALLBACK_QUERY = """
+SELECT s.name, t.name, t.object_id,
+       SUM(CASE WHEN p.index_id IN (0, 1) THEN p.rows ELSE 0 END)
+FROM sys.tables t
+JOIN sys.schemas s ON s.schema_id = t.schema_id
+LEFT JOIN sys.partitions p ON p.object_id = t.object_id
+GROUP BY s.name, t.name, t.object_id
+"""
+
+COLUMNS_QUERY = """
+SELECT c.object_id, c.name, TYPE_NAME(c.user_type_id), c.max_length, c.precision, c.scale, c.is_nullable
+FROM sys.columns c
+JOIN sys.tables t ON t.object_id = c.object_id
+ORDER BY c.object_id, c.column_id
+"""
+
+# Same key choice as pagination.KEY_COLUMNS_QUERY, for every table at once.
+KEYS_QUERY = """
+WITH k AS (
+    SELECT i.object_id, i.index_id,
+           ROW_NUMBER() OVER (PARTITION BY i.object_id ORDER BY i.is_primary_key DESC, i.index_id) AS rn
+    FROM sys.indexes i
+    JOIN sys.tables t ON t.object_id = i.object_id
+    WHERE i.is_primary_key = 1 OR (i.is_unique = 1 AND i.has_filter = 0)
+)
+SELECT k.object_id, c.name
+FROM k
+JOIN sys.index_columns ic ON ic.object_id = k.object_id AND ic.index_id = k.index_id
+JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+WHERE k.rn = 1 AND ic.key_ordinal > 0
+ORDER BY k.object_id, ic.key_ordinal
+"""
+
+
+@dataclass
+class ColumnInfo:
+    name: str
+    type_name: str
+    max_length: int
+    precision: int
+    scale: int
+    nullable: bool
+
+
+@dataclass
+class TableInfo:
+    schema: str
+    name: str
+    row_count: int
+    columns: list = field(default_factory=list)
+    key_columns: list = field(default_factory=list)
+
+    @property
+    def qualified_name(self):
+        return f"{self.schema}.{self.name}"
+
+
+@dataclass
+class Catalog:
+    """A loaded snapshot of the user tables in the database."""
+    tables: dict
+    version: tuple
+    loaded_at: float
+
+    def find(self, name):
+        """Look a table up by ``name`` or ``schema.name`` (brackets allowed)."""
+        name = name.replace("[", "").replace("]", "")
+        if name in self.tables:
+            return self.tables[name]
+        matches = [t for t in self.tables.values() if t.name == name]
+        # An unqualified name resolves to dbo first, like SQL Server does by default.
+        matches.sort(key=lambda t: t.schema != "dbo")
+        return matches[0] if matches else None
+
+
+def load_catalog(cursor):
+    """Read tables, columns, key columns and row estimates in three queries."""
+    cursor.execute(VERSION_QUERY)
+    count, modified = cursor.fetchone()
+    version = (count, modified)
+
+    try:
+        cursor.execute(TABLES_QUERY)
+        table_rows = cursor.fetchall()
+    except pyodbc.Error as e:
+        logger.info(f"Falling back to sys.partitions for row counts: {e}")
+        cursor.execute(TABLES_FALLBACK_QUERY)
+        table_rows = cursor.fetchall()
+
+    by_id = {}
+    for schema, name, object_id, row_count in table_rows:
+        by_id[object_id] = TableInfo(schema=schema, name=name, row_count=int(row_count or 0))
+
+    cursor.execute(COLUMNS_QUERY)
+    for object_id, name, type_name, max_length, precision, scale, nullable in cursor.fetchall():
+        if object_id in by_id:
+            by_id[object_id].columns.append(
+                ColumnInfo(name, type_name, max_length, precision, scale, bool(nullable))
+            )
+
+    cursor.execute(KEYS_QUERY)
+    for object_id, name in cursor.fetchall():
+        if object_id in by_id:
+            by_id[object_id].key_columns.append(name)
+
+    tables = {t.qualified_name: t for t in sorted(by_id.values(), key=lambda t: (t.schema, t.name))}
+    return Catalog(tables=tables, version=version, loaded_at=time.monotonic())
+
+
+class SchemaCache:
+    """Catalog cache with a TTL and version-based revalidation.
+
+    ``max_age`` bounds how long a catalog is kept by revalidation alone, so
+    row-count estimates (which don't bump the version) are refreshed too.
+    """
+
+    def __init__(self, ttl=60.0, max_age=3600.0):
+        self.ttl = ttl
+        self.max_age = max_age
+        self._catalog = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "revalidations": 0, "invalidations": 0}
+
+    def peek(self):
+        """Return the catalog if it is within its TTL, without any database access."""
+        with self._lock:
+            if self._catalog is not None and time.monotonic() - self._checked_at < self.ttl:
+                self._stats["hits"] += 1
+                return self._catalog
+        return None
+
+    def get(self, pool):
+        """Return a current catalog, revalidating or reloading it through the pool."""
+        catalog = self.peek()
+        if catalog is not None:
+            return catalog
+
+        # One thread refreshes; the others wait and then reuse its result.
+        with self._refresh_lock:
+            catalog = self.peek()
+            if catalog is not None:
+                return catalog
+            with pool.connection() as conn:
+                with conn.cursor() as cursor:
+                    current = self._catalog
+                    if current is not None and time.monotonic() - current.loaded_at < self.max_age:
+                        cursor.execute(VERSION_QUERY)
+                        count, modified = cursor.fetchone()
+                        if (count, modified) == current.version:
+                            with self._lock:
+                                self._checked_at = time.monotonic()
+                                self._stats["revalidations"] += 1
+                            return current
+                    catalog = load_catalog(cursor)
+
+            with self._lock:
+                self._catalog = catalog
+                self._checked_at = time.monotonic()
+                self._stats["misses"] += 1
+            logger.info(f"Loaded schema catalog with {len(catalog.tables)} tables")
+            return catalog
+
+    def invalidate(self):
+        """Force the next get() to reload the catalog."""
+        with self._lock:
+            if self._catalog is not None:
+                self._catalog = None
+                self._stats["invalidations"] += 1
+
+    def stats(self):
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["tables"] = len(self._catalog.tables) if self._catalog else 0
+        return snapshot
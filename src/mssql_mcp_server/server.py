@@ -1,37 +1,578 @@
 import asyncio
+import functools
+import json
 import logging
+import math
 import os
-from pyodbc import connect, Error
+import re
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from urllib.parse import parse_qs, quote, unquote, urlsplit
 from mcp.server import Server
-from mcp.types import Resource, Tool, TextContent
+from mcp.types import Resource, ResourceTemplate, Tool, TextContent
 from pydantic import AnyUrl
+from mcp_common import RequestLog
+from .bulk import bulk_insert, parse_rows
+from .cancellation import QueryHandle, QueryTimeoutError
+from .fanout import TargetResult, merge_results, query_target, summarize
+from .formats import SPOOL_FORMATS, check_format, cleanup_spool, encode_rows, make_encoder, spool_result
+from .jobs import JobManager
+from .lazy import pyodbc
+from .metrics import LATENCY_BUCKETS, SIZE_BUCKETS, Registry, TextfileWriter, start_http_server
+from .pagination import build_page_query, decode_key, encode_key, fetch_key_columns
+from .plans import explain_sql
+from .pool import ConnectionPool
+from .profiles import ProfileRegistry
+from .result_cache import ResultCache, is_cacheable, is_read_only, normalize_query
+from .schema import SchemaCache
+from .settings import Settings
+from .streaming import ResultStream, StreamRegistry
+from .table_stats import profile_table
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger("mssql_mcp_server")
 
+def configure_logging():
+    """Send log records to stderr; called by the entry point rather than on import."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+def get_settings() -> Settings:
+    """Return the server settings, loading and validating them on first use."""
+    global _settings
+    if _settings is None:
+        _settings = Settings.load()
+    return _settings
+
+def reload_settings():
+    """Re-read the settings and, if they changed, start over with fresh pools and caches.
+
+    Invalid new settings are reported and the current ones kept. Queries in
+    flight finish on the connections they already hold, but parked result
+    streams are closed. Background jobs are kept: running ones finish, queued
+    ones start on the new pool, and their results stay readable. The job
+    worker and queue limits only change on a restart.
+    """
+    global _settings
+    settings = Settings.load()
+    if settings == _settings:
+        return False
+    close_db(wait=False, jobs=False)
+    _settings = settings
+    logger.info(f"Settings reloaded: {settings.db.server}/{settings.db.database} as {settings.db.user}")
+    return True
+
 def get_db_config():
-    """Get database configuration from environment variables."""
-    config = {
-        "driver": os.getenv("MSSQL_DRIVER", "SQL Server"),
-        "server": os.getenv("MSSQL_HOST", "localhost"),
-        "user": os.getenv("MSSQL_USER"),
-        "password": os.getenv("MSSQL_PASSWORD"),
-        "database": os.getenv("MSSQL_DATABASE"),
-        "trusted_server_certificate": os.getenv("TrustServerCertificate", "yes"),
-        "trusted_connection": os.getenv("Trusted_Connection", "no")
+    """Get the database configuration and connection string."""
+    db = get_settings().db
+    return db.as_dict(), db.connection_string
+
+def get_pool_config():
+    """Get connection pool configuration."""
+    return asdict(get_settings().pool)
+
+def get_result_limits(arguments=None):
+    """Get result size limits from the settings, narrowed by per-call arguments."""
+    arguments = arguments or {}
+    settings = get_settings()
+    limits = {
+        "batch_size": settings.fetch_batch_size,
+        "max_rows": settings.result_max_rows,
+        "max_bytes": settings.result_max_bytes,
     }
-    if not all([config["user"], config["password"], config["database"]]):
-        logger.error("Missing required database configuration. Please check environment variables:")
-        logger.error("MSSQL_USER, MSSQL_PASSWORD, and MSSQL_DATABASE are required")
-        raise ValueError("Missing required database configuration")
-    
-    connection_string = f"Driver={config['driver']};Server={config['server']};UID={config['user']};PWD={config['password']};Database={config['database']};TrustServerCertificate={config['trusted_server_certificate']};Trusted_Connection={config['trusted_connection']};"
+    try:
+        # Callers may ask for smaller chunks, never larger than the server budget
+        for key in ("max_rows", "max_bytes"):
+            if arguments.get(key):
+                limits[key] = min(limits[key], int(arguments[key]))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid result limit: {e}")
+    if min(limits.values()) < 1:
+        raise ValueError("Result limits must be positive")
+    return limits
+
+def get_spool_config():
+    """Get the directory, retention and Parquet row group size for file-backed query results."""
+    settings = get_settings()
+    return {"dir": settings.spool_dir, "ttl": settings.spool_ttl,
+            "row_group_bytes": settings.parquet_row_group_bytes}
+
+def get_query_timeout(arguments=None):
+    """Get the query timeout in seconds: per-call argument or MSSQL_QUERY_TIMEOUT (0 disables)."""
+    value = (arguments or {}).get("timeout_seconds")
+    if value is None:
+        return get_settings().query_timeout
+    try:
+        timeout = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid query timeout: {value}")
+    if timeout < 0:
+        raise ValueError("Query timeout must not be negative")
+    return timeout
+
+def get_request_log() -> RequestLog:
+    """Return the sampled tool-call logger."""
+    global _request_log
+    if _request_log is None:
+        _request_log = RequestLog(logger, get_settings().log_sample_rate)
+    return _request_log
+
+def record_call(name, arguments, elapsed, outcome):
+    """Log a finished tool call.
+
+    Runs in call_tool's ``finally``, so invalid settings must not raise here
+    and replace the tool's own exception.
+    """
+    try:
+        request_log = get_request_log()
+    except ValueError as e:
+        logger.warning(f"Tool call {name} not logged: {e}")
+        return
+    request_log.record(name, arguments, elapsed, outcome)
+
+# Connection pool, executor and open result streams shared by every handler
+# for the lifetime of the server
+_pool = None
+_executor = None
+_streams = None
+_schema_cache = None
+_result_cache = None
+_table_stats_cache = None
+_profiles = None
+_fanout_executor = None
+_jobs = None
+# Settings are loaded once and only replaced by reload_settings()
+_settings = None
+_request_log = None
+
+# Metrics live for the whole process, across reloads, so counters only grow
+metrics = Registry(LATENCY_BUCKETS)
+TOOL_SECONDS = metrics.histogram(
+    "mssql_mcp_tool_call_seconds", "Tool call latency by tool and outcome", ("tool", "outcome"))
+QUERY_PHASE_SECONDS = metrics.histogram(
+    "mssql_mcp_query_phase_seconds",
+    "Time spent executing statements, fetching rows from the driver, encoding them and spooling files",
+    ("phase",))
+RESULT_ROWS = metrics.histogram(
+    "mssql_mcp_result_rows", "Rows returned per execute_sql chunk", ("format",), SIZE_BUCKETS)
+RESULT_BYTES = metrics.counter(
+    "mssql_mcp_result_bytes_total", "Bytes of encoded result text returned", ("format",))
+
+# Statements after which the cached catalog can no longer be trusted
+DDL_PATTERN = re.compile(r"^\s*(CREATE|ALTER|DROP|EXEC(UTE)?\s+sp_rename)\b", re.IGNORECASE)
+
+def get_pool() -> ConnectionPool:
+    """Return the server-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _, connection_string = get_db_config()
+        _pool = ConnectionPool(connection_string, **get_pool_config())
+    return _pool
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the thread pool that runs blocking pyodbc calls.
+
+    Sized to the connection pool by default (override with
+    MSSQL_EXECUTOR_WORKERS) so every pooled connection can be busy at once.
+    """
+    global _executor
+    if _executor is None:
+        workers = get_settings().executor_workers or get_pool().max_size
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mssql-db")
+    return _executor
+
+async def run_db(func, *args):
+    """Run blocking database work on the DB executor, keeping the event loop free."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args))
+
+def get_streams() -> StreamRegistry:
+    """Return the registry of result streams waiting for a continuation call.
+
+    Every parked stream pins a pooled connection, so at most
+    MSSQL_MAX_OPEN_STREAMS (and always fewer than the pool size) are kept.
+    """
+    global _streams
+    if _streams is None:
+        settings = get_settings()
+        max_streams = min(settings.max_open_streams, get_pool().max_size - 1)
+        _streams = StreamRegistry(ttl=settings.stream_ttl, max_streams=max_streams,
+                                  write_ttl=settings.write_stream_ttl)
+    return _streams
+
+def get_schema_cache() -> SchemaCache:
+    """Return the server-wide schema catalog cache."""
+    global _schema_cache
+    if _schema_cache is None:
+        settings = get_settings()
+        _schema_cache = SchemaCache(ttl=settings.schema_cache_ttl, max_age=settings.schema_cache_max_age)
+    return _schema_cache
+
+def get_result_cache():
+    """Return the SELECT result cache, or None unless MSSQL_RESULT_CACHE is enabled."""
+    global _result_cache
+    settings = get_settings()
+    if _result_cache is None and settings.result_cache:
+        _result_cache = ResultCache(
+            max_entries=settings.result_cache_entries,
+            max_bytes=settings.result_cache_bytes,
+            ttl=settings.result_cache_ttl,
+        )
+    return _result_cache
+
+def clear_result_cache():
+    """Drop every cached SELECT result, if the cache is enabled."""
+    cache = get_result_cache()
+    if cache is not None:
+        cache.clear()
+
+def get_table_stats_cache() -> ResultCache:
+    """Return the cache of table profiles, kept for MSSQL_PROFILE_CACHE_TTL seconds."""
+    global _table_stats_cache
+    if _table_stats_cache is None:
+        settings = get_settings()
+        _table_stats_cache = ResultCache(max_entries=settings.result_cache_entries,
+                                         ttl=settings.profile_cache_ttl)
+    return _table_stats_cache
+
+def profiles_configured():
+    """Whether connection profiles are configured, without requiring the database settings."""
+    if _settings is not None:
+        return _settings.profiles_file is not None
+    # Listing tools mustn't fail just because the credentials are missing
+    return bool(os.environ.get("MSSQL_PROFILES_FILE"))
+
+def get_profiles():
+    """Return the named connection profiles, or None unless MSSQL_PROFILES_FILE is set."""
+    global _profiles
+    settings = get_settings()
+    if _profiles is None and settings.profiles:
+        _profiles = ProfileRegistry(
+            settings.profiles,
+            pool_size=settings.fanout_pool_size,
+            acquire_timeout=settings.pool.acquire_timeout,
+            health_check=settings.pool.health_check,
+        )
+    return _profiles
+
+def get_fanout_executor() -> ThreadPoolExecutor:
+    """Return the thread pool for fan-out queries; its size caps how many targets run at once.
+
+    Kept apart from the main DB executor so a wide fan-out can't starve
+    execute_sql calls.
+    """
+    global _fanout_executor
+    if _fanout_executor is None:
+        workers = get_settings().fanout_concurrency
+        _fanout_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mssql-fanout")
+    return _fanout_executor
+
+def get_jobs() -> JobManager:
+    """Return the background query job manager.
+
+    Each running job holds a pooled connection, so at most
+    MSSQL_JOB_WORKERS (and always fewer than the pool size) run at once.
+    """
+    global _jobs
+    if _jobs is None:
+        settings = get_settings()
+        _jobs = JobManager(
+            get_pool,
+            settings.spool_dir,
+            max_running=max(1, min(settings.job_workers, get_pool().max_size - 1)),
+            max_queued=settings.job_queue,
+            ttl=settings.job_ttl,
+            batch_size=settings.fetch_batch_size,
+        )
+    return _jobs
+
+def close_db(wait=True, jobs=True):
+    """Close open result streams, query jobs, the DB executors and the connection pools.
+
+    The settings are forgotten too, so the next use loads them again. With
+    ``wait`` false, work already running on the executors is left to finish
+    in the background. With ``jobs`` false, background jobs are left running.
+    """
+    global _pool, _executor, _streams, _schema_cache, _result_cache, _profiles, _fanout_executor
+    global _settings, _request_log, _jobs, _table_stats_cache
+    _settings = None
+    _request_log = None
+    _schema_cache = None
+    _result_cache = None
+    _table_stats_cache = None
+    if _fanout_executor is not None:
+        _fanout_executor.shutdown(wait=wait)
+        _fanout_executor = None
+    if _profiles is not None:
+        _profiles.close()
+        _profiles = None
+    if _streams is not None:
+        _streams.close_all()
+        _streams = None
+    if jobs and _jobs is not None:
+        _jobs.close(wait=wait)
+        _jobs = None
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+def collect_metrics():
+    """Report the state of the pool, caches and result streams for a metrics render."""
+    families = []
+    if _pool is not None:
+        stats = _pool.stats()
+        families.append(("mssql_mcp_pool_connections", "gauge", "Pooled connections by state",
+                         [({"state": "idle"}, stats["idle"]), ({"state": "in_use"}, stats["in_use"])]))
+        families.append(("mssql_mcp_pool_max_connections", "gauge", "Connection pool size limit",
+                         [({}, stats["max_size"])]))
+        for key, name, help in (
+            ("checkouts", "checkouts_total", "Connections handed out by the pool"),
+            ("creates", "connects_total", "Connections opened to the server"),
+            ("connect_time", "connect_seconds_total", "Time spent opening connections"),
+            ("waits", "waits_total", "Checkouts that had to wait for a free connection"),
+            ("wait_time", "wait_seconds_total", "Time spent waiting for a free connection"),
+            ("timeouts", "timeouts_total", "Checkouts that gave up waiting"),
+            ("evictions", "evictions_total", "Idle connections closed"),
+            ("failed_health_checks", "failed_health_checks_total", "Connections found broken on checkout"),
+        ):
+            families.append((f"mssql_mcp_pool_{name}", "counter", help, [({}, stats[key])]))
+        statements = _pool.statement_stats.snapshot().values()
+        families.append(("mssql_mcp_statement_executions_total", "counter",
+                         "Parameterized executions by whether the prepared statement was reused",
+                         [({"prepared": "new"}, sum(c["prepares"] for c in statements)),
+                          ({"prepared": "reused"}, sum(c["reuses"] for c in statements))]))
+    if _streams is not None:
+        families.append(("mssql_mcp_open_streams", "gauge", "Result streams waiting for a continuation call",
+                         [({}, len(_streams))]))
+    if _jobs is not None:
+        families.append(("mssql_mcp_jobs", "gauge", "Background query jobs by state",
+                         [({"state": state}, count) for state, count in _jobs.counts().items()]))
+    events, entries = [], []
+    for cache_name, cache, sizes in (("schema", _schema_cache, ("tables",)),
+                                     ("result", _result_cache, ("entries", "bytes")),
+                                     ("table_stats", _table_stats_cache, ("entries", "bytes"))):
+        if cache is None:
+            continue
+        stats = cache.stats()
+        events.extend(({"cache": cache_name, "event": key}, value)
+                      for key, value in stats.items() if key not in sizes)
+        entries.extend(({"cache": cache_name, "unit": key}, stats[key]) for key in sizes)
+    if events:
+        families.append(("mssql_mcp_cache_events_total", "counter", "Cache hits, misses and evictions", events))
+        families.append(("mssql_mcp_cache_size", "gauge", "Cache occupancy", entries))
+    return families
+
+metrics.add_collector(collect_metrics)
+
+def read_table(pool, table, after=None, limit=100, fmt="csv"):
+    """Return one page of a table, in key order, as CSV or JSON text.
+
+    Full pages link to the next page, which resumes after the last key
+    returned here: as a trailing line for CSV, as a "next" key for JSON.
+    """
+    # Resolve the key before checking out a connection for the page itself
+    info = get_schema_cache().get(pool).find(table)
+    with pool.connection() as conn:
+        with conn.cursor() as cursor:
+            key_columns = info.key_columns if info else fetch_key_columns(cursor, table)
+            if after and not key_columns:
+                raise ValueError(f"Table {table} has no primary key or unique index to page through")
+            sql, params = build_page_query(table, key_columns, decode_key(after, key_columns) if after else None, limit)
+            cursor.execute(sql, *params)
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
+            next_uri = None
+            if key_columns and len(rows) == limit:
+                positions = [columns.index(c) for c in key_columns]
+                after = encode_key(rows[-1][i] for i in positions)
+                next_uri = f"mssql://{quote(table)}/data?after={after}&limit={limit}"
+                if fmt != "csv":
+                    next_uri += f"&format={fmt}"
+            encoder = make_encoder(fmt, cursor.description)
+            if fmt == "json":
+                return encode_rows(encoder, rows, extra={"next": next_uri})
+            text = encode_rows(encoder, rows)
+            if next_uri:
+                text += f"\n\nNext page: {next_uri}"
+            return text
+
+def read_stream_chunk(streams, stream, limits, token=None, handle=None):
+    """Read the next chunk of a result stream.
+
+    Result sets are read in order until the chunk's row or byte budget is
+    spent, one text per result set. Returns the texts and, when rows remain,
+    a note telling the client how to continue; the stream is parked under a
+    continuation token if the registry has room, otherwise it is closed and
+    the result truncated. A batch read to the end is committed; one that may
+    have written says in its note that its changes are not committed yet, or
+    were rolled back when the result is truncated.
+    """
+    handle = handle or QueryHandle()
+    texts = []
+    max_rows, max_bytes = limits["max_rows"], limits["max_bytes"]
+    finished = False
+    rows_before = stream.rows_sent
+    fetch_before, encode_before = stream.fetch_seconds, stream.encode_seconds
+    try:
+        handle.attach(stream.cursor)
+        while True:
+            sent = stream.rows_sent
+            text = stream.read_chunk(max_rows, max_bytes)
+            texts.append(text)
+            size = len(text.encode("utf-8"))
+            max_rows -= stream.rows_sent - sent
+            max_bytes -= size
+            RESULT_BYTES.inc(size, format=stream.fmt)
+            if not stream.exhausted:
+                break
+            if not stream.next_set():
+                finished = True
+                break
+            if max_rows < 1 or max_bytes < 1:
+                break
+    except BaseException as e:
+        stream.close()
+        error = handle.translate(e)
+        if error is not e:
+            raise error from e
+        raise
+    finally:
+        handle.detach()
+        QUERY_PHASE_SECONDS.observe(stream.fetch_seconds - fetch_before, phase="fetch")
+        QUERY_PHASE_SECONDS.observe(stream.encode_seconds - encode_before, phase="encode")
+        RESULT_ROWS.observe(stream.rows_sent - rows_before, format=stream.fmt)
+    if finished:
+        stream.close(commit=True)
+        if stream.rows_affected >= 0:
+            texts.append(f"Rows affected: {stream.rows_affected}")
+        return texts, None
+    if streams.max_streams < 1:
+        stream.close()
+        note = f"Result truncated after {stream.rows_sent} rows."
+        if stream.may_write:
+            note += " The batch was not read to the end, so its changes were rolled back."
+        return texts, note
+    token = streams.register(stream, token)
+    note = (f"More rows available ({stream.rows_sent} rows sent so far). "
+            f"Call execute_sql with continuation_token=\"{token}\" to fetch the next chunk.")
+    if stream.may_write:
+        note += (" The batch's changes are not committed until its last chunk is read, and its locks"
+                 f" are held until then. They are rolled back if the token is unused for"
+                 f" {streams.ttl_for(stream):g} seconds.")
+    return texts, note
+
+def continue_sql(streams, token, limits, handle=None):
+    """Return the next chunk of a previously started result stream."""
+    return read_stream_chunk(streams, streams.take(token), limits, token, handle)
+
+def execute_sql(pool, streams, query, database, limits, params=None, output_format="csv", handle=None):
+    """Execute a query or batch and return its result texts plus an optional continuation note.
 
-    return config, connection_string
+    Every result set of a batch is returned, and whether a statement returned
+    rows is decided from ``cursor.description`` rather than the query text,
+    so CTEs, procedures and multi-statement batches work. Parameterized
+    queries run on a cursor from the connection's statement cache, so
+    repeating one reuses its prepared handle. File-backed formats
+    write the whole result to the spool directory and return its location.
+    The handle's timeout is applied as the ODBC query timeout, and the
+    running cursor is attached to the handle so it can be cancelled.
+    """
+    # Special handling for listing tables in MSSQL, answered from the schema cache
+    if query.strip().upper() == "SHOW TABLES":
+        catalog = get_schema_cache().get(pool)
+        result = [f"Tables_in_{database}"]  # Header
+        result.extend(table.name for table in catalog.tables.values())
+        return ["\n".join(result)], None
+    
+    handle = handle or QueryHandle()
+    # pyodbc query timeouts are whole seconds; 0 disables them
+    timeout = math.ceil(handle.timeout) if handle.timeout else 0
+    conn = pool.acquire()
+    cursor = None
+    cached = False
+    stream = None
+    started = time.perf_counter()
+    try:
+        pool.note_statement(conn, query)
+        if params:
+            statements = pool.statements(conn)
+            cursor, reused = statements.cursor(query, timeout)
+            cached = True
+            try:
+                handle.attach(cursor)
+                cursor.execute(query, *params)
+            except Exception:
+                # Don't keep a cursor in an unknown state around for reuse
+                statements.forget(query, timeout)
+                cursor = None
+                raise
+            pool.statement_stats.record(query, reused)
+        else:
+            conn.timeout = timeout
+            cursor = conn.cursor()
+            handle.attach(cursor)
+            cursor.execute(query)
+        
+        # Skip statements that only report a row count until one returns rows
+        rows_affected = -1
+        while not cursor.description:
+            if cursor.rowcount >= 0:
+                rows_affected = max(rows_affected, 0) + cursor.rowcount
+            if not cursor.nextset():
+                break
+        QUERY_PHASE_SECONDS.observe(time.perf_counter() - started, phase="execute")
+        
+        # Statements without result rows
+        if not cursor.description:
+            conn.commit()
+            if DDL_PATTERN.match(query):
+                get_schema_cache().invalidate()
+                get_table_stats_cache().clear()
+            return [f"Query executed successfully. Rows affected: {rows_affected}"], None
+        
+        # Result rows are spooled to files or streamed in bounded chunks
+        if output_format in SPOOL_FORMATS:
+            spool = get_spool_config()
+            cleanup_spool(spool["dir"], spool["ttl"])
+            started = time.perf_counter()
+            lines = []
+            while True:
+                if cursor.description:
+                    path, rows, size = spool_result(cursor, output_format, spool["dir"], limits["batch_size"],
+                                                    spool["row_group_bytes"])
+                    lines.append(f"Wrote {rows} rows ({size} bytes) as {output_format} to {path}")
+                if not cursor.nextset():
+                    break
+            conn.commit()
+            QUERY_PHASE_SECONDS.observe(time.perf_counter() - started, phase="spool")
+            result = ["\n".join(lines)], None
+        else:
+            stream = ResultStream(pool, conn, cursor, limits["batch_size"], keep_cursor=cached, fmt=output_format,
+                                  read_only=is_read_only(query))
+            stream.rows_affected = rows_affected
+            result = read_stream_chunk(streams, stream, limits, handle=handle)
+        if DDL_PATTERN.match(query):
+            get_schema_cache().invalidate()
+            get_table_stats_cache().clear()
+        return result
+    except Exception as e:
+        error = handle.translate(e)
+        if error is not e:
+            raise error from e
+        raise
+    finally:
+        handle.detach()
+        # A stream owns its cursor and connection from here on
+        if stream is None:
+            if cursor is not None and not cached:
+                cursor.close()
+            pool.release(conn)
 
 # Initialize server
 app = Server("mssql_mcp_server")
@@ -39,128 +580,701 @@ app = Server("mssql_mcp_server")
 @app.list_resources()
 async def list_resources() -> list[Resource]:
     """List MSSQL tables as resources."""
-    config, connection_string = get_db_config()
-    try:
-        with connect(connection_string) as conn:
-            with conn.cursor() as cursor:
-                # Use INFORMATION_SCHEMA to list tables in MSSQL
-                cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE';")
-                tables = cursor.fetchall()
-                logger.info(f"Found tables: {tables}")
-                
-                resources = []
-                for table in tables:
-                    resources.append(
-                        Resource(
-                            uri=f"mssql://{table[0]}/data",
-                            name=f"Table: {table[0]}",
-                            mimeType="text/plain",
-                            description=f"Data in table: {table[0]}"
-                        )
-                    )
-                return resources
-    except Error as e:
-        logger.error(f"Failed to list resources: {str(e)}")
-        return []
+    pool = get_pool()
+    resources = []
+    if get_settings().metrics:
+        resources.append(Resource(
+            uri="mssql://metrics",
+            name="Server metrics",
+            mimeType="text/plain",
+            description="Tool latency, query timings, pool and cache statistics in Prometheus text format"
+        ))
+    resources.append(Resource(
+        uri="mssql://statements",
+        name="Prepared statements",
+        mimeType="application/json",
+        description="Per-statement executions and how often the prepared statement was reused"
+    ))
+    cache = get_schema_cache()
+    # A warm cache answers without leaving the event loop
+    catalog = cache.peek()
+    if catalog is None:
+        try:
+            catalog = await run_db(cache.get, pool)
+        except pyodbc.Error as e:
+            logger.error(f"Failed to list resources: {str(e)}")
+            return resources
+        logger.info(f"Found {len(catalog.tables)} tables")
+    
+    for table in catalog.tables.values():
+        # Tables outside dbo need their schema to resolve unambiguously
+        name = table.name if table.schema == "dbo" else table.qualified_name
+        resources.append(
+            Resource(
+                uri=f"mssql://{quote(name)}/data",
+                name=f"Table: {name}",
+                mimeType="text/plain",
+                description=f"Data in table: {name} (~{table.row_count} rows)"
+            )
+        )
+    return resources
+
+@app.list_resource_templates()
+async def list_resource_templates() -> list[ResourceTemplate]:
+    """List the per-table resources that aren't enumerated by list_resources."""
+    return [
+        ResourceTemplate(
+            uriTemplate="mssql://{table}/profile",
+            name="Table profile",
+            mimeType="application/json",
+            description="Per-column null fraction, approximate distinct count and min/max, "
+                        "plus a random sample of rows (?sample=N rows, 0 for none)"
+        )
+    ]
+
+def read_table_profile(pool, table, sample_rows):
+    """Return a table's profile as JSON text, from the cache when possible."""
+    info = get_schema_cache().get(pool).find(table)
+    if info is None:
+        raise ValueError(f"Unknown table: {table}")
+    cache = get_table_stats_cache()
+    key = (info.qualified_name, sample_rows)
+    text = cache.get(key)
+    if text is None:
+        text = json.dumps(profile_table(pool, info, sample_rows))
+        cache.put(key, text, len(text.encode("utf-8")))
+    return text
+
+def statement_report():
+    """Per-statement counters, most executed first, with the share of executions that reused a plan."""
+    stats = _pool.statement_stats.snapshot() if _pool is not None else {}
+    report = [
+        dict(counters, statement=sql, reuse_ratio=round(counters["reuses"] / counters["executions"], 3))
+        for sql, counters in stats.items()
+    ]
+    report.sort(key=lambda entry: entry["executions"], reverse=True)
+    return report
 
 @app.read_resource()
 async def read_resource(uri: AnyUrl) -> str:
-    """Read table contents."""
-    config, connection_string = get_db_config()
+    """Read table contents, a table profile, the statement counters or the metrics snapshot."""
     uri_str = str(uri)
-    logger.info(f"Reading resource: {uri_str}")
+    logger.debug(f"Reading resource: {uri_str}")
     
     if not uri_str.startswith("mssql://"):
         raise ValueError(f"Invalid URI scheme: {uri_str}")
-        
-    parts = uri_str[8:].split('/')
-    table = parts[0]
+    if uri_str == "mssql://metrics":
+        if not get_settings().metrics:
+            raise ValueError("The metrics resource is disabled (set MSSQL_METRICS=true)")
+        return metrics.render()
+    if uri_str == "mssql://statements":
+        return json.dumps(statement_report())
+    
+    pool = get_pool()
+    parts = urlsplit(uri_str)
+    table = unquote(parts.netloc)
+    params = parse_qs(parts.query)
+    if parts.path == "/profile":
+        try:
+            sample_rows = int(params.get("sample", [get_settings().profile_sample_rows])[0])
+        except ValueError:
+            raise ValueError(f"Invalid sample size in URI: {uri_str}")
+        if not 0 <= sample_rows <= get_result_limits()["max_rows"]:
+            raise ValueError(f"Sample size must be between 0 and {get_result_limits()['max_rows']}")
+        try:
+            return await run_db(read_table_profile, pool, table, sample_rows)
+        except pyodbc.Error as e:
+            logger.error(f"Database error profiling {table}: {str(e)}")
+            raise RuntimeError(f"Database error: {str(e)}")
+    after = params.get("after", [None])[0]
+    fmt = params.get("format", ["csv"])[0]
+    if fmt not in ("csv", "json"):
+        raise ValueError(f"Table resources support csv and json formats, not {fmt}")
+    try:
+        limit = int(params.get("limit", ["100"])[0])
+    except ValueError:
+        raise ValueError(f"Invalid page limit in URI: {uri_str}")
+    if not 0 < limit <= get_result_limits()["max_rows"]:
+        raise ValueError(f"Page limit must be between 1 and {get_result_limits()['max_rows']}")
     
     try:
-        with connect(connection_string) as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(f"SELECT TOP 100 * FROM {table}")
-                columns = [desc[0] for desc in cursor.description]
-                rows = cursor.fetchall()
-                result = [",".join(map(str, row)) for row in rows]
-                return "\n".join([",".join(columns)] + result)
-                
-    except Error as e:
+        return await run_db(read_table, pool, table, after, limit, fmt)
+    except pyodbc.Error as e:
         logger.error(f"Database error reading resource {uri}: {str(e)}")
         raise RuntimeError(f"Database error: {str(e)}")
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available MSSQL tools."""
-    logger.info("Listing tools...")
-    return [
+    logger.debug("Listing tools...")
+    tools = [
         Tool(
             name="execute_sql",
-            description="Execute an SQL query on the MSSQL server",
+            description="Execute an SQL query on the MSSQL server. A batch that may write and returns more "
+                        "rows than fit in one chunk keeps its transaction and locks open until its last "
+                        "chunk is read, or rolls back after MSSQL_WRITE_STREAM_TTL seconds unused; "
+                        "read such results to the end promptly",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "query": {
                         "type": "string",
                         "description": "The SQL query to execute"
+                    },
+                    "params": {
+                        "type": "array",
+                        "items": {},
+                        "description": "Optional values bound, in order, to ? placeholders in the query"
+                    },
+                    "output_format": {
+                        "type": "string",
+                        "enum": ["csv", "json", "arrow", "arrow_file", "parquet"],
+                        "description": "Optional result format: csv (default), json, arrow (base64 Arrow IPC stream), or arrow_file/parquet written to the server's spool directory"
+                    },
+                    "max_rows": {
+                        "type": "integer",
+                        "description": "Optional maximum number of rows to return in this chunk"
+                    },
+                    "max_bytes": {
+                        "type": "integer",
+                        "description": "Optional maximum size of this chunk in bytes"
+                    },
+                    "continuation_token": {
+                        "type": "string",
+                        "description": "Token from a previous truncated result; fetches its next chunk instead of running a query"
+                    },
+                    "timeout_seconds": {
+                        "type": "number",
+                        "description": "Optional query timeout in seconds (default MSSQL_QUERY_TIMEOUT); the query is cancelled on the server when it expires"
+                    },
+                    "bypass_cache": {
+                        "type": "boolean",
+                        "description": "Optional flag to skip the result cache and always query the server"
+                    }
+                },
+                "required": []
+            }
+        ),
+        Tool(
+            name="bulk_insert",
+            description="Insert many rows into a table in batches, in a single transaction",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "table": {
+                        "type": "string",
+                        "description": "The table to insert into"
+                    },
+                    "columns": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "The columns to insert, in the order values appear in each row"
+                    },
+                    "rows": {
+                        "type": ["array", "string"],
+                        "description": "Rows as a JSON array of arrays (or objects keyed by column), or CSV text without a header"
+                    },
+                    "batch_size": {
+                        "type": "integer",
+                        "description": "Optional number of rows sent per round trip (default 1000)"
+                    }
+                },
+                "required": ["table", "columns", "rows"]
+            }
+        ),
+        Tool(
+            name="explain_sql",
+            description="Show how SQL Server runs a query: the estimated plan, or the actual plan with STATISTICS IO and TIME output",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The SQL query to explain"
+                    },
+                    "params": {
+                        "type": "array",
+                        "items": {"type": ["string", "number", "boolean", "null"]},
+                        "description": "Optional values bound, in order, to ? placeholders in the query"
+                    },
+                    "actual": {
+                        "type": "boolean",
+                        "description": "Run the query to capture the actual plan and statistics; changes are rolled back (default false)"
+                    },
+                    "include_xml": {
+                        "type": "boolean",
+                        "description": "Also return the raw showplan XML"
+                    },
+                    "timeout_seconds": {
+                        "type": "number",
+                        "description": "Optional query timeout in seconds (default MSSQL_QUERY_TIMEOUT)"
+                    }
+                },
+                "required": ["query"]
+            }
+        ),
+        Tool(
+            name="submit_query",
+            description="Start a long-running query in the background and return a job id to poll with job_status",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The SQL query to run"
+                    },
+                    "params": {
+                        "type": "array",
+                        "items": {"type": ["string", "number", "boolean", "null"]},
+                        "description": "Optional values bound, in order, to ? placeholders in the query"
+                    },
+                    "timeout_seconds": {
+                        "type": "number",
+                        "description": "Optional time limit for the whole job in seconds (default MSSQL_JOB_TIMEOUT)"
                     }
                 },
                 "required": ["query"]
             }
+        ),
+        Tool(
+            name="job_status",
+            description="Show the state of a background query job, or of every job if no id is given",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "Optional job id returned by submit_query"
+                    }
+                },
+                "required": []
+            }
+        ),
+        Tool(
+            name="fetch_job_results",
+            description="Read one page of a finished job's results",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "The job id returned by submit_query"
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Optional number of rows to skip (default 0)"
+                    },
+                    "output_format": {
+                        "type": "string",
+                        "enum": ["csv", "json", "arrow"],
+                        "description": "Optional result format (default csv)"
+                    },
+                    "max_rows": {
+                        "type": "integer",
+                        "description": "Optional maximum number of rows in this page"
+                    },
+                    "max_bytes": {
+                        "type": "integer",
+                        "description": "Optional maximum size of this page in bytes"
+                    }
+                },
+                "required": ["job_id"]
+            }
+        ),
+        Tool(
+            name="cancel_job",
+            description="Cancel a queued or running background query job",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "The job id returned by submit_query"
+                    }
+                },
+                "required": ["job_id"]
+            }
         )
     ]
+    tools.append(Tool(
+        name="reload_config",
+        description="Re-read the server settings (environment and MSSQL_CONFIG_FILE) and connection profiles",
+        inputSchema={"type": "object", "properties": {}, "required": []}
+    ))
+    if profiles_configured():
+        tools.append(Tool(
+            name="execute_sql_fanout",
+            description="Run the same read-only query on several connection profiles at once and merge the results",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "The read-only SQL query to run on every target"
+                    },
+                    "targets": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional profile names or tags to run on (default: every profile)"
+                    },
+                    "params": {
+                        "type": "array",
+                        "items": {"type": ["string", "number", "boolean", "null"]},
+                        "description": "Optional values bound, in order, to ? placeholders in the query"
+                    },
+                    "output_format": {
+                        "type": "string",
+                        "enum": ["csv", "json", "arrow"],
+                        "description": "Optional result format (default csv)"
+                    },
+                    "max_rows": {
+                        "type": "integer",
+                        "description": "Optional maximum number of merged rows, split evenly between targets"
+                    },
+                    "max_concurrency": {
+                        "type": "integer",
+                        "description": "Optional cap on targets queried at once (never above MSSQL_FANOUT_CONCURRENCY)"
+                    },
+                    "timeout_seconds": {
+                        "type": "number",
+                        "description": "Optional per-target query timeout in seconds (default MSSQL_QUERY_TIMEOUT)"
+                    }
+                },
+                "required": ["query"]
+            }
+        ))
+    return tools
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     """Execute SQL commands."""
-    config, connection_string = get_db_config()
-    logger.info(f"Calling tool: {name} with arguments: {arguments}")
-    
-    if name != "execute_sql":
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        result = await dispatch_tool(name, arguments)
+        # Handlers report query failures as text rather than raising
+        failed = result and result[0].text.startswith(("Error ", "Query timeout:"))
+        outcome = "failed" if failed else "ok"
+        return result
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        TOOL_SECONDS.observe(elapsed, tool=name, outcome=outcome)
+        record_call(name, arguments, elapsed, outcome)
+
+async def dispatch_tool(name: str, arguments: dict) -> list[TextContent]:
+    """Route a tool call to its handler."""
+    if name == "execute_sql":
+        return await call_execute_sql(arguments)
+    elif name == "bulk_insert":
+        return await call_bulk_insert(arguments)
+    elif name == "explain_sql":
+        return await call_explain_sql(arguments)
+    elif name == "execute_sql_fanout":
+        return await call_execute_sql_fanout(arguments)
+    elif name == "submit_query":
+        return call_submit_query(arguments)
+    elif name == "job_status":
+        return call_job_status(arguments)
+    elif name == "fetch_job_results":
+        return await call_fetch_job_results(arguments)
+    elif name == "cancel_job":
+        return call_cancel_job(arguments)
+    elif name == "reload_config":
+        return call_reload_config()
+    else:
         raise ValueError(f"Unknown tool: {name}")
-    
+
+async def call_execute_sql(arguments: dict) -> list[TextContent]:
+    """Run the execute_sql tool."""
     query = arguments.get("query")
-    if not query:
+    token = arguments.get("continuation_token")
+    if not query and not token:
         raise ValueError("Query is required")
     
+    config, _ = get_db_config()
+    pool = get_pool()
+    params = arguments.get("params") or []
+    if not isinstance(params, list) or any(isinstance(p, (list, dict)) for p in params):
+        raise ValueError("Params must be an array of scalar values")
+    output_format = check_format(arguments.get("output_format") or "csv")
+    limits = get_result_limits(arguments)
+    timeout = get_query_timeout(arguments)
+    
+    cache = get_result_cache()
+    cache_key = None
+    # Spooled files may be cleaned up, so only inline results are cached
+    if cache is not None and not token and output_format not in SPOOL_FORMATS and is_cacheable(query):
+        cache_key = (config["database"], normalize_query(query), tuple(params), output_format,
+                     limits["max_rows"], limits["max_bytes"])
+        if not arguments.get("bypass_cache"):
+            texts = cache.get(cache_key)
+            if texts is not None:
+                return [TextContent(type="text", text=text) for text in texts]
+    
+    handle = QueryHandle(timeout)
+    # Backstop for the whole call, including fetching, which the ODBC timeout doesn't cover
+    watchdog = asyncio.get_running_loop().call_later(timeout, handle.cancel, True) if timeout else None
     try:
-        with connect(connection_string) as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(query)
-                
-                # Special handling for listing tables in MSSQL
-                if query.strip().upper() == "SHOW TABLES":
-                    cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE';")
-                    tables = cursor.fetchall()
-                    result = [f"Tables_in_{config['database']}"]  # Header
-                    result.extend([table[0] for table in tables])
-                    return [TextContent(type="text", text="\n".join(result))]
-                
-                # Regular SELECT queries
-                elif query.strip().upper().startswith("SELECT"):
-                    columns = [desc[0] for desc in cursor.description]
-                    rows = cursor.fetchall()
-                    result = [",".join(map(str, row)) for row in rows]
-                    return [TextContent(type="text", text="\n".join([",".join(columns)] + result))]
-                
-                # Non-SELECT queries
-                else:
-                    conn.commit()
-                    return [TextContent(type="text", text=f"Query executed successfully. Rows affected: {cursor.rowcount}")]
-                
+        if token:
+            texts, note = await run_db(continue_sql, get_streams(), token, limits, handle)
+        else:
+            texts, note = await run_db(execute_sql, pool, get_streams(), query, config["database"], limits,
+                                      params, output_format, handle)
+        if cache is not None:
+            if cache_key is not None and note is None:
+                # Only complete results are cached; chunked ones need their stream
+                cache.put(cache_key, tuple(texts), sum(len(text.encode("utf-8")) for text in texts))
+            elif not token and not is_read_only(query):
+                # A write through this server may change any cached result
+                cache.clear()
+        result = [TextContent(type="text", text=text) for text in texts]
+        if note:
+            result.append(TextContent(type="text", text=note))
+        return result
+    except asyncio.CancelledError:
+        # The MCP request was cancelled: stop the statement on the server too
+        handle.cancel()
+        raise
+    except QueryTimeoutError as e:
+        logger.warning(f"Query timed out after {timeout}s: {query}")
+        return [TextContent(type="text", text=f"Query timeout: {str(e)}")]
     except Exception as e:
         logger.error(f"Error executing SQL '{query}': {e}")
         return [TextContent(type="text", text=f"Error executing query: {str(e)}")]
+    finally:
+        if watchdog is not None:
+            watchdog.cancel()
+
+async def call_bulk_insert(arguments: dict) -> list[TextContent]:
+    """Run the bulk_insert tool."""
+    pool = get_pool()
+    table = arguments.get("table")
+    columns = arguments.get("columns")
+    if not table or not columns:
+        raise ValueError("Table and columns are required")
+    rows = parse_rows(arguments.get("rows"), columns)
+    batch_size = int(arguments.get("batch_size") or get_settings().bulk_batch_size)
+    if batch_size < 1:
+        raise ValueError("Batch size must be positive")
+    
+    try:
+        stats = await run_db(bulk_insert, pool, table, columns, rows, batch_size)
+    except Exception as e:
+        logger.error(f"Error bulk inserting into {table}: {e}")
+        return [TextContent(type="text", text=f"Error inserting rows (no rows were inserted): {str(e)}")]
+    
+    cache = get_result_cache()
+    if cache is not None:
+        cache.clear()
+    rate = stats["rows"] / stats["seconds"] if stats["seconds"] else float(stats["rows"])
+    return [TextContent(
+        type="text",
+        text=f"Inserted {stats['rows']} rows into {table} in {stats['batches']} batches "
+             f"({stats['seconds']:.3f}s, {rate:.0f} rows/sec)"
+    )]
+
+async def call_explain_sql(arguments: dict) -> list[TextContent]:
+    """Run the explain_sql tool."""
+    pool = get_pool()
+    query = arguments.get("query")
+    if not query:
+        raise ValueError("Query is required")
+    params = arguments.get("params") or []
+    if not isinstance(params, list) or any(isinstance(p, (list, dict)) for p in params):
+        raise ValueError("Params must be an array of scalar values")
+    actual = bool(arguments.get("actual"))
+    timeout = get_query_timeout(arguments)
+    
+    handle = QueryHandle(timeout)
+    watchdog = asyncio.get_running_loop().call_later(timeout, handle.cancel, True) if timeout else None
+    try:
+        summary, plan_xml = await run_db(explain_sql, pool, query, params, actual,
+                                         bool(arguments.get("include_xml")), handle)
+    except asyncio.CancelledError:
+        handle.cancel()
+        raise
+    except QueryTimeoutError as e:
+        return [TextContent(type="text", text=f"Query timeout: {str(e)}")]
+    except Exception as e:
+        logger.error(f"Error explaining SQL '{query}': {e}")
+        return [TextContent(type="text", text=f"Error explaining query: {str(e)}")]
+    finally:
+        if watchdog is not None:
+            watchdog.cancel()
+    
+    result = [TextContent(type="text", text=summary)]
+    if plan_xml:
+        result.append(TextContent(type="text", text=plan_xml))
+    return result
+
+async def call_execute_sql_fanout(arguments: dict) -> list[TextContent]:
+    """Run the execute_sql_fanout tool."""
+    registry = get_profiles()
+    if registry is None:
+        raise ValueError("No connection profiles configured (set MSSQL_PROFILES_FILE)")
+    query = arguments.get("query")
+    if not query:
+        raise ValueError("Query is required")
+    if not is_read_only(query):
+        raise ValueError("execute_sql_fanout only runs single read-only queries")
+    params = arguments.get("params") or []
+    if not isinstance(params, list) or any(isinstance(p, (list, dict)) for p in params):
+        raise ValueError("Params must be an array of scalar values")
+    output_format = check_format(arguments.get("output_format") or "csv")
+    if output_format in SPOOL_FORMATS:
+        raise ValueError(f"Output format '{output_format}' is not supported for fan-out queries")
+    profiles = registry.select(arguments.get("targets"))
+    limits = get_result_limits(arguments)
+    timeout = get_query_timeout(arguments)
+    executor = get_fanout_executor()
+    # The fan-out executor is sized from the same setting
+    workers = get_settings().fanout_concurrency
+    concurrency = min(int(arguments.get("max_concurrency") or workers), workers)
+    if concurrency < 1:
+        raise ValueError("Max concurrency must be positive")
+    row_cap = max(1, limits["max_rows"] // len(profiles))
+    
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_target(profile):
+        async with semaphore:
+            handle = QueryHandle(timeout)
+            watchdog = loop.call_later(timeout, handle.cancel, True) if timeout else None
+            started = loop.time()
+            try:
+                return await loop.run_in_executor(executor, functools.partial(
+                    query_target, registry.pool(profile.name), profile.name, query, params, row_cap, handle))
+            except asyncio.CancelledError:
+                handle.cancel()
+                raise
+            except Exception as e:
+                logger.warning(f"Fan-out query failed on {profile.name}: {e}")
+                return TargetResult(profile.name, error=str(e), seconds=loop.time() - started)
+            finally:
+                if watchdog is not None:
+                    watchdog.cancel()
+    
+    started = loop.time()
+    results = await asyncio.gather(*(run_target(p) for p in profiles))
+    elapsed = loop.time() - started
+    text, cut_short = merge_results(results, output_format, limits["max_bytes"])
+    failed = sum(1 for r in results if r.error is not None)
+    summary = (f"Queried {len(results)} targets ({failed} failed) in {elapsed * 1000:.0f} ms, "
+               f"at most {concurrency} at a time\n{summarize(results)}")
+    if cut_short:
+        summary += f"\nMerged result truncated at {limits['max_bytes']} bytes."
+    result = [TextContent(type="text", text=text)] if text is not None else []
+    result.append(TextContent(type="text", text=summary))
+    return result
+
+def call_submit_query(arguments: dict) -> list[TextContent]:
+    """Run the submit_query tool."""
+    query = arguments.get("query")
+    if not query:
+        raise ValueError("Query is required")
+    params = arguments.get("params") or []
+    if not isinstance(params, list) or any(isinstance(p, (list, dict)) for p in params):
+        raise ValueError("Params must be an array of scalar values")
+    timeout = arguments.get("timeout_seconds")
+    timeout = get_settings().job_timeout if timeout is None else get_query_timeout(arguments)
+    # The job's writes land when it finishes, so that's when cached results go stale
+    on_finish = None if is_read_only(query) else lambda job: clear_result_cache()
+    job = get_jobs().submit(query, params, timeout, on_finish=on_finish)
+    return [TextContent(type="text", text=f"Submitted job {job.id}. Poll job_status with this id.")]
+
+def call_job_status(arguments: dict) -> list[TextContent]:
+    """Run the job_status tool."""
+    jobs = get_jobs()
+    job_id = arguments.get("job_id")
+    if job_id:
+        return [TextContent(type="text", text=jobs.get(job_id).describe())]
+    lines = [job.describe() for job in jobs.list()]
+    return [TextContent(type="text", text="\n".join(lines) if lines else "No jobs.")]
+
+async def call_fetch_job_results(arguments: dict) -> list[TextContent]:
+    """Run the fetch_job_results tool."""
+    job_id = arguments.get("job_id")
+    if not job_id:
+        raise ValueError("Job id is required")
+    output_format = check_format(arguments.get("output_format") or "csv")
+    if output_format in SPOOL_FORMATS:
+        raise ValueError(f"Output format '{output_format}' is not supported for job results")
+    offset = int(arguments.get("offset") or 0)
+    limits = get_result_limits(arguments)
+    jobs = get_jobs()
+    job = jobs.get(job_id)
+    # Reading the spilled file is blocking I/O, so it runs on the DB executor too
+    text, count = await run_db(jobs.read, job, offset, limits["max_rows"], limits["max_bytes"], output_format)
+    result = [TextContent(type="text", text=text)]
+    if offset + count < job.rows:
+        result.append(TextContent(
+            type="text",
+            text=f"More rows available: rows {offset}-{offset + count - 1} of {job.rows}. "
+                 f"Call fetch_job_results with offset={offset + count} for the next page."
+        ))
+    return result
+
+def call_cancel_job(arguments: dict) -> list[TextContent]:
+    """Run the cancel_job tool."""
+    job_id = arguments.get("job_id")
+    if not job_id:
+        raise ValueError("Job id is required")
+    if get_jobs().cancel(job_id):
+        return [TextContent(type="text", text=f"Cancelling job {job_id}.")]
+    return [TextContent(type="text", text=f"Job {job_id} has already finished.")]
+
+def call_reload_config() -> list[TextContent]:
+    """Run the reload_config tool."""
+    try:
+        changed = reload_settings()
+    except ValueError as e:
+        logger.error(f"Keeping current settings: {e}")
+        return [TextContent(type="text", text=f"Error reloading settings, current settings kept: {str(e)}")]
+    return [TextContent(type="text", text="Settings reloaded." if changed else "Settings unchanged.")]
+
+def handle_sighup():
+    """Reload the settings on SIGHUP."""
+    try:
+        reload_settings()
+    except ValueError as e:
+        logger.error(f"Keeping current settings: {e}")
+
+async def open_pool():
+    """Pre-open the pool's minimum connections on the DB executor."""
+    try:
+        await run_db(get_pool().open)
+    except pyodbc.Error as e:
+        logger.warning(f"Could not pre-open pooled connections: {str(e)}")
 
 async def main():
     """Main entry point to run the MCP server."""
     from mcp.server.stdio import stdio_server
     
+    configure_logging()
     logger.info("Starting MSSQL MCP server...")
-    config, _ = get_db_config()
-    logger.info(f"Database config: {config['server']}/{config['database']} as {config['user']}")
+    # Validate every setting up front rather than on the first request
+    settings = get_settings()
+    logger.info(f"Database config: {settings.db.server}/{settings.db.database} as {settings.db.user}")
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, handle_sighup)
+    except (AttributeError, NotImplementedError):
+        # No SIGHUP on Windows; the reload_config tool still works
+        pass
+    # Exporters are set up once; a settings reload doesn't move them
+    metrics_server = None
+    if settings.metrics_port:
+        metrics_server = start_http_server(metrics, settings.metrics_host, settings.metrics_port)
+    textfile = None
+    if settings.metrics_textfile:
+        textfile = TextfileWriter(metrics, settings.metrics_textfile, settings.metrics_interval).start()
     
     async with stdio_server() as (read_stream, write_stream):
+        # Connect while the client handshakes, rather than before answering it
+        warm_up = asyncio.create_task(open_pool())
         try:
             await app.run(
                 read_stream,
@@ -170,6 +1284,13 @@ async def main():
         except Exception as e:
             logger.error(f"Server error: {str(e)}", exc_info=True)
             raise
+        finally:
+            if metrics_server is not None:
+                metrics_server.shutdown()
+            if textfile is not None:
+                textfile.stop()
+            warm_up.cancel()
+            close_db()
 
 if __name__ == "__main__":
     asyncio.run(main())
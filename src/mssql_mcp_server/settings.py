@@ -0,0 +1,213 @@
+"""Server settings, read and validated once.
+
+``Settings.load()`` reads every ``MSSQL_*`` variable, builds the ODBC
+connection string and loads the connection profiles in one go, reporting all
+problems together. The result is immutable; the server keeps one instance
+and only replaces it on an explicit reload (SIGHUP or the ``reload_config``
+tool).
+
+Values come from the environment, overlaid by the ``KEY=VALUE`` lines of the
+file named by ``MSSQL_CONFIG_FILE`` if set. Since a process's environment
+can't change from outside, that file is what a reload picks up changes from.
+"""
+
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+
+from mcp_common import EnvReader
+
+from .profiles import build_connection_string, load_profiles
+
+logger = logging.getLogger("mssql_mcp_server.settings")
+
+def read_config_file(path):
+    """Parse a ``KEY=VALUE`` file; blank lines and ``#`` comments are skipped."""
+    values = {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError as e:
+        raise ValueError(f"Could not read config file {path}: {e}")
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, sep, value = line.partition("=")
+        if not sep or not key.strip():
+            raise ValueError(f"{path}:{number}: expected KEY=VALUE")
+        values[key.strip()] = value.strip().strip("\"'")
+    return values
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    driver: str
+    server: str
+    user: str
+    password: str = field(repr=False)
+    database: str
+    trusted_server_certificate: str
+    trusted_connection: str
+    connection_string: str = field(repr=False, compare=False)
+
+    def as_dict(self):
+        """The connection settings as the config dict ``get_db_config()`` returns."""
+        return {
+            "driver": self.driver,
+            "server": self.server,
+            "user": self.user,
+            "password": self.password,
+            "database": self.database,
+            "trusted_server_certificate": self.trusted_server_certificate,
+            "trusted_connection": self.trusted_connection,
+        }
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    min_size: int
+    max_size: int
+    idle_timeout: float
+    acquire_timeout: float
+    health_check: bool
+    statement_cache_size: int
+
+
+@dataclass(frozen=True)
+class Settings:
+    db: DatabaseSettings
+    pool: PoolSettings
+    fetch_batch_size: int
+    result_max_rows: int
+    result_max_bytes: int
+    spool_dir: str
+    spool_ttl: float
+    parquet_row_group_bytes: int
+    query_timeout: float
+    executor_workers: int
+    max_open_streams: int
+    stream_ttl: float
+    write_stream_ttl: float
+    schema_cache_ttl: float
+    schema_cache_max_age: float
+    result_cache: bool
+    result_cache_entries: int
+    result_cache_bytes: int
+    result_cache_ttl: float
+    bulk_batch_size: int
+    profile_sample_rows: int
+    profile_cache_ttl: float
+    profiles_file: str | None
+    profiles: dict | None = field(repr=False)
+    fanout_concurrency: int
+    fanout_pool_size: int
+    log_sample_rate: float
+    job_workers: int
+    job_queue: int
+    job_ttl: float
+    job_timeout: float
+    metrics: bool
+    metrics_host: str
+    metrics_port: int
+    metrics_textfile: str | None
+    metrics_interval: float
+    config_file: str | None
+
+    @classmethod
+    def load(cls, environ=None):
+        """Build settings from the environment and ``MSSQL_CONFIG_FILE``.
+
+        Raises ValueError listing every invalid or missing setting.
+        """
+        env = dict(os.environ if environ is None else environ)
+        config_file = env.get("MSSQL_CONFIG_FILE")
+        if config_file:
+            env.update(read_config_file(config_file))
+        reader = EnvReader(env)
+        value, flag, errors = reader.value, reader.flag, reader.errors
+
+        positive = (lambda v: v >= 1, "must be at least 1")
+        not_negative = (lambda v: v >= 0, "must not be negative")
+
+        user, password, database = env.get("MSSQL_USER"), env.get("MSSQL_PASSWORD"), env.get("MSSQL_DATABASE")
+        if not all([user, password, database]):
+            logger.error("Missing required database configuration. Please check environment variables:")
+            logger.error("MSSQL_USER, MSSQL_PASSWORD, and MSSQL_DATABASE are required")
+            errors.append("Missing required database configuration: "
+                          "MSSQL_USER, MSSQL_PASSWORD and MSSQL_DATABASE are required")
+        db_config = {
+            "driver": env.get("MSSQL_DRIVER", "SQL Server"),
+            "server": env.get("MSSQL_HOST", "localhost"),
+            "user": user,
+            "password": password,
+            "database": database,
+            "trusted_server_certificate": env.get("TrustServerCertificate", "yes"),
+            "trusted_connection": env.get("Trusted_Connection", "no"),
+        }
+        db = DatabaseSettings(**db_config, connection_string=build_connection_string(db_config))
+
+        pool = PoolSettings(
+            min_size=value("MSSQL_POOL_MIN_SIZE", "1", int, *not_negative),
+            max_size=value("MSSQL_POOL_MAX_SIZE", "5", int, *positive),
+            idle_timeout=value("MSSQL_POOL_IDLE_TIMEOUT", "300", float, *not_negative),
+            acquire_timeout=value("MSSQL_POOL_ACQUIRE_TIMEOUT", "30", float, *not_negative),
+            health_check=flag("MSSQL_POOL_HEALTH_CHECK", "yes"),
+            statement_cache_size=value("MSSQL_STATEMENT_CACHE_SIZE", "32", int, *not_negative),
+        )
+        if pool.min_size > pool.max_size:
+            errors.append("MSSQL_POOL_MIN_SIZE must not exceed MSSQL_POOL_MAX_SIZE")
+
+        profiles_file = env.get("MSSQL_PROFILES_FILE") or None
+        profiles = None
+        if profiles_file:
+            try:
+                profiles = load_profiles(profiles_file, env)
+            except ValueError as e:
+                errors.append(str(e))
+
+        settings = cls(
+            db=db,
+            pool=pool,
+            fetch_batch_size=value("MSSQL_FETCH_BATCH_SIZE", "500", int, *positive),
+            result_max_rows=value("MSSQL_RESULT_MAX_ROWS", "10000", int, *positive),
+            result_max_bytes=value("MSSQL_RESULT_MAX_BYTES", str(4 * 1024 * 1024), int, *positive),
+            spool_dir=env.get("MSSQL_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "mssql_mcp_spool")),
+            spool_ttl=value("MSSQL_SPOOL_TTL", "3600", float, *not_negative),
+            parquet_row_group_bytes=value("MSSQL_PARQUET_ROW_GROUP_BYTES", str(64 * 1024 * 1024), int,
+                                          *positive),
+            query_timeout=value("MSSQL_QUERY_TIMEOUT", "300", float, *not_negative),
+            executor_workers=value("MSSQL_EXECUTOR_WORKERS", "0", int, *not_negative),
+            max_open_streams=value("MSSQL_MAX_OPEN_STREAMS", "2", int, *not_negative),
+            stream_ttl=value("MSSQL_STREAM_TTL", "300", float, *not_negative),
+            write_stream_ttl=value("MSSQL_WRITE_STREAM_TTL", "30", float, *not_negative),
+            schema_cache_ttl=value("MSSQL_SCHEMA_CACHE_TTL", "60", float, *not_negative),
+            schema_cache_max_age=value("MSSQL_SCHEMA_CACHE_MAX_AGE", "3600", float, *not_negative),
+            result_cache=flag("MSSQL_RESULT_CACHE", "no"),
+            result_cache_entries=value("MSSQL_RESULT_CACHE_ENTRIES", "256", int, *positive),
+            result_cache_bytes=value("MSSQL_RESULT_CACHE_BYTES", str(64 * 1024 * 1024), int, *positive),
+            result_cache_ttl=value("MSSQL_RESULT_CACHE_TTL", "30", float, *not_negative),
+            bulk_batch_size=value("MSSQL_BULK_BATCH_SIZE", "1000", int, *positive),
+            profile_sample_rows=value("MSSQL_PROFILE_SAMPLE_ROWS", "20", int, *not_negative),
+            profile_cache_ttl=value("MSSQL_PROFILE_CACHE_TTL", "600", float, *not_negative),
+            profiles_file=profiles_file,
+            profiles=profiles,
+            fanout_concurrency=value("MSSQL_FANOUT_CONCURRENCY", "8", int, *positive),
+            fanout_pool_size=value("MSSQL_FANOUT_POOL_SIZE", "2", int, *positive),
+            log_sample_rate=value("MSSQL_LOG_SAMPLE_RATE", "0.1", float,
+                                  lambda v: 0 <= v <= 1, "must be between 0 and 1"),
+            job_workers=value("MSSQL_JOB_WORKERS", "2", int, *positive),
+            job_queue=value("MSSQL_JOB_QUEUE", "16", int, *not_negative),
+            job_ttl=value("MSSQL_JOB_TTL", "3600", float, *not_negative),
+            job_timeout=value("MSSQL_JOB_TIMEOUT", "3600", float, *not_negative),
+            metrics=flag("MSSQL_METRICS", "no"),
+            metrics_host=env.get("MSSQL_METRICS_HOST", "127.0.0.1"),
+            metrics_port=value("MSSQL_METRICS_PORT", "0", int,
+                               lambda v: 0 <= v <= 65535, "must be a TCP port number or 0"),
+            metrics_textfile=env.get("MSSQL_METRICS_TEXTFILE") or None,
+            metrics_interval=value("MSSQL_METRICS_INTERVAL", "15", float, lambda v: v > 0, "must be positive"),
+            config_file=config_file,
+        )
+        reader.check()
+        return settings
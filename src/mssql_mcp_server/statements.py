@@ -0,0 +1,102 @@
+"""Prepared statement reuse for parameterized queries.
+
+pyodbc prepares a parameterized statement (SQLPrepare, which the SQL Server
+driver turns into sp_prepexec/sp_execute) and skips the prepare step when the
+same SQL text is executed again on the same cursor. Keeping one cursor per
+statement text on each pooled connection therefore lets repeated calls reuse
+the prepared handle instead of preparing again.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("mssql_mcp_server.statements")
+
+
+def discard_results(cursor):
+    """Throw away unread rows so the cursor (and its connection) can be reused.
+
+    SQLMoreResults discards the pending result set without freeing the
+    statement handle, unlike cursor.close().
+    """
+    try:
+        while cursor.nextset():
+            pass
+    except Exception as e:
+        logger.debug(f"Error discarding pending results: {e}")
+
+
+class StatementCache:
+    """LRU of cursors, keyed by SQL text and query timeout, for one connection.
+
+    pyodbc fixes a cursor's query timeout when the cursor is created, so the
+    same statement run with a different timeout gets its own cursor.
+    """
+
+    def __init__(self, conn, size=32):
+        self.conn = conn
+        self.size = size
+        self._cursors = OrderedDict()
+
+    def cursor(self, sql, timeout=0):
+        """Return ``(cursor, reused)`` for a statement."""
+        key = (sql, timeout)
+        cursor = self._cursors.get(key)
+        if cursor is not None:
+            self._cursors.move_to_end(key)
+            return cursor, True
+        self.conn.timeout = timeout
+        cursor = self.conn.cursor()
+        self._cursors[key] = cursor
+        while len(self._cursors) > self.size:
+            _, oldest = self._cursors.popitem(last=False)
+            self._close_cursor(oldest)
+        return cursor, False
+
+    def forget(self, sql, timeout=0):
+        """Drop a statement whose cursor failed, so the next call prepares afresh."""
+        cursor = self._cursors.pop((sql, timeout), None)
+        if cursor is not None:
+            self._close_cursor(cursor)
+
+    def _close_cursor(self, cursor):
+        try:
+            cursor.close()
+        except Exception as e:
+            logger.debug(f"Error closing cached cursor: {e}")
+
+    def close(self):
+        """Close every cached cursor."""
+        while self._cursors:
+            _, cursor = self._cursors.popitem()
+            self._close_cursor(cursor)
+
+
+class StatementStats:
+    """Per-statement execution and prepared-plan reuse counters.
+
+    Only the ``max_statements`` most recently executed statements are kept.
+    """
+
+    def __init__(self, max_statements=500):
+        self.max_statements = max_statements
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, sql, reused):
+        with self._lock:
+            counters = self._counters.get(sql)
+            if counters is None:
+                counters = self._counters[sql] = {"executions": 0, "prepares": 0, "reuses": 0}
+                while len(self._counters) > self.max_statements:
+                    self._counters.popitem(last=False)
+            else:
+                self._counters.move_to_end(sql)
+            counters["executions"] += 1
+            counters["reuses" if reused else "prepares"] += 1
+
+    def snapshot(self):
+        """Return a copy of the counters keyed by statement text."""
+        with self._lock:
+            return {sql: dict(counters) for sql, counters in self._counters.items()}
@@ -0,0 +1,235 @@
+"""Chunked delivery of large result sets.
+
+Rows are pulled from the cursor with ``fetchmany`` and fed to an output
+encoder a batch at a time until a row or byte budget is reached. When rows remain, the open
+cursor (and the pooled connection it belongs to) is parked in a
+``StreamRegistry`` under a continuation token so the client can ask for the
+next chunk, keeping peak memory proportional to the batch size rather than the
+result size.
+
+A batch can return several result sets. The stream walks them in order with
+``cursor.nextset()``, using ``cursor.description`` to tell row-returning sets
+from statements that only report a row count. The batch's transaction stays
+open while the stream is parked: it is committed when the last chunk is
+read and rolled back if the stream is closed before that. Meanwhile the
+batch holds its locks, so a stream that may have written expires after the
+shorter ``write_ttl``.
+"""
+
+import bisect
+import itertools
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from .formats import make_encoder
+from .statements import discard_results
+
+logger = logging.getLogger("mssql_mcp_server.streaming")
+
+# Expired or evicted tokens remembered, so a late continuation can be told what happened
+DROPPED_TOKENS = 256
+
+
+class ResultStream:
+    """An executed cursor whose rows are handed out chunk by chunk.
+
+    With ``keep_cursor`` the cursor belongs to a statement cache: closing the
+    stream only discards unread rows so its prepared statement survives.
+    ``exhausted`` refers to the current result set; ``next_set`` moves on to
+    the next one that returns rows. ``read_only`` says whether the query is
+    known to write nothing.
+    """
+
+    def __init__(self, pool, conn, cursor, batch_size=500, keep_cursor=False, fmt="csv", read_only=False):
+        self.pool = pool
+        self.conn = conn
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self.keep_cursor = keep_cursor
+        self.fmt = fmt
+        self.read_only = read_only
+        self.rows_sent = 0
+        self.rows_affected = -1
+        self.result_sets = 0
+        self.fetch_seconds = 0.0
+        self.encode_seconds = 0.0
+        self.last_used = time.monotonic()
+        self._start_set()
+
+    def _start_set(self):
+        self.encoder = make_encoder(self.fmt, self.cursor.description)
+        self.columns = [desc[0] for desc in self.cursor.description]
+        self.result_sets += 1
+        self.exhausted = False
+        self._pending = []
+
+    @property
+    def may_write(self):
+        """Whether closing the stream without committing could undo changes."""
+        return not self.read_only or self.rows_affected >= 0
+
+    def count_affected(self):
+        """Add the current row-count-only result to ``rows_affected``."""
+        if self.cursor.rowcount >= 0:
+            self.rows_affected = max(self.rows_affected, 0) + self.cursor.rowcount
+
+    def next_set(self):
+        """Advance to the next row-returning result set; False when there are none left."""
+        while self.cursor.nextset():
+            if self.cursor.description:
+                self._start_set()
+                return True
+            self.count_affected()
+        return False
+
+    def read_chunk(self, max_rows, max_bytes):
+        """Encode up to max_rows rows / max_bytes bytes with the stream's encoder.
+
+        Each fetched batch is encoded in one call; when only part of it fits
+        the budget, the rest is kept for the next chunk. At least one row is
+        always returned so a single wide row can't stall the stream. Time
+        spent in the driver and in the encoder is added to ``fetch_seconds``
+        and ``encode_seconds``.
+        """
+        started = time.perf_counter()
+        fetch_seconds = 0.0
+        encoder = self.encoder
+        size = encoder.begin() + encoder.footer_size
+        count = 0
+
+        while count < max_rows:
+            if not self._pending:
+                fetch_started = time.perf_counter()
+                self._pending = self.cursor.fetchmany(min(self.batch_size, max_rows - count))
+                fetch_seconds += time.perf_counter() - fetch_started
+                if not self._pending:
+                    self.exhausted = True
+                    break
+            rows = self._pending[:max_rows - count]
+            pieces, sizes = encoder.encode_batch(rows)
+            taken = len(rows)
+            if size + sum(sizes) > max_bytes:
+                taken = bisect.bisect_right(list(itertools.accumulate(sizes, initial=size))[1:], max_bytes)
+                taken = max(taken, 0 if count else 1)
+                pieces, sizes = pieces[:taken], sizes[:taken]
+            encoder.append_batch(pieces)
+            size += sum(sizes)
+            count += taken
+            self._pending = self._pending[taken:]
+            if taken < len(rows):
+                break
+
+        # Peek so a result that ends exactly on the budget is reported as complete.
+        if not self.exhausted and not self._pending:
+            fetch_started = time.perf_counter()
+            self._pending = self.cursor.fetchmany(1)
+            fetch_seconds += time.perf_counter() - fetch_started
+            self.exhausted = not self._pending
+
+        self.rows_sent += count
+        text = encoder.finish()
+        self.last_used = time.monotonic()
+        self.fetch_seconds += fetch_seconds
+        self.encode_seconds += self.last_used - started - fetch_seconds
+        return text
+
+    def close(self, commit=False):
+        """Close the cursor and hand its connection back to the pool.
+
+        With ``commit`` the batch ran to completion and its work is committed;
+        otherwise releasing the connection rolls back statements the client
+        never read up to.
+        """
+        try:
+            if commit:
+                self.conn.commit()
+        finally:
+            if self.keep_cursor:
+                discard_results(self.cursor)
+            else:
+                try:
+                    self.cursor.close()
+                except Exception as e:
+                    logger.debug(f"Error closing stream cursor: {e}")
+            self.pool.release(self.conn)
+
+
+class StreamRegistry:
+    """Open result streams keyed by continuation token.
+
+    Streams unused for ``ttl`` seconds are closed, and at most ``max_streams``
+    are kept open (the least recently used is closed first) so parked cursors
+    can't starve the connection pool. Streams that may have written hold
+    their locks while parked and are closed after ``write_ttl`` seconds.
+    """
+
+    def __init__(self, ttl=300.0, max_streams=2, write_ttl=30.0):
+        self.ttl = ttl
+        self.write_ttl = write_ttl
+        self.max_streams = max_streams
+        self._streams = {}
+        self._dropped = OrderedDict()  # token -> whether the closed stream may have written
+        self._lock = threading.Lock()
+
+    def register(self, stream, token=None):
+        """Park a stream and return the token that resumes it."""
+        token = token or secrets.token_urlsafe(16)
+        with self._lock:
+            self._streams[token] = stream
+            evicted = self._expire_locked()
+            while len(self._streams) > self.max_streams:
+                oldest = min(self._streams, key=lambda t: self._streams[t].last_used)
+                evicted.append(self._drop_locked(oldest))
+        for old in evicted:
+            old.close()
+        return token
+
+    def take(self, token):
+        """Remove and return the stream for a token.
+
+        A token whose stream was closed before the client came back raises
+        ValueError saying so, and whether the batch's changes were rolled back.
+        """
+        with self._lock:
+            evicted = self._expire_locked()
+            stream = self._streams.pop(token, None)
+            dropped = self._dropped.pop(token, None)
+        for old in evicted:
+            old.close()
+        if stream is None and dropped is not None:
+            raise ValueError("Continuation token expired before the result was read to the end"
+                             + ("; the batch was rolled back" if dropped else ""))
+        if stream is None:
+            raise ValueError("Unknown or expired continuation token")
+        return stream
+
+    def _drop_locked(self, token):
+        stream = self._streams.pop(token)
+        self._dropped[token] = stream.may_write
+        while len(self._dropped) > DROPPED_TOKENS:
+            self._dropped.popitem(last=False)
+        return stream
+
+    def ttl_for(self, stream):
+        """Seconds a parked stream may stay unused before it is closed."""
+        return min(self.ttl, self.write_ttl) if stream.may_write else self.ttl
+
+    def _expire_locked(self):
+        now = time.monotonic()
+        expired = [t for t, s in self._streams.items() if s.last_used < now - self.ttl_for(s)]
+        return [self._drop_locked(t) for t in expired]
+
+    def close_all(self):
+        """Close every parked stream."""
+        with self._lock:
+            streams = list(self._streams.values())
+            self._streams.clear()
+        for stream in streams:
+            stream.close()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._streams)
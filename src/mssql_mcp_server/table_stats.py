@@ -0,0 +1,114 @@
+"""Column statistics and a random sample for ``mssql://{table}/profile`` resources.
+
+``SELECT TOP 100 *`` shows the physically first rows of a table, which is a
+poor picture of the data. A profile instead gives, for every column, its
+null fraction, approximate distinct count and min/max, together with a
+``TABLESAMPLE`` sample of rows. The statistics come from one aggregate query
+(a single scan of the table), sent in the same batch as the sample query.
+"""
+
+import logging
+import math
+
+from .formats import json_value
+from .lazy import pyodbc
+from .pagination import quote_identifier
+
+logger = logging.getLogger("mssql_mcp_server.table_stats")
+
+# Types that can't be compared, so have no min, max or distinct count
+UNORDERED_TYPES = {"text", "ntext", "image", "xml", "sql_variant", "geography", "geometry"}
+# MIN and MAX reject bit; tinyint orders the same way
+CAST_TYPES = {"bit": "tinyint"}
+
+# SYSTEM sampling picks whole pages, so ask for a few times the rows wanted
+SAMPLE_OVERSAMPLING = 4
+
+# Longer min/max strings are cut short in the profile
+MAX_VALUE_LENGTH = 100
+
+
+def column_aggregates(column, distinct="APPROX_COUNT_DISTINCT"):
+    """Return the four aggregate expressions profiling one column."""
+    name = quote_identifier(column.name)
+    if column.type_name in UNORDERED_TYPES:
+        return [f"COUNT_BIG({name})", "NULL", "NULL", "NULL"]
+    if column.type_name in CAST_TYPES:
+        name = f"CAST({name} AS {CAST_TYPES[column.type_name]})"
+    if distinct == "COUNT":
+        distinct_expr = f"COUNT_BIG(DISTINCT {name})"
+    else:
+        distinct_expr = f"APPROX_COUNT_DISTINCT({name})"
+    return [f"COUNT_BIG({name})", distinct_expr, f"MIN({name})", f"MAX({name})"]
+
+
+def sample_percent(row_estimate, sample_rows):
+    """Percentage of pages to sample for about ``sample_rows`` rows, or None for the whole table."""
+    if row_estimate <= 0:
+        return None
+    percent = sample_rows * SAMPLE_OVERSAMPLING * 100 / row_estimate
+    return None if percent >= 100 else max(percent, 0.0001)
+
+
+def build_profile_query(table, sample_rows, distinct="APPROX_COUNT_DISTINCT"):
+    """Return the statistics and sample statements for a catalog ``TableInfo`` as one batch."""
+    name = quote_identifier(table.qualified_name)
+    expressions = ["COUNT_BIG(*)"]
+    for column in table.columns:
+        expressions.extend(column_aggregates(column, distinct))
+    sql = f"SELECT {', '.join(expressions)} FROM {name};"
+    if sample_rows:
+        percent = sample_percent(table.row_count, sample_rows)
+        sample = f" TABLESAMPLE SYSTEM ({percent:.4f} PERCENT)" if percent is not None else ""
+        sql += f"\nSELECT TOP ({int(sample_rows)}) * FROM {name}{sample};"
+    return sql
+
+
+def _short(value):
+    value = json_value(value)
+    if isinstance(value, str) and len(value) > MAX_VALUE_LENGTH:
+        return value[:MAX_VALUE_LENGTH] + "..."
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    return value
+
+
+def _run_profile(cursor, table, sample_rows, distinct):
+    cursor.execute(build_profile_query(table, sample_rows, distinct))
+    stats = cursor.fetchone()
+    row_count = stats[0]
+    columns = []
+    for i, column in enumerate(table.columns):
+        non_null, distinct_count, low, high = stats[1 + 4 * i:5 + 4 * i]
+        columns.append({
+            "name": column.name,
+            "type": column.type_name,
+            "null_fraction": round((row_count - non_null) / row_count, 6) if row_count else None,
+            "approx_distinct": distinct_count,
+            "min": _short(low),
+            "max": _short(high),
+        })
+    sample = None
+    if sample_rows and cursor.nextset():
+        sample = {
+            "columns": [desc[0] for desc in cursor.description],
+            "rows": [[_short(v) for v in row] for row in cursor.fetchall()],
+        }
+    return {"table": table.qualified_name, "rows": row_count, "columns": columns, "sample": sample}
+
+
+def profile_table(pool, table, sample_rows=20):
+    """Compute the column statistics and a sample of up to ``sample_rows`` rows.
+
+    APPROX_COUNT_DISTINCT needs SQL Server 2019; older servers get an exact
+    COUNT(DISTINCT) instead.
+    """
+    with pool.connection() as conn:
+        with conn.cursor() as cursor:
+            try:
+                return _run_profile(cursor, table, sample_rows, "APPROX_COUNT_DISTINCT")
+            except pyodbc.Error as e:
+                if "APPROX_COUNT_DISTINCT" not in str(e):
+                    raise
+                logger.info(f"Falling back to COUNT(DISTINCT) for {table.qualified_name}: {e}")
+            return _run_profile(cursor, table, sample_rows, "COUNT")
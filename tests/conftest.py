@@ -1,45 +1,60 @@
 # tests/conftest.py
 import pytest
 import os
-from pyodbc import connect, Error
 
 @pytest.fixture(scope="session")
 def mssql_connection():
-    """Create a test database connection."""
+    """Connect to a real SQL Server for integration tests, skipping when none is reachable."""
+    if not all(os.getenv(name) for name in ("MSSQL_USER", "MSSQL_PASSWORD", "MSSQL_DATABASE")):
+        pytest.skip("MSSQL_USER, MSSQL_PASSWORD and MSSQL_DATABASE are not set")
+    # Only the integration tests need the real driver; the rest run on the fake
+    pyodbc = pytest.importorskip("pyodbc", exc_type=ImportError)
+    from mssql_mcp_server.settings import Settings
+
     try:
-        connection = connect(
-            host=os.getenv("MSSQL_HOST", "localhost"),
-            user=os.getenv("MSSQL_USER", "root"),
-            password=os.getenv("MSSQL_PASSWORD", "testpassword"),
-            database=os.getenv("MSSQL_DATABASE", "test_db")
+        connection = pyodbc.connect(Settings.load().db.connection_string, timeout=5)
+    except pyodbc.Error as e:
+        pytest.skip(f"MSSQL server not available: {e}")
+
+    cursor = connection.cursor()
+    cursor.execute("""
+        IF OBJECT_ID('dbo.test_table', 'U') IS NULL
+        CREATE TABLE dbo.test_table (
+            id INT IDENTITY(1,1) PRIMARY KEY,
+            name NVARCHAR(255),
+            value INT
         )
-        
-        if connection.is_connected():
-            # Create a test table
-            cursor = connection.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS test_table (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    name VARCHAR(255),
-                    value INT
-                )
-            """)
-            connection.commit()
-            
-            yield connection
-            
-            # Cleanup
-            cursor.execute("DROP TABLE IF EXISTS test_table")
-            connection.commit()
-            cursor.close()
-            connection.close()
-            
-    except Error as e:
-        pytest.fail(f"Failed to connect to MSSQL: {e}")
+    """)
+    connection.commit()
+
+    yield connection
+
+    # Cleanup
+    cursor.execute("DROP TABLE IF EXISTS dbo.test_table")
+    connection.commit()
+    cursor.close()
+    connection.close()
 
 @pytest.fixture(scope="session")
 def mssql_cursor(mssql_connection):
     """Create a test cursor."""
     cursor = mssql_connection.cursor()
     yield cursor
-    cursor.close()
\ No newline at end of file
+    cursor.close()
+
+@pytest.fixture
+def fake_pyodbc(monkeypatch):
+    """Route the server's connections to the in-memory fake pyodbc driver."""
+    import fake_pyodbc as fake
+    from mssql_mcp_server import lazy, pool, server
+
+    fake.reset()
+    monkeypatch.setenv("MSSQL_USER", "sa")
+    monkeypatch.setenv("MSSQL_PASSWORD", "testpassword")
+    monkeypatch.setenv("MSSQL_DATABASE", "test_db")
+    monkeypatch.setattr(pool, "pyodbc", fake)
+    # Every other module reaches the driver through the lazy stand-in, e.g. in ``except pyodbc.Error``
+    monkeypatch.setattr(lazy.pyodbc, "_module", fake)
+    server.close_db()
+    yield fake
+    server.close_db()
@@ -0,0 +1,295 @@
+"""In-memory stand-in for the pyodbc module used by the offline tests.
+
+Only the parts of the pyodbc API the server touches are implemented. Queries
+are answered from results registered with ``add_result``; anything else
+behaves like a statement that returns no rows.
+"""
+
+import re
+import threading
+import time
+
+version = "fake"
+
+
+class Error(Exception):
+    pass
+
+
+class OperationalError(Error):
+    pass
+
+
+class ProgrammingError(Error):
+    pass
+
+
+connect_calls = 0
+connections = []
+executed = []
+execute_latency = 0.0  # seconds each execute() blocks, to mimic a slow server
+fetch_latency = 0.0  # seconds each fetchmany()/fetchall() round trip blocks
+connect_latency = 0.0  # seconds each connect() blocks
+unreachable = []  # connection string fragments whose server refuses connections
+_results = []
+_lock = threading.Lock()
+
+
+def reset():
+    """Forget all connections, executed statements and registered results."""
+    global connect_calls, execute_latency, fetch_latency, connect_latency
+    connect_calls = 0
+    execute_latency = 0.0
+    fetch_latency = 0.0
+    connect_latency = 0.0
+    connections.clear()
+    executed.clear()
+    unreachable.clear()
+    _results.clear()
+
+
+def add_result(pattern, columns, rows, messages=()):
+    """Answer statements matching the regex ``pattern`` with ``rows``.
+
+    ``columns`` is a list of names or ``(name, type)`` pairs. ``rows`` may be
+    a callable taking the bound parameters and returning the rows.
+    ``messages`` are informational messages (PRINT, STATISTICS output).
+    """
+    add_result_sets(pattern, [(columns, rows, messages)])
+
+
+def add_synthetic_result(pattern, row_count, column_count=4, width=16):
+    """Answer ``pattern`` with ``row_count`` generated rows.
+
+    Each row is an integer ``id`` followed by ``column_count - 1`` string
+    columns of ``width`` characters, so result size can be dialled up
+    without writing fixtures.
+    """
+    columns = [("id", int)] + [(f"col{i}", str) for i in range(1, column_count)]
+    text = "x" * width
+    rows = [(i, *([text] * (column_count - 1))) for i in range(row_count)]
+    add_result_sets(pattern, [(columns, rows)])
+
+
+def add_result_sets(pattern, result_sets):
+    """Answer statements matching ``pattern`` with several result sets.
+
+    Each entry is ``(columns, rows)`` or ``(columns, rows, messages)``, read
+    in turn through ``nextset()``; ``columns`` of None is a rowcount-only set
+    whose ``rows`` is the row count.
+    """
+    sets = []
+    for entry in result_sets:
+        columns, rows, messages = (tuple(entry) + ((),))[:3]
+        if columns is not None:
+            columns = [c if isinstance(c, tuple) else (c, str) for c in columns]
+        if columns is not None and not callable(rows):
+            rows = [tuple(r) for r in rows]
+        sets.append((columns, rows, list(messages)))
+    _results.insert(0, (re.compile(pattern, re.IGNORECASE | re.DOTALL), sets))
+
+
+def add_catalog(tables, modified="2024-01-01 00:00:00"):
+    """Answer the server's catalog queries for ``tables``.
+
+    ``tables`` maps ``schema.name`` to a dict with ``columns`` (names, or
+    ``(name, type_name)`` pairs; the default type is int), optional ``key``
+    columns and optional ``rows`` (row-count estimate).
+    """
+    ids = {name: i for i, name in enumerate(tables, start=1)}
+    add_result(r"SELECT COUNT\(\*\), MAX\(modify_date\) FROM sys\.tables", ["count", "modified"],
+               [(len(tables), modified)])
+    add_result(r"FROM sys\.tables t\s+JOIN sys\.schemas", ["schema", "name", "object_id", "rows"],
+               [(*name.split("."), ids[name], spec.get("rows", 0)) for name, spec in tables.items()])
+    add_result(r"FROM sys\.columns c\s+JOIN sys\.tables", ["object_id", "name", "type", "max_length",
+                                                           "precision", "scale", "is_nullable"],
+               [(ids[name], *((column, "int") if isinstance(column, str) else column), 4, 10, 0, True)
+                for name, spec in tables.items() for column in spec["columns"]])
+    add_result(r"WITH k AS", ["object_id", "name"],
+               [(ids[name], column) for name, spec in tables.items() for column in spec.get("key", [])])
+
+
+def _lookup(sql, params):
+    """Return the result sets for a statement as ``[(columns, rows, messages)]``."""
+    if re.fullmatch(r"\s*SELECT 1\s*", sql):
+        return [([("", int)], [(1,)], [])]
+    for pattern, sets in _results:
+        if pattern.search(sql):
+            return [(columns, [tuple(r) for r in rows(params)] if callable(rows) else rows, messages)
+                    for columns, rows, messages in sets]
+    return [(None, 0, [])]
+
+
+def connect(connection_string, **kwargs):
+    global connect_calls
+    if any(fragment in connection_string for fragment in unreachable):
+        raise OperationalError("08001", "[08001] TCP Provider: No connection could be made (10061)")
+    if connect_latency:
+        time.sleep(connect_latency)
+    conn = Connection(connection_string, **kwargs)
+    with _lock:
+        connect_calls += 1
+        connections.append(conn)
+    return conn
+
+
+class Connection:
+    def __init__(self, connection_string, autocommit=False, timeout=0, **kwargs):
+        self.connection_string = connection_string
+        self.autocommit = autocommit
+        self.timeout = timeout
+        self.closed = False
+        self.commits = 0
+        self.rollbacks = 0
+        self.cursors_opened = 0
+        # Session state the pool must not hand on: the current database and SET ROWCOUNT
+        match = re.search(r"Database=([^;]*)", connection_string)
+        self.database = match.group(1) if match else None
+        self.row_limit = 0
+
+    def _check_open(self):
+        if self.closed:
+            raise ProgrammingError("Attempt to use a closed connection.")
+
+    def cursor(self):
+        self._check_open()
+        self.cursors_opened += 1
+        return Cursor(self)
+
+    def commit(self):
+        self._check_open()
+        self.commits += 1
+
+    def rollback(self):
+        self._check_open()
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None and not self.autocommit:
+            self.commit()
+
+
+class Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.timeout = connection.timeout  # fixed at creation, like pyodbc
+        self.description = None
+        self.rowcount = -1
+        self.fast_executemany = False
+        self.closed = False
+        self.messages = []
+        self._rows = []
+        self._pos = 0
+        self._sets = []
+        self._cancelled = threading.Event()
+
+    def _check_open(self):
+        self.connection._check_open()
+        if self.closed:
+            raise ProgrammingError("Attempt to use a closed cursor.")
+
+    def _wait(self):
+        """Block for ``execute_latency``, honouring the query timeout and cancel()."""
+        self._cancelled.clear()
+        if self.timeout and self.timeout < execute_latency:
+            if not self._cancelled.wait(self.timeout):
+                raise OperationalError("HYT00", "[HYT00] Query timeout expired (0) (SQLExecDirectW)")
+        elif not self._cancelled.wait(execute_latency):
+            return
+        raise OperationalError("HY008", "[HY008] Operation canceled (0) (SQLExecDirectW)")
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def execute(self, sql, *params):
+        self._check_open()
+        executed.append((sql, params))
+        if execute_latency:
+            self._wait()
+        for match in re.finditer(r"\bUSE\s+\[?(\w+)|\bSET\s+ROWCOUNT\s+(\d+)", sql, re.IGNORECASE):
+            if match.group(1):
+                self.connection.database = match.group(1)
+            else:
+                self.connection.row_limit = int(match.group(2))
+        self._sets = _lookup(sql, params)
+        self.nextset()
+        return self
+
+    def _load(self, columns, rows, messages):
+        if columns is None:
+            self.description = None
+            self.rowcount = rows if isinstance(rows, int) else 0
+            self._rows = []
+        else:
+            self.description = [(name, type_code, None, None, None, None, True) for name, type_code in columns]
+            self.rowcount = -1
+            self._rows = rows
+        self.messages = [("[01000] (0)", f"[Microsoft][ODBC Driver 18 for SQL Server][SQL Server]{m}")
+                         for m in messages]
+        self._pos = 0
+
+    def executemany(self, sql, seq_of_params):
+        """One round trip per call, like fast_executemany's array binding."""
+        self._check_open()
+        seq_of_params = [tuple(p) for p in seq_of_params]
+        executed.append((sql, seq_of_params))
+        if execute_latency:
+            time.sleep(execute_latency)
+        self.description = None
+        self.rowcount = len(seq_of_params)
+        self._rows = []
+        self._pos = 0
+
+    def fetchone(self):
+        if self._pos >= len(self._rows):
+            return None
+        row = self._rows[self._pos]
+        self._pos += 1
+        return row
+
+    def fetchmany(self, size=1):
+        if fetch_latency:
+            time.sleep(fetch_latency)
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def fetchall(self):
+        if fetch_latency:
+            time.sleep(fetch_latency)
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return rows
+
+    def nextset(self):
+        if not self._sets:
+            self.description = None
+            self.messages = []
+            self._rows = []
+            return False
+        self._load(*self._sets.pop(0))
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,106 @@
+import re
+
+import pytest
+from mssql_mcp_server.result_cache import is_cacheable, is_read_only
+from mssql_mcp_server.server import call_tool, get_pool, get_streams
+
+@pytest.mark.asyncio
+async def test_cte_rows_are_returned(fake_pyodbc):
+    fake_pyodbc.add_result(r"^WITH recent", ["id"], [(1,), (2,)])
+    result = await call_tool("execute_sql", {"query": "WITH recent AS (SELECT id FROM t) SELECT id FROM recent"})
+    assert [r.text for r in result] == ["id\n1\n2"]
+
+@pytest.mark.asyncio
+async def test_procedure_result_sets_are_returned(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_POOL_HEALTH_CHECK", "no")
+    fake_pyodbc.add_result_sets(r"EXEC dbo\.report", [
+        (["region", "total"], [("north", 10), ("south", 7)]),
+        (None, 3),  # an INSERT inside the procedure
+        (["generated"], [("today",)]),
+    ])
+    result = await call_tool("execute_sql", {"query": "EXEC dbo.report"})
+    assert [r.text for r in result] == ["region,total\nnorth,10\nsouth,7", "generated\ntoday", "Rows affected: 3"]
+    assert fake_pyodbc.connections[0].commits == 1
+
+@pytest.mark.asyncio
+async def test_batch_with_dml_and_selects(fake_pyodbc):
+    fake_pyodbc.add_result_sets(r"UPDATE t", [
+        (None, 4),
+        (["n"], [(1,)]),
+        (["n"], [(2,)]),
+    ])
+    result = await call_tool("execute_sql", {"query": "UPDATE t SET x = 1; SELECT 1 AS n; SELECT 2 AS n"})
+    assert [r.text for r in result] == ["n\n1", "n\n2", "Rows affected: 4"]
+
+@pytest.mark.asyncio
+async def test_dml_only_batch_sums_row_counts(fake_pyodbc):
+    fake_pyodbc.add_result_sets(r"DELETE FROM t", [(None, 2), (None, 5)])
+    result = await call_tool("execute_sql", {"query": "DELETE FROM t WHERE id < 3; DELETE FROM u"})
+    assert result[0].text == "Query executed successfully. Rows affected: 7"
+
+@pytest.mark.asyncio
+async def test_continuation_spans_result_sets(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_FETCH_BATCH_SIZE", "2")
+    fake_pyodbc.add_result_sets(r"FROM a", [
+        (["a"], [(i,) for i in range(5)]),
+        (["b"], [(i,) for i in range(3)]),
+    ])
+    result = await call_tool("execute_sql", {"query": "SELECT a FROM a; SELECT b FROM b", "max_rows": 4})
+    assert [r.text for r in result[:-1]] == ["a\n0\n1\n2\n3"]
+    token = re.search(r'continuation_token="([^"]+)"', result[-1].text).group(1)
+
+    result = await call_tool("execute_sql", {"continuation_token": token, "max_rows": 4})
+    assert [r.text for r in result] == ["a\n4", "b\n0\n1\n2"]
+    assert len(get_streams()) == 0
+    assert get_pool().stats()["in_use"] == 0
+
+def test_read_only_detection():
+    assert is_read_only("WITH x AS (SELECT 1 AS n) SELECT n FROM x")
+    assert not is_read_only("WITH x AS (SELECT id FROM t) DELETE FROM t WHERE id IN (SELECT id FROM x)")
+    assert not is_read_only("SELECT 1; DROP TABLE t")
+    assert is_read_only("SELECT GETDATE()") and not is_cacheable("SELECT GETDATE()")
+
+@pytest.mark.asyncio
+async def test_streamed_dml_reports_uncommitted_and_rolled_back(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_POOL_HEALTH_CHECK", "no")
+    monkeypatch.setenv("MSSQL_FETCH_BATCH_SIZE", "2")
+    fake_pyodbc.add_result_sets(r"UPDATE t", [(None, 4), (["n"], [(i,) for i in range(5)])])
+    query = "UPDATE t SET x = 1; SELECT n FROM t"
+
+    result = await call_tool("execute_sql", {"query": query, "max_rows": 2})
+    assert "not committed until its last chunk is read" in result[-1].text
+    token = re.search(r'continuation_token="([^"]+)"', result[-1].text).group(1)
+    for stream in get_streams()._streams.values():
+        stream.last_used = 0
+    result = await call_tool("execute_sql", {"continuation_token": token})
+    assert "Continuation token expired before the result was read to the end; the batch was rolled back" in result[0].text
+    assert fake_pyodbc.connections[0].commits == 0
+
+@pytest.mark.asyncio
+async def test_truncated_dml_batch_reports_rollback(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_POOL_MAX_SIZE", "1")
+    monkeypatch.setenv("MSSQL_FETCH_BATCH_SIZE", "2")
+    fake_pyodbc.add_result_sets(r"UPDATE t", [(None, 4), (["n"], [(i,) for i in range(5)])])
+    result = await call_tool("execute_sql", {"query": "UPDATE t SET x = 1; SELECT n FROM t", "max_rows": 2})
+    assert result[-1].text == "Result truncated after 2 rows. The batch was not read to the end, so its changes were rolled back."
+
+@pytest.mark.asyncio
+async def test_write_streams_expire_sooner(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_FETCH_BATCH_SIZE", "2")
+    monkeypatch.setenv("MSSQL_WRITE_STREAM_TTL", "10")
+    fake_pyodbc.add_result_sets(r"UPDATE t", [(None, 4), (["n"], [(i,) for i in range(5)])])
+    fake_pyodbc.add_result(r"FROM u", ["n"], [(i,) for i in range(5)])
+
+    write = await call_tool("execute_sql", {"query": "UPDATE t SET x = 1; SELECT n FROM t", "max_rows": 2})
+    assert "rolled back if the token is unused for 10 seconds" in write[-1].text
+    read = await call_tool("execute_sql", {"query": "SELECT n FROM u", "max_rows": 2})
+    streams = get_streams()
+    for stream in streams._streams.values():
+        stream.last_used -= 60
+    assert len(streams) == 2
+    with pytest.raises(ValueError, match="rolled back"):
+        streams.take(re.search(r'continuation_token="([^"]+)"', write[-1].text).group(1))
+    token = re.search(r'continuation_token="([^"]+)"', read[-1].text).group(1)
+    stream = streams.take(token)
+    assert stream.read_only
+    stream.close()
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+from mssql_mcp_server.bulk import parse_rows
+from mssql_mcp_server.server import call_tool
+
+def test_parse_rows_from_json_and_csv():
+    columns = ["id", "name"]
+    assert parse_rows([[1, "a"], {"name": "b", "id": 2}], columns) == [(1, "a"), (2, "b")]
+    assert parse_rows('1,a\n2,"b, c"\n3,\n', columns) == [("1", "a"), ("2", "b, c"), ("3", None)]
+
+def test_parse_rows_rejects_wrong_width():
+    with pytest.raises(ValueError, match="Row 2 has 1 values"):
+        parse_rows([[1, "a"], [2]], ["id", "name"])
+
+@pytest.mark.asyncio
+async def test_bulk_insert_batches_in_one_transaction(fake_pyodbc):
+    rows = [[i, f"name-{i}"] for i in range(2500)]
+    result = await call_tool("bulk_insert", {
+        "table": "dbo.people", "columns": ["id", "name"], "rows": rows, "batch_size": 1000,
+    })
+    assert result[0].text.startswith("Inserted 2500 rows into dbo.people in 3 batches")
+    inserts = [(sql, params) for sql, params in fake_pyodbc.executed if sql.startswith("INSERT")]
+    assert inserts[0][0] == "INSERT INTO [dbo].[people] ([id], [name]) VALUES (?, ?)"
+    assert [len(params) for _, params in inserts] == [1000, 1000, 500]
+    conn = fake_pyodbc.connections[0]
+    assert conn.commits == 1
+
+@pytest.mark.asyncio
+async def test_bulk_insert_faster_than_row_by_row(fake_pyodbc):
+    """Batched inserts pay one round trip per batch instead of per row."""
+    fake_pyodbc.execute_latency = 0.002
+    rows = [[i, f"name-{i}"] for i in range(200)]
+
+    started = time.perf_counter()
+    for i, name in rows:
+        await call_tool("execute_sql", {"query": f"INSERT INTO people (id, name) VALUES ({i}, '{name}')"})
+    row_by_row = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await call_tool("bulk_insert", {"table": "people", "columns": ["id", "name"], "rows": rows, "batch_size": 100})
+    bulk = time.perf_counter() - started
+
+    assert bulk * 10 < row_by_row
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+import pytest
+from mssql_mcp_server.cancellation import QueryCancelledError, QueryHandle, QueryTimeoutError
+from mssql_mcp_server.server import call_tool, get_pool, get_query_timeout
+
+def test_handle_translates_driver_errors(fake_pyodbc):
+    handle = QueryHandle(timeout=5)
+    timeout = fake_pyodbc.OperationalError("HYT00", "[HYT00] Query timeout expired")
+    assert isinstance(handle.translate(timeout), QueryTimeoutError)
+    cancelled = fake_pyodbc.OperationalError("HY008", "[HY008] Operation canceled")
+    assert isinstance(handle.translate(cancelled), QueryCancelledError)
+    other = fake_pyodbc.ProgrammingError("42S02", "Invalid object name")
+    assert handle.translate(other) is other
+
+def test_cancel_before_attach_refuses_to_run(fake_pyodbc):
+    handle = QueryHandle(timeout=1)
+    handle.cancel(timed_out=True)
+    with pytest.raises(QueryTimeoutError):
+        handle.attach(fake_pyodbc.connect("DSN=fake").cursor())
+
+def test_query_timeout_config(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_QUERY_TIMEOUT", "30")
+    assert get_query_timeout() == 30
+    assert get_query_timeout({"timeout_seconds": 2.5}) == 2.5
+    with pytest.raises(ValueError):
+        get_query_timeout({"timeout_seconds": -1})
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_query_and_frees_connection(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_POOL_MAX_SIZE", "1")
+    monkeypatch.setenv("MSSQL_POOL_HEALTH_CHECK", "no")
+    fake_pyodbc.add_result(r"FROM slow", ["n"], [(1,)])
+    fake_pyodbc.execute_latency = 5
+
+    started = time.perf_counter()
+    result = await call_tool("execute_sql", {"query": "SELECT n FROM slow", "timeout_seconds": 0.2})
+    assert time.perf_counter() - started < 2
+    assert result[0].text.startswith("Query timeout: Query timed out after 0.2 seconds")
+
+    # The only pooled connection is back, with its timeout reset
+    fake_pyodbc.execute_latency = 0
+    result = await call_tool("execute_sql", {"query": "SELECT n FROM slow"})
+    assert result[0].text == "n\n1"
+    assert fake_pyodbc.connections[0].timeout == 0
+
+@pytest.mark.asyncio
+async def test_driver_timeout_is_reported(fake_pyodbc, monkeypatch):
+    """A timeout raised by the driver itself maps to the same error."""
+    monkeypatch.setenv("MSSQL_POOL_HEALTH_CHECK", "no")
+    fake_pyodbc.add_result(r"FROM slow", ["n"], [(1,)])
+    fake_pyodbc.execute_latency = 1.5
+    result = await call_tool("execute_sql", {"query": "SELECT n FROM slow", "timeout_seconds": 1})
+    assert result[0].text.startswith("Query timeout:")
+
+@pytest.mark.asyncio
+async def test_cancelled_request_cancels_server_statement(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_POOL_MAX_SIZE", "1")
+    monkeypatch.setenv("MSSQL_POOL_HEALTH_CHECK", "no")
+    fake_pyodbc.add_result(r"FROM slow", ["n"], [(1,)])
+    fake_pyodbc.execute_latency = 5
+
+    task = asyncio.create_task(call_tool("execute_sql", {"query": "SELECT n FROM slow"}))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # The worker thread gets the cancel promptly and returns the connection
+    started = time.perf_counter()
+    with get_pool().connection(timeout=2):
+        pass
+    assert time.perf_counter() - started < 1
+
+def test_statement_cache_keys_on_timeout(fake_pyodbc):
+    pool = get_pool()
+    with pool.connection() as conn:
+        cache = pool.statements(conn)
+        short, _ = cache.cursor("SELECT ?", 5)
+        long, _ = cache.cursor("SELECT ?", 60)
+        assert short is not long
+        assert (short.timeout, long.timeout) == (5, 60)
+        assert cache.cursor("SELECT ?", 5) == (short, True)
@@ -0,0 +1,45 @@
+import asyncio
+import time
+
+import pytest
+from mssql_mcp_server.server import call_tool, get_executor, get_pool, list_tools
+
+@pytest.mark.asyncio
+async def test_executor_sized_to_pool(fake_pyodbc, monkeypatch):
+    """The DB executor has one worker per pooled connection by default."""
+    monkeypatch.setenv("MSSQL_POOL_MAX_SIZE", "6")
+    assert get_executor()._max_workers == get_pool().max_size == 6
+
+@pytest.mark.asyncio
+async def test_slow_query_does_not_block_event_loop(fake_pyodbc):
+    """list_tools answers while a slow query is running."""
+    fake_pyodbc.execute_latency = 0.3
+    query = asyncio.create_task(call_tool("execute_sql", {"query": "SELECT 1"}))
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    await list_tools()
+    assert time.perf_counter() - started < 0.1
+    assert not query.done()
+    await query
+
+@pytest.mark.asyncio
+async def test_concurrent_slow_queries_run_in_parallel(fake_pyodbc, monkeypatch):
+    """N concurrent slow queries finish in about the time of one."""
+    monkeypatch.setenv("MSSQL_POOL_MAX_SIZE", "4")
+    # Health-check probes would pay the simulated latency too
+    monkeypatch.setenv("MSSQL_POOL_HEALTH_CHECK", "no")
+    fake_pyodbc.execute_latency = 0.2
+    fake_pyodbc.add_result(r"FROM slow", ["n"], [(1,)])
+
+    started = time.perf_counter()
+    await call_tool("execute_sql", {"query": "SELECT n FROM slow"})
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        call_tool("execute_sql", {"query": "SELECT n FROM slow"}) for _ in range(4)
+    ])
+    concurrent = time.perf_counter() - started
+
+    assert all(r[0].text == "n\n1" for r in results)
+    assert concurrent < single * 2
@@ -0,0 +1,101 @@
+import json
+import time
+
+import pytest
+from mssql_mcp_server.profiles import ProfileRegistry, load_profiles
+from mssql_mcp_server.server import call_tool, list_tools, reload_settings
+
+@pytest.fixture
+def shards(fake_pyodbc, monkeypatch, tmp_path):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps({
+        "defaults": {"server": "sql01", "password_env": "SHARD_PASSWORD"},
+        "profiles": {
+            f"shard0{i}": {"database": f"shop_0{i}", "tags": ["shard"]} for i in range(1, 5)
+        } | {"reporting": {"server": "sql02", "database": "reports"}},
+    }))
+    monkeypatch.setenv("MSSQL_PROFILES_FILE", str(path))
+    monkeypatch.setenv("SHARD_PASSWORD", "shardpw")
+    monkeypatch.setenv("MSSQL_POOL_HEALTH_CHECK", "no")
+    fake_pyodbc.add_result(r"FROM orders", ["status", "n"], [("open", 2), ("done", 5)])
+    return path
+
+def test_load_profiles_merges_defaults_and_env(shards):
+    profiles = load_profiles(shards)
+    shard = profiles["shard01"]
+    assert shard.config["server"] == "sql01"
+    assert shard.config["user"] == "sa"  # from MSSQL_USER
+    assert shard.config["password"] == "shardpw"
+    assert "Database=shop_01;" in shard.connection_string
+    assert profiles["reporting"].config["server"] == "sql02"
+
+def test_select_by_name_and_tag(shards):
+    registry = ProfileRegistry(load_profiles(shards))
+    assert [p.name for p in registry.select(["shard"])] == ["shard01", "shard02", "shard03", "shard04"]
+    assert [p.name for p in registry.select(["reporting", "shard02"])] == ["reporting", "shard02"]
+    assert len(registry.select()) == 5
+    with pytest.raises(ValueError, match="Unknown connection profile or tag: nope"):
+        registry.select(["nope"])
+
+@pytest.mark.asyncio
+async def test_tool_listed_only_with_profiles(shards, monkeypatch):
+    assert "execute_sql_fanout" in [t.name for t in await list_tools()]
+    monkeypatch.delenv("MSSQL_PROFILES_FILE")
+    assert reload_settings()
+    assert "execute_sql_fanout" not in [t.name for t in await list_tools()]
+
+@pytest.mark.asyncio
+async def test_fanout_merges_rows_tagged_with_source(shards, fake_pyodbc):
+    result = await call_tool("execute_sql_fanout", {"query": "SELECT status, COUNT(*) FROM orders GROUP BY status",
+                                                    "targets": ["shard01", "shard02"]})
+    assert result[0].text == "source,status,n\nshard01,open,2\nshard01,done,5\nshard02,open,2\nshard02,done,5"
+    summary = result[1].text.splitlines()
+    assert summary[0].startswith("Queried 2 targets (0 failed)")
+    assert summary[1].startswith("shard01: 2 rows in ")
+    connected = sorted(c.connection_string.split("Database=")[1].split(";")[0] for c in fake_pyodbc.connections)
+    assert connected == ["shop_01", "shop_02"]
+
+@pytest.mark.asyncio
+async def test_fanout_runs_targets_in_parallel(shards, fake_pyodbc):
+    fake_pyodbc.execute_latency = 0.2
+    started = time.perf_counter()
+    await call_tool("execute_sql_fanout", {"query": "SELECT status FROM orders", "targets": ["shard"]})
+    parallel = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await call_tool("execute_sql_fanout", {"query": "SELECT status FROM orders", "targets": ["shard"],
+                                           "max_concurrency": 1})
+    serial = time.perf_counter() - started
+    assert parallel < 0.5 < serial
+
+@pytest.mark.asyncio
+async def test_fanout_concurrency_setting_caps_requests(shards, fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_FANOUT_CONCURRENCY", "1")
+    fake_pyodbc.execute_latency = 0.2
+    started = time.perf_counter()
+    await call_tool("execute_sql_fanout", {"query": "SELECT status FROM orders", "targets": ["shard"],
+                                           "max_concurrency": 10})
+    assert time.perf_counter() - started > 0.7
+
+@pytest.mark.asyncio
+async def test_failed_target_is_reported_not_fatal(shards, fake_pyodbc):
+    fake_pyodbc.unreachable.append("Server=sql02")
+    result = await call_tool("execute_sql_fanout", {"query": "SELECT status, n FROM orders",
+                                                    "targets": ["shard01", "reporting"], "output_format": "json"})
+    merged = json.loads(result[0].text)
+    assert merged["columns"] == ["source", "status", "n"]
+    assert {row[0] for row in merged["rows"]} == {"shard01"}
+    assert "reporting: error after" in result[1].text
+    assert "Queried 2 targets (1 failed)" in result[1].text
+
+@pytest.mark.asyncio
+async def test_rows_are_split_between_targets(shards):
+    result = await call_tool("execute_sql_fanout", {"query": "SELECT status FROM orders", "targets": ["shard"],
+                                                    "max_rows": 4})
+    assert len(result[0].text.splitlines()) == 5
+    assert "shard01: 1 rows (truncated)" in result[1].text
+
+@pytest.mark.asyncio
+async def test_fanout_rejects_writes(shards):
+    with pytest.raises(ValueError, match="read-only"):
+        await call_tool("execute_sql_fanout", {"query": "DELETE FROM orders"})
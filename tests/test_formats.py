@@ -0,0 +1,166 @@
+import base64
+import datetime
+import decimal
+import json
+import os
+import re
+
+import pytest
+from mssql_mcp_server.formats import CsvEncoder, cleanup_spool, encode_rows
+from mssql_mcp_server.server import call_tool, read_resource
+from pydantic import AnyUrl
+
+COLUMNS = [("id", int), ("price", decimal.Decimal), ("note", str), ("created", datetime.datetime)]
+ROWS = [
+    (1, decimal.Decimal("9.99"), "plain", datetime.datetime(2024, 1, 2, 3, 4, 5)),
+    (2, None, "has, comma", datetime.datetime(2024, 2, 3, 4, 5, 6)),
+]
+
+@pytest.fixture
+def products(fake_pyodbc, monkeypatch, tmp_path):
+    monkeypatch.setenv("MSSQL_SPOOL_DIR", str(tmp_path))
+    fake_pyodbc.add_result(r"FROM \[?products", COLUMNS, ROWS)
+    return fake_pyodbc
+
+def describe(columns):
+    return [(name, type_code, None, None, None, None, True) for name, type_code in columns]
+
+@pytest.mark.asyncio
+async def test_csv_output_is_typed_and_quoted(products):
+    result = await call_tool("execute_sql", {"query": "SELECT * FROM products"})
+    assert result[0].text == ("id,price,note,created\n"
+                              "1,9.99,plain,2024-01-02 03:04:05\n"
+                              '2,,"has, comma",2024-02-03 04:05:06')
+
+def test_csv_encoder_values():
+    encoder = CsvEncoder(describe([("flag", bool), ("amount", decimal.Decimal), ("data", bytes),
+                                   ("day", datetime.date), ("text", str)]))
+    rows = [
+        (True, decimal.Decimal("1E+2"), b"\x01\xff", datetime.date(2024, 5, 6), 'say "hi"\nbye'),
+        (False, None, bytearray(b""), None, ""),
+        (False, decimal.Decimal("1E-7"), b"a", datetime.date(2024, 1, 1), "\u00e9t\u00e9"),
+    ]
+    assert encode_rows(encoder, rows).split("\n", 1)[1] == (
+        '1,100,0x01ff,2024-05-06,"say ""hi""\nbye"\n'
+        '0,,0x,,""\n'
+        "0,0.0000001,0x61,2024-01-01,\u00e9t\u00e9"
+    )
+
+def test_csv_encoder_sizes_match_output():
+    encoder = CsvEncoder(describe([("name, quoted", str), ("n", int)]))
+    size = encoder.begin()
+    for row in [("\u00e9", 1), ("a,b", None), ("plain", 3)]:
+        piece, piece_size = encoder.encode(row)
+        encoder.append(piece)
+        size += piece_size
+    text = encoder.finish()
+    assert text.startswith('"name, quoted",n\n')
+    assert size == len(text.encode("utf-8"))
+
+def test_csv_encoder_batch_sizes_match_output():
+    encoder = CsvEncoder(describe([("name", str), ("n", int)]))
+    size = encoder.begin()
+    lines, sizes = encoder.encode_batch([("\u00e9", 1), ("a,b", None), ("plain", 3)])
+    encoder.append_batch(lines)
+    text = encoder.finish()
+    assert text == 'name,n\n\u00e9,1\n"a,b",\nplain,3'
+    assert size + sum(sizes) == len(text.encode("utf-8"))
+    # The buffer is reused for the next chunk
+    encoder.begin()
+    encoder.append_batch(encoder.encode_batch([("x", 4)])[0])
+    assert encoder.finish() == "name,n\nx,4"
+
+def test_csv_encoder_tolerates_values_not_matching_type_codes():
+    encoder = CsvEncoder(describe([("amount", decimal.Decimal), ("flag", bool)]))
+    assert encoder.encode(("n/a", 2))[0] == "n/a,2"
+
+@pytest.mark.asyncio
+async def test_json_output_keeps_types(products):
+    result = await call_tool("execute_sql", {"query": "SELECT * FROM products", "output_format": "json"})
+    data = json.loads(result[0].text)
+    assert data["columns"] == ["id", "price", "note", "created"]
+    assert data["rows"][1] == [2, None, "has, comma", "2024-02-03T04:05:06"]
+    assert data["rows"][0][1] == "9.99"
+
+@pytest.mark.asyncio
+async def test_json_chunks_are_valid_documents(products):
+    result = await call_tool("execute_sql", {"query": "SELECT * FROM products", "output_format": "json", "max_rows": 1})
+    assert json.loads(result[0].text)["rows"] == [[1, "9.99", "plain", "2024-01-02T03:04:05"]]
+    assert "continuation_token" in result[1].text
+
+@pytest.mark.asyncio
+async def test_unknown_format_rejected(products):
+    with pytest.raises(ValueError, match="Unknown output format"):
+        await call_tool("execute_sql", {"query": "SELECT * FROM products", "output_format": "xml"})
+
+@pytest.mark.asyncio
+async def test_json_table_resource_links_next_page(products):
+    products.add_catalog({"dbo.products": {"columns": ["id"], "key": ["id"]}})
+    text = await read_resource(AnyUrl("mssql://products/data?limit=2&format=json"))
+    data = json.loads(text)
+    assert len(data["rows"]) == 2
+    assert data["next"].startswith("mssql://products/data?after=")
+    assert data["next"].endswith("&limit=2&format=json")
+
+@pytest.mark.asyncio
+async def test_arrow_inline_round_trips(products):
+    pa = pytest.importorskip("pyarrow")
+    result = await call_tool("execute_sql", {"query": "SELECT * FROM products", "output_format": "arrow"})
+    table = pa.ipc.open_stream(base64.b64decode(result[0].text)).read_all()
+    assert table.column_names == ["id", "price", "note", "created"]
+    assert table.schema.field("id").type == pa.int64()
+    assert table.schema.field("created").type == pa.timestamp("us")
+    assert table.column("note").to_pylist() == ["plain", "has, comma"]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", ["arrow_file", "parquet"])
+async def test_spooled_formats_written_in_batches(products, monkeypatch, tmp_path, fmt):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    monkeypatch.setenv("MSSQL_FETCH_BATCH_SIZE", "100")
+    products.add_result(r"FROM big", [("n", int)], [(i,) for i in range(1050)])
+
+    result = await call_tool("execute_sql", {"query": "SELECT n FROM big", "output_format": fmt})
+    path = re.search(r" to (\S+)$", result[0].text).group(1)
+    assert result[0].text.startswith("Wrote 1050 rows")
+    assert path.startswith(str(tmp_path / "results"))
+    if fmt == "parquet":
+        table = pq.read_table(path)
+    else:
+        with pa.ipc.open_stream(path) as reader:
+            batches = list(reader)
+        assert max(b.num_rows for b in batches) == 100
+        table = pa.Table.from_batches(batches)
+    assert table.column("n").to_pylist() == list(range(1050))
+
+@pytest.mark.asyncio
+async def test_parquet_row_groups_are_bounded_in_bytes(products, monkeypatch):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    monkeypatch.setenv("MSSQL_FETCH_BATCH_SIZE", "100")
+    # Two 100-row batches of int64
+    monkeypatch.setenv("MSSQL_PARQUET_ROW_GROUP_BYTES", "1600")
+    products.add_result(r"FROM big", [("n", int)], [(i,) for i in range(1050)])
+
+    result = await call_tool("execute_sql", {"query": "SELECT n FROM big", "output_format": "parquet"})
+    path = re.search(r" to (\S+)$", result[0].text).group(1)
+    metadata = pq.ParquetFile(path).metadata
+    assert [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)] == [200] * 5 + [50]
+
+def test_cleanup_spool_only_removes_spooled_results(tmp_path):
+    results = tmp_path / "results"
+    results.mkdir()
+    (tmp_path / "jobs").mkdir()
+    stale = results / ("a" * 32 + ".parquet")
+    fresh = results / ("b" * 32 + ".arrows")
+    foreign = [tmp_path / "notes.txt", results / "keep.parquet", tmp_path / "jobs" / "job.jsonl",
+               tmp_path / ("c" * 32 + ".parquet")]
+    for path in [stale, fresh, *foreign]:
+        path.write_text("x")
+    for path in [stale, *foreign]:
+        os.utime(path, (0, 0))
+
+    cleanup_spool(str(tmp_path), ttl=60)
+    assert not stale.exists()
+    assert fresh.exists()
+    assert all(path.exists() for path in foreign)
@@ -0,0 +1,149 @@
+import asyncio
+import decimal
+import json
+import os
+import re
+import time
+
+import pytest
+from mssql_mcp_server.server import (
+    call_tool, close_db, get_jobs, get_pool, get_result_cache, reload_settings,
+)
+
+ROWS = [(i, f"name-{i}", decimal.Decimal(i) / 4) for i in range(2500)]
+
+@pytest.fixture
+def jobs_env(fake_pyodbc, monkeypatch, tmp_path):
+    monkeypatch.setenv("MSSQL_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setenv("MSSQL_FETCH_BATCH_SIZE", "100")
+    fake_pyodbc.add_result(r"FROM big", [("id", int), ("name", str), ("price", decimal.Decimal)], ROWS)
+    return fake_pyodbc
+
+async def submit(arguments):
+    result = await call_tool("submit_query", arguments)
+    return re.search(r"Submitted job (\w+)", result[0].text).group(1)
+
+async def wait_for(job_id, *states):
+    job = get_jobs().get(job_id)
+    for _ in range(500):
+        if job.state in states:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job stayed {job.state}")
+
+@pytest.mark.asyncio
+async def test_job_results_are_spilled_and_paged(jobs_env, tmp_path):
+    job_id = await submit({"query": "SELECT id, name, price FROM big"})
+    job = await wait_for(job_id, "done")
+    assert job.rows == len(ROWS)
+    assert os.path.dirname(job.path) == str(tmp_path / "jobs")
+    assert "2500 rows" in (await call_tool("job_status", {"job_id": job_id}))[0].text
+    assert get_pool().stats()["in_use"] == 0
+
+    seen, offset = [], 0
+    while True:
+        result = await call_tool("fetch_job_results", {"job_id": job_id, "offset": offset, "max_rows": 700})
+        lines = result[0].text.split("\n")
+        assert lines[0] == "id,name,price"
+        seen.extend(lines[1:])
+        if len(result) == 1:
+            break
+        offset = int(re.search(r"offset=(\d+)", result[1].text).group(1))
+    assert seen == [f"{i},{name},{price}" for i, name, price in ROWS]
+
+@pytest.mark.asyncio
+async def test_fetch_seeks_past_the_row_index(jobs_env):
+    job_id = await submit({"query": "SELECT id, name, price FROM big"})
+    await wait_for(job_id, "done")
+    result = await call_tool("fetch_job_results", {"job_id": job_id, "offset": 2123, "max_rows": 2,
+                                                   "output_format": "json"})
+    payload = json.loads(result[0].text)
+    assert payload["rows"] == [[2123, "name-2123", "530.75"], [2124, "name-2124", "531"]]
+    assert "offset=2125" in result[1].text
+
+@pytest.mark.asyncio
+async def test_statement_without_rows_reports_rowcount(jobs_env):
+    jobs_env.add_result_sets(r"UPDATE big", [(None, 7)])
+    job_id = await submit({"query": "UPDATE big SET name = 'x'"})
+    job = await wait_for(job_id, "done")
+    assert "Rows affected: 7" in job.describe()
+    with pytest.raises(ValueError, match="returned no rows"):
+        await call_tool("fetch_job_results", {"job_id": job_id})
+
+@pytest.mark.asyncio
+async def test_failed_job_keeps_error(jobs_env):
+    def fail(params):
+        raise jobs_env.ProgrammingError("42S02", "Invalid object name 'missing'")
+    jobs_env.add_result(r"FROM missing", ["id"], fail)
+    job_id = await submit({"query": "SELECT id FROM missing"})
+    job = await wait_for(job_id, "failed")
+    assert "Invalid object name" in job.error
+    assert not os.path.exists(job.path)
+
+@pytest.mark.asyncio
+async def test_queue_cap_and_cancel(jobs_env, monkeypatch):
+    monkeypatch.setenv("MSSQL_JOB_WORKERS", "1")
+    monkeypatch.setenv("MSSQL_JOB_QUEUE", "1")
+    close_db()
+    jobs_env.execute_latency = 5
+    running = await submit({"query": "SELECT id, name, price FROM big"})
+    await wait_for(running, "running")
+    queued = await submit({"query": "SELECT id, name, price FROM big"})
+    with pytest.raises(ValueError, match="Too many queued jobs"):
+        await submit({"query": "SELECT id, name, price FROM big"})
+
+    await call_tool("cancel_job", {"job_id": queued})
+    assert get_jobs().get(queued).state == "cancelled"
+    started = time.monotonic()
+    await call_tool("cancel_job", {"job_id": running})
+    await wait_for(running, "cancelled")
+    assert time.monotonic() - started < 2
+    result = await call_tool("cancel_job", {"job_id": running})
+    assert "already finished" in result[0].text
+
+@pytest.mark.asyncio
+async def test_job_timeout_fails_the_job(jobs_env):
+    jobs_env.execute_latency = 5
+    job_id = await submit({"query": "SELECT id, name, price FROM big", "timeout_seconds": 1})
+    job = await wait_for(job_id, "failed", "done")
+    assert job.state == "failed"
+    assert "timed out" in job.error
+
+@pytest.mark.asyncio
+async def test_finished_jobs_expire(jobs_env, monkeypatch):
+    monkeypatch.setenv("MSSQL_JOB_TTL", "0")
+    close_db()
+    job_id = await submit({"query": "SELECT id, name, price FROM big"})
+    job = await wait_for(job_id, "done")
+    assert os.path.exists(job.path)
+    await asyncio.sleep(0.01)
+    assert (await call_tool("job_status", {}))[0].text == "No jobs."
+    assert not os.path.exists(job.path)
+    with pytest.raises(ValueError, match="Unknown or expired job"):
+        await call_tool("fetch_job_results", {"job_id": job_id})
+
+@pytest.mark.asyncio
+async def test_jobs_survive_a_settings_reload(jobs_env, monkeypatch):
+    jobs_env.execute_latency = 0.3
+    manager = get_jobs()
+    job_id = await submit({"query": "SELECT id, name, price FROM big"})
+    await wait_for(job_id, "running")
+    monkeypatch.setenv("MSSQL_FETCH_BATCH_SIZE", "50")
+    assert reload_settings()
+    assert get_jobs() is manager
+    job = await wait_for(job_id, "done", "failed", "cancelled")
+    assert job.state == "done"
+    result = await call_tool("fetch_job_results", {"job_id": job_id, "max_rows": 1})
+    assert result[0].text == "id,name,price\n0,name-0,0"
+
+@pytest.mark.asyncio
+async def test_result_cache_is_cleared_when_a_write_job_finishes(jobs_env, monkeypatch):
+    monkeypatch.setenv("MSSQL_RESULT_CACHE", "yes")
+    jobs_env.add_result_sets(r"UPDATE big", [(None, 7)])
+    jobs_env.execute_latency = 0.3
+    job_id = await submit({"query": "UPDATE big SET name = 'x'"})
+    # Read while the job runs; the update hasn't landed yet
+    get_result_cache().put("SELECT name FROM big", "name\nname-0", 12)
+    assert get_result_cache().get("SELECT name FROM big") is not None
+    await wait_for(job_id, "done")
+    assert get_result_cache().get("SELECT name FROM big") is None
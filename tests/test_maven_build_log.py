@@ -0,0 +1,72 @@
+from maven_startup_mcp_server.build_log import BuildLog
+
+OUTPUT = """\
+[INFO] Scanning for projects...
+[INFO] ------------------------------------------------------------------------
+[INFO] Reactor Build Order:
+[INFO] 
+[INFO] -----------------------< com.example:app >------------------------
+[INFO] \x1b[1mBuilding app 1.0-SNAPSHOT\x1b[m                                       [1/2]
+[INFO]   from pom.xml
+[INFO] --------------------------------[ jar ]---------------------------------
+[INFO] 
+[INFO] --- resources:3.3.1:resources (default-resources) @ app ---
+[INFO] --- compiler:3.11.0:compile (default-compile) @ app ---
+[INFO] --- maven-surefire-plugin:3.2.2:test (default-test) @ app ---
+[INFO] -------------------------------------------------------
+[INFO]  T E S T S
+[INFO] -------------------------------------------------------
+[INFO] Running com.example.app.AppTest
+[INFO] Tests run: 3, Failures: 0, Errors: 0, Skipped: 1, Time elapsed: 0.05 s - in com.example.app.AppTest
+[ERROR] Tests run: 2, Failures: 1, Errors: 0, Skipped: 0, Time elapsed: 0.02 s <<< FAILURE! - in com.example.app.OtherTest
+[ERROR] com.example.app.OtherTest.adds -- Time elapsed: 0.01 s <<< FAILURE!
+[INFO] 
+[INFO] Results:
+[ERROR] Tests run: 5, Failures: 1, Errors: 0, Skipped: 1
+[INFO] --- jar:3.3.0:jar (default-jar) @ app ---
+[INFO] Building jar: /work/target/app-1.0-SNAPSHOT.jar
+[INFO] ------------------------------------------------------------------------
+[INFO] BUILD FAILURE
+[INFO] ------------------------------------------------------------------------
+[INFO] Total time:  2.345 s
+[ERROR] Failed to execute goal org.apache.maven.plugins:maven-surefire-plugin:3.2.2:test
+"""
+
+def feed(log, text):
+    return [event for event in map(log.feed, text.splitlines(keepends=True)) if event is not None]
+
+def test_lifecycle_events_are_parsed():
+    log = BuildLog()
+    events = feed(log, OUTPUT)
+    assert [event.kind for event in events] == ["module", "goal", "goal", "goal", "tests", "tests", "goal", "result"]
+    assert events[0].message == "Building app 1.0-SNAPSHOT [1/2]"
+    assert events[0].data["total"] == 2
+    assert events[2].data["phase"] == "compile"
+    assert events[3].message == "app: test (maven-surefire-plugin:test)"
+    assert events[5].data == {"run": 2, "failures": 1, "errors": 0, "skipped": 0,
+                              "test_class": "com.example.app.OtherTest"}
+    assert events[-1].data == {"result": "FAILURE"}
+
+def test_summary_counts_each_test_class_once():
+    log = BuildLog()
+    feed(log, OUTPUT)
+    assert log.tests == {"run": 5, "failures": 1, "errors": 0, "skipped": 1}
+    summary = log.summary()
+    assert "Result: BUILD FAILURE (Maven total time 2.345 s)" in summary
+    assert "Modules: 1 of 2 (app)" in summary
+    assert "Tests: 5 run, 1 failed, 0 errors, 1 skipped" in summary
+
+def test_output_is_bounded():
+    log = BuildLog(max_lines=10, max_errors=2)
+    feed(log, OUTPUT * 100)
+    assert log.line_count == OUTPUT.count("\n") * 100
+    assert len(log.lines) == 10
+    assert log.tail(5) == [
+        "[ERROR] Tests run: 5, Failures: 1, Errors: 0, Skipped: 1",
+        "[ERROR] Failed to execute goal org.apache.maven.plugins:maven-surefire-plugin:3.2.2:test",
+    ]
+
+def test_tail_falls_back_to_output_without_errors():
+    log = BuildLog()
+    feed(log, "Error: Could not find or load main class org.apache.maven.wrapper.MavenWrapperMain\n")
+    assert log.tail(5) == ["Error: Could not find or load main class org.apache.maven.wrapper.MavenWrapperMain"]
@@ -0,0 +1,223 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+from mcp.server.lowlevel.server import request_ctx
+from mcp.shared.context import RequestContext
+from mcp.types import RequestParams
+from maven_startup_mcp_server import server
+from maven_startup_mcp_server.builds import BuildRunner, BuildTimeoutError, execute
+from maven_startup_mcp_server.toolchain import Toolchain
+
+# Starts a child process that outlives its parent unless the whole group is killed
+SPAWN_CHILD = """
+import subprocess, sys, time
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+open(sys.argv[1], "w").write(str(child.pid))
+time.sleep(60)
+"""
+
+def fake_toolchain(basedir, *command):
+    return Toolchain(basedir=str(basedir), java=sys.executable, java_source="test", java_version=None,
+                     maven=sys.executable, maven_source="test", maven_version=None,
+                     command=[sys.executable, "-c", *command])
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # A killed child that hasn't been reaped yet is a zombie
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except OSError:
+        return True
+
+async def child_pid(path):
+    while not os.path.exists(path) or not open(path).read():
+        await asyncio.sleep(0.05)
+    return int(open(path).read())
+
+@pytest.fixture
+def maven_server(monkeypatch, tmp_path):
+    monkeypatch.setenv("MAVEN_BASEDIR", str(tmp_path))
+    monkeypatch.setattr(server, "_settings", None)
+    monkeypatch.setattr(server, "_runner", None)
+    return server
+
+@pytest.mark.asyncio
+async def test_execute_collects_output(tmp_path):
+    lines = []
+    result = await execute([sys.executable, "-c", "import os, sys; print(os.getcwd()); sys.exit('[ERROR] broken')"],
+                           str(tmp_path), on_line=lines.append)
+    assert result.returncode == 1
+    assert not result.success
+    assert lines[0].strip() == os.path.realpath(tmp_path)
+    # stderr is merged into the same stream
+    assert list(result.log.errors) == ["[ERROR] broken"]
+
+@pytest.mark.skipif(sys.platform == "win32", reason="checks POSIX process groups")
+@pytest.mark.asyncio
+async def test_timeout_kills_process_tree(tmp_path):
+    pid_file = str(tmp_path / "child.pid")
+    with pytest.raises(BuildTimeoutError):
+        await execute([sys.executable, "-c", SPAWN_CHILD, pid_file], str(tmp_path), timeout=1, grace=1)
+    pid = int(open(pid_file).read())
+    for _ in range(20):
+        if not alive(pid):
+            break
+        await asyncio.sleep(0.1)
+    assert not alive(pid)
+
+@pytest.mark.skipif(sys.platform == "win32", reason="checks POSIX process groups")
+@pytest.mark.asyncio
+async def test_cancellation_kills_process_tree(tmp_path):
+    pid_file = str(tmp_path / "child.pid")
+    task = asyncio.create_task(execute([sys.executable, "-c", SPAWN_CHILD, pid_file], str(tmp_path), grace=1))
+    pid = await child_pid(pid_file)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    for _ in range(20):
+        if not alive(pid):
+            break
+        await asyncio.sleep(0.1)
+    assert not alive(pid)
+
+@pytest.mark.asyncio
+async def test_runner_serializes_per_basedir(tmp_path):
+    runner = BuildRunner(max_concurrent=4)
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    sleep = "import time; time.sleep(0.5)"
+
+    started = time.perf_counter()
+    await asyncio.gather(runner.run(fake_toolchain(tmp_path / "a", sleep), []),
+                         runner.run(fake_toolchain(tmp_path / "b", sleep), []))
+    concurrent = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await asyncio.gather(runner.run(fake_toolchain(tmp_path / "a", sleep), []),
+                         runner.run(fake_toolchain(tmp_path / "a", sleep), []))
+    serial = time.perf_counter() - started
+
+    assert concurrent < 0.9
+    assert serial >= 1.0
+    assert runner.stats()["succeeded"] == 4
+    assert runner.stats()["running"] == 0
+
+@pytest.mark.asyncio
+async def test_server_answers_while_a_build_runs(maven_server, monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "get_toolchain",
+                        lambda basedir=None: fake_toolchain(basedir or tmp_path, "import time; time.sleep(1)"))
+    build = asyncio.create_task(server.call_tool("maven_compile", {}))
+    await asyncio.sleep(0.3)
+
+    started = time.perf_counter()
+    project = await server.read_resource("maven://project")
+    assert time.perf_counter() - started < 0.2
+    assert "Running builds:" in project
+    assert "clean compile" in project
+
+    result = await build
+    assert result[0].text.startswith("Maven compile completed successfully")
+
+@pytest.mark.asyncio
+async def test_build_failure_and_timeout_are_reported(maven_server, monkeypatch, tmp_path):
+    monkeypatch.setenv("MAVEN_BUILD_TIMEOUT", "0.5")
+    script = {"fail": "raise SystemExit(1)", "hang": "import time; time.sleep(30)"}
+    monkeypatch.setattr(server, "get_toolchain", lambda basedir=None: fake_toolchain(tmp_path, script[mode]))
+
+    mode = "fail"
+    result = await server.call_tool("maven_run", {"command": "verify"})
+    assert result[0].text.startswith("Maven command 'verify' failed: exit code 1.\n")
+
+    mode = "hang"
+    result = await server.call_tool("maven_test", {"test_name": "AppTest"})
+    assert result[0].text.startswith("Maven test for AppTest failed: Build timed out after 0.5 seconds")
+
+@pytest.mark.asyncio
+async def test_build_streams_progress_and_reports_error_tail(maven_server, monkeypatch, tmp_path):
+    script = """
+import sys, time
+print("[INFO] Building app 1.0-SNAPSHOT", flush=True)
+print("[INFO] --- compiler:3.11.0:compile (default-compile) @ app ---", flush=True)
+time.sleep(0.2)
+for n in range(1000):
+    print(f"[INFO] noise {n}")
+print("[ERROR] /work/App.java:[3,9] cannot find symbol")
+print("[INFO] BUILD FAILURE")
+sys.exit(1)
+"""
+    monkeypatch.setenv("MAVEN_OUTPUT_LINES", "50")
+    monkeypatch.setattr(server, "get_toolchain", lambda basedir=None: fake_toolchain(tmp_path, script))
+    sent = []
+
+    class Session:
+        async def send_progress_notification(self, token, progress, total=None, message=None, related_request_id=None):
+            sent.append((token, progress, message))
+
+    context = RequestContext(request_id=7, meta=RequestParams.Meta(progressToken="build-1"),
+                             session=Session(), lifespan_context=None)
+    token = request_ctx.set(context)
+    try:
+        result = await server.call_tool("maven_compile", {})
+    finally:
+        request_ctx.reset(token)
+
+    assert sent == [("build-1", 1, "Building app 1.0-SNAPSHOT"),
+                    ("build-1", 2, "app: compile (compiler:compile)"),
+                    ("build-1", 3, "BUILD FAILURE")]
+    text = result[0].text
+    assert text.startswith("Maven compile failed: exit code 1; full build: no previous build to compare with.\n"
+                           "Result: BUILD FAILURE\n")
+    assert "Output: 1004 lines" in text
+    assert text.endswith("Last output:\n[ERROR] /work/App.java:[3,9] cannot find symbol")
+
+@pytest.mark.asyncio
+async def test_basedir_must_exist(maven_server, tmp_path):
+    with pytest.raises(ValueError):
+        await server.call_tool("maven_compile", {"basedir": str(tmp_path / "missing")})
+
+@pytest.mark.asyncio
+async def test_outcome_comes_from_build_result(maven_server, monkeypatch, tmp_path):
+    """A passing test run's summary says "0 failed"; it is still recorded as ok."""
+    script = {"pass": 'print("[INFO] Tests run: 2, Failures: 0, Errors: 0, Skipped: 0, Time elapsed: 0.1 s - in AppTest")',
+              "fail": "raise SystemExit(1)"}
+    monkeypatch.setattr(server, "get_toolchain", lambda basedir=None: fake_toolchain(tmp_path, script[mode]))
+    recorded = []
+
+    class Log:
+        def record(self, tool, arguments, elapsed, outcome):
+            recorded.append(outcome)
+
+    monkeypatch.setattr(server, "get_request_log", lambda: Log())
+    mode = "pass"
+    result = await server.call_tool("maven_test", {})
+    assert "Tests: 2 run, 0 failed" in result[0].text
+    mode = "fail"
+    await server.call_tool("maven_test", {})
+    assert recorded == ["ok", "failed"]
+
+@pytest.mark.asyncio
+async def test_build_time_is_split_by_phase(maven_server, monkeypatch, tmp_path):
+    script = """
+import time
+time.sleep(0.2)
+print("[INFO] --- compiler:3.11.0:compile (default-compile) @ app ---", flush=True)
+time.sleep(0.3)
+print("[INFO] --- surefire:3.2.2:test (default-test) @ app ---", flush=True)
+time.sleep(0.1)
+"""
+    monkeypatch.setattr(server, "get_toolchain", lambda basedir=None: fake_toolchain(tmp_path, script))
+    observed = {}
+    monkeypatch.setattr(server.PHASE_SECONDS, "observe", lambda value, phase: observed.setdefault(phase, value))
+
+    await server.call_tool("maven_test", {})
+    assert set(observed) == {"startup", "compile", "test"}
+    assert observed["startup"] >= 0.15
+    assert 0.25 <= observed["compile"] < 0.6
+    assert 0.05 <= observed["test"] < 0.4
@@ -0,0 +1,113 @@
+import os
+import sys
+
+import pytest
+from maven_startup_mcp_server import server
+from maven_startup_mcp_server.incremental import FULL, INCREMENTAL, NOOP, load_index, plan_compile, save_index
+from maven_startup_mcp_server.toolchain import Toolchain
+
+# Records its arguments and creates target/classes like a compile would
+FAKE_MAVEN = """
+import os, sys
+os.makedirs(os.path.join("target", "classes"), exist_ok=True)
+with open("builds.log", "a") as f:
+    f.write(" ".join(sys.argv[1:]) + "\\n")
+sys.exit(1 if os.path.exists("fail") else 0)
+"""
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "pom.xml").write_text("<project/>")
+    source = tmp_path / "src" / "main" / "java" / "App.java"
+    source.parent.mkdir(parents=True)
+    source.write_text("class App {}")
+    (tmp_path / "src" / "test").mkdir()
+    return tmp_path
+
+@pytest.fixture
+def maven_server(monkeypatch, project):
+    monkeypatch.setenv("MAVEN_BASEDIR", str(project))
+    monkeypatch.setattr(server, "_settings", None)
+    monkeypatch.setattr(server, "_runner", None)
+    toolchain = Toolchain(basedir=str(project), java=sys.executable, java_source="test", java_version=None,
+                          maven=sys.executable, maven_source="test", maven_version=None,
+                          command=[sys.executable, "-c", FAKE_MAVEN])
+    monkeypatch.setattr(server, "get_toolchain", lambda basedir=None: toolchain)
+    return server
+
+def builds(project):
+    return (project / "builds.log").read_text().splitlines()
+
+def test_plan_follows_changes(project):
+    assert plan_compile(str(project)).mode == FULL
+
+    plan = plan_compile(str(project))
+    save_index(str(project), plan)
+    # target/classes is gone, as after a failed or interrupted build
+    assert plan_compile(str(project)).mode == INCREMENTAL
+
+    (project / "target" / "classes").mkdir()
+    assert plan_compile(str(project)).mode == NOOP
+    assert plan_compile(str(project), clean=True).mode == FULL
+
+    # Same content with a new mtime is rehashed and still unchanged
+    source = project / "src" / "main" / "java" / "App.java"
+    os.utime(source, ns=(0, 10**9))
+    assert plan_compile(str(project)).mode == NOOP
+
+    source.write_text("class App { int x; }")
+    plan = plan_compile(str(project))
+    assert (plan.mode, plan.args) == (INCREMENTAL, ["compile"])
+    assert plan.reason == f"1 file changed ({os.path.join('src', 'main', 'java', 'App.java')})"
+
+    (project / "src" / "test" / "AppTest.java").write_text("class AppTest {}")
+    assert plan_compile(str(project)).reason.startswith("2 files changed")
+
+    (project / "pom.xml").write_text("<project><version>2</version></project>")
+    plan = plan_compile(str(project))
+    assert (plan.mode, plan.args, plan.reason) == (FULL, ["clean", "compile"], "pom.xml changed")
+
+def test_corrupt_index_means_full_build(project):
+    (project / "target").mkdir()
+    (project / "target" / "mcp-compile-index.json").write_text("{not json")
+    assert load_index(str(project)) is None
+    assert plan_compile(str(project)).mode == FULL
+
+@pytest.mark.asyncio
+async def test_compile_tool_reports_build_mode(maven_server, project):
+    result = await server.call_tool("maven_compile", {})
+    assert "full build: no previous build to compare with" in result[0].text
+
+    result = await server.call_tool("maven_compile", {})
+    assert result[0].text == "Maven compile skipped (no-op build: nothing changed in 2 files)."
+    assert builds(project) == ["clean compile"]
+
+    (project / "src" / "main" / "java" / "App.java").write_text("class App { int x; }")
+    result = await server.call_tool("maven_compile", {})
+    assert "incremental build: 1 file changed" in result[0].text
+    assert builds(project) == ["clean compile", "compile"]
+
+    result = await server.call_tool("maven_compile", {"clean": True})
+    assert "full build: clean build requested" in result[0].text
+
+@pytest.mark.asyncio
+async def test_failed_compile_is_not_skipped(maven_server, project):
+    await server.call_tool("maven_compile", {})
+    (project / "src" / "main" / "java" / "App.java").write_text("class App {")
+    (project / "fail").write_text("")
+    result = await server.call_tool("maven_compile", {})
+    assert result[0].text.startswith("Maven compile failed: exit code 1; incremental build")
+
+    # Reverting the edit doesn't make the failed build look up to date
+    (project / "src" / "main" / "java" / "App.java").write_text("class App {}")
+    os.remove(project / "fail")
+    result = await server.call_tool("maven_compile", {})
+    assert "full build" in result[0].text
+    assert builds(project) == ["clean compile", "compile", "clean compile"]
+
+@pytest.mark.asyncio
+async def test_incremental_mode_can_be_turned_off(maven_server, project, monkeypatch):
+    monkeypatch.setenv("MAVEN_INCREMENTAL", "no")
+    await server.call_tool("maven_compile", {})
+    await server.call_tool("maven_compile", {})
+    assert builds(project) == ["clean compile", "clean compile"]
@@ -0,0 +1,136 @@
+import os
+import stat
+
+import pytest
+from maven_startup_mcp_server.toolchain import (
+    ToolchainResolver, executable_name, read_wrapper_version, resolve,
+)
+
+def make_executable(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("#!/bin/sh\n")
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return path
+
+@pytest.fixture
+def project(tmp_path):
+    basedir = tmp_path / "project"
+    wrapper = basedir / ".mvn" / "wrapper"
+    wrapper.mkdir(parents=True)
+    (wrapper / "maven-wrapper.jar").write_bytes(b"jar")
+    (wrapper / "maven-wrapper.properties").write_text(
+        "distributionUrl=https://repo.maven.apache.org/maven2/org/apache/maven/"
+        "apache-maven/3.9.6/apache-maven-3.9.6-bin.zip\n")
+    jdk = tmp_path / "jdk-21"
+    make_executable(jdk / "bin" / executable_name("java"))
+    (jdk / "release").write_text('IMPLEMENTOR="Test"\nJAVA_VERSION="21.0.2"\n')
+    env = {"MAVEN_BASEDIR": str(basedir), "JAVA_HOME": str(jdk), "PATH": str(tmp_path / "empty")}
+    return env
+
+def test_resolves_java_home_and_wrapper(project):
+    toolchain = resolve(project)
+    assert toolchain.java_source == "JAVA_HOME"
+    assert toolchain.java_version == "21.0.2"
+    assert toolchain.maven_source == "Maven wrapper"
+    assert toolchain.maven_version == "3.9.6"
+    assert toolchain.command[0] == toolchain.java
+    assert toolchain.command[-1] == "org.apache.maven.wrapper.MavenWrapperMain"
+    assert f"-Dmaven.multiModuleProjectDirectory={project['MAVEN_BASEDIR']}" in toolchain.command
+
+def test_m2_home_wins_over_wrapper(project, tmp_path):
+    maven_home = tmp_path / "apache-maven-3.9.9"
+    mvn = make_executable(maven_home / "bin" / executable_name("mvn"))
+    (maven_home / "lib").mkdir()
+    (maven_home / "lib" / "maven-core-3.9.9.jar").write_bytes(b"")
+    toolchain = resolve(dict(project, M2_HOME=str(maven_home)))
+    assert toolchain.maven_source == "M2_HOME"
+    assert toolchain.maven_version == "3.9.9"
+    assert toolchain.command == [str(mvn)]
+
+def test_resolver_caches_until_inputs_change(project, tmp_path):
+    resolver = ToolchainResolver()
+    first = resolver.get(project)
+    assert resolver.get(project) is first
+    assert resolver.get(project) is first
+    assert resolver.stats()["resolutions"] == 1
+    assert resolver.stats()["hits"] == 2
+
+    # Replacing the java executable changes its mtime
+    java = tmp_path / "jdk-21" / "bin" / executable_name("java")
+    os.utime(java, ns=(java.stat().st_atime_ns, java.stat().st_mtime_ns + 10**9))
+    assert resolver.get(project) is not first
+    assert resolver.stats()["resolutions"] == 2
+
+    other = tmp_path / "jdk-17"
+    make_executable(other / "bin" / executable_name("java"))
+    (other / "release").write_text('JAVA_VERSION="17.0.9"\n')
+    switched = resolver.get(dict(project, JAVA_HOME=str(other)))
+    assert switched.java_version == "17.0.9"
+    assert resolver.stats()["resolutions"] == 3
+
+def test_building_does_not_invalidate_the_toolchain(project):
+    resolver = ToolchainResolver()
+    first = resolver.get(project)
+    target = os.path.join(project["MAVEN_BASEDIR"], "target")
+    os.mkdir(target)
+    assert resolver.get(project) is first
+    os.rmdir(target)
+    assert resolver.get(project) is first
+    assert resolver.stats()["resolutions"] == 1
+
+def test_missing_wrapper_downloads_once(project, tmp_path):
+    os.remove(os.path.join(project["MAVEN_BASEDIR"], ".mvn", "wrapper", "maven-wrapper.jar"))
+    calls = []
+    resolver = ToolchainResolver(download_wrapper=lambda basedir: calls.append(basedir) or False)
+    toolchain = resolver.get(project)
+    assert calls == [project["MAVEN_BASEDIR"]]
+    assert toolchain.maven_source == "not found"
+    resolver.get(project)
+    assert len(calls) == 1
+
+def test_wrapper_version_without_properties(tmp_path):
+    assert read_wrapper_version(tmp_path / "missing.properties") is None
+
+def test_daemon_mode_uses_mvnd(project, tmp_path):
+    mvnd_home = tmp_path / "maven-mvnd-1.0.2"
+    mvnd = make_executable(mvnd_home / "bin" / executable_name("mvnd"))
+    (mvnd_home / "mvn" / "lib").mkdir(parents=True)
+    (mvnd_home / "mvn" / "lib" / "maven-core-3.9.9.jar").write_bytes(b"")
+    env = dict(project, MVND_HOME=str(mvnd_home))
+
+    # Installed but not asked for
+    assert not resolve(env).daemon
+
+    toolchain = resolve(dict(env, MAVEN_DAEMON="yes"))
+    assert toolchain.daemon
+    assert toolchain.maven_source == "mvnd from MVND_HOME"
+    assert toolchain.maven_version == "3.9.9"
+    assert toolchain.command == [str(mvnd), "-B"]
+
+    # Asked for but missing: the wrapper is used instead
+    fallback = resolve(dict(project, MAVEN_DAEMON="yes"))
+    assert not fallback.daemon
+    assert fallback.maven_source == "Maven wrapper"
+
+def test_settings_take_basedir_from_environ_without_resolving(tmp_path, monkeypatch):
+    from maven_startup_mcp_server import toolchain
+    from maven_startup_mcp_server.settings import MavenSettings
+
+    def resolve_fails(*args, **kwargs):
+        raise AssertionError("settings must not resolve the toolchain")
+
+    monkeypatch.setattr(toolchain, "resolve", resolve_fails)
+    settings = MavenSettings.load({"MAVEN_BASEDIR": str(tmp_path)})
+    assert settings.basedir == str(tmp_path)
+    assert settings.max_builds == 4
+
+def test_settings_report_every_invalid_value():
+    from maven_startup_mcp_server.settings import MavenSettings
+
+    with pytest.raises(ValueError) as excinfo:
+        MavenSettings.load({"MAVEN_BASEDIR": ".", "MAVEN_LOG_SAMPLE_RATE": "2",
+                            "MAVEN_MAX_BUILDS": "lots", "MAVEN_METRICS_PORT": "70000"})
+    message = str(excinfo.value)
+    assert message.startswith("Invalid configuration: ")
+    for name in ("MAVEN_LOG_SAMPLE_RATE", "MAVEN_MAX_BUILDS", "MAVEN_METRICS_PORT"):
+        assert name in message
@@ -0,0 +1,89 @@
+import re
+import urllib.request
+
+import pytest
+from mssql_mcp_server.metrics import Registry, start_http_server, write_textfile
+from mssql_mcp_server.server import call_tool, close_db, list_resources, metrics, read_resource
+
+def sample(text, name, **labels):
+    """Return the value of one sample line in rendered metrics, or None."""
+    label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    pattern = "^" + re.escape(name) + (r"\{" + re.escape(label_text) + r"\}" if labels else "") + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+def test_render_counter_and_histogram():
+    registry = Registry()
+    calls = registry.counter("calls_total", "Calls made", ("tool",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    calls.inc(tool="a")
+    calls.inc(2, tool='quote"d')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+    registry.add_collector(lambda: [("open_things", "gauge", "Open things", [({"kind": "x"}, 3)])])
+
+    text = registry.render()
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{tool="a"} 1' in text
+    assert 'calls_total{tool="quote\\"d"} 2' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_count 3" in text
+    assert sample(text, "latency_seconds_sum") == pytest.approx(5.55)
+    assert 'open_things{kind="x"} 3' in text
+
+def test_failing_collector_is_skipped():
+    registry = Registry()
+    registry.add_collector(lambda: 1 / 0)
+    registry.counter("ok_total", "Still rendered").inc()
+    assert "ok_total 1" in registry.render()
+
+def test_textfile_and_http_exporters(tmp_path):
+    registry = Registry()
+    registry.counter("exported_total", "Exported").inc(7)
+    path = tmp_path / "mssql.prom"
+    write_textfile(registry, str(path))
+    assert "exported_total 7" in path.read_text()
+    assert [p.name for p in tmp_path.iterdir()] == ["mssql.prom"]
+
+    server = start_http_server(registry, "127.0.0.1", 0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "exported_total 7" in response.read().decode()
+    finally:
+        server.shutdown()
+
+@pytest.mark.asyncio
+async def test_tool_calls_and_query_phases_are_measured(fake_pyodbc):
+    fake_pyodbc.add_result(r"FROM metered", ["id"], [(1,), (2,), (3,)])
+    before = metrics.render()
+    await call_tool("execute_sql", {"query": "SELECT id FROM metered"})
+    after = metrics.render()
+
+    def delta(name, **labels):
+        return (sample(after, name, **labels) or 0) - (sample(before, name, **labels) or 0)
+
+    assert delta("mssql_mcp_tool_call_seconds_count", tool="execute_sql", outcome="ok") == 1
+    assert delta("mssql_mcp_query_phase_seconds_count", phase="execute") == 1
+    assert delta("mssql_mcp_query_phase_seconds_count", phase="fetch") == 1
+    assert delta("mssql_mcp_result_rows_sum", format="csv") == 3
+    assert delta("mssql_mcp_result_bytes_total", format="csv") == len("id\n1\n2\n3")
+    assert sample(after, "mssql_mcp_pool_connects_total") >= 1
+    assert sample(after, "mssql_mcp_pool_connections", state="in_use") == 0
+
+@pytest.mark.asyncio
+async def test_metrics_resource_is_opt_in(fake_pyodbc, monkeypatch):
+    fake_pyodbc.add_catalog({"dbo.users": {"columns": ["id"]}})
+    assert "mssql://metrics" not in [str(r.uri) for r in await list_resources()]
+    with pytest.raises(ValueError, match="disabled"):
+        await read_resource("mssql://metrics")
+
+    monkeypatch.setenv("MSSQL_METRICS", "true")
+    close_db()
+    assert "mssql://metrics" in [str(r.uri) for r in await list_resources()]
+    text = await read_resource("mssql://metrics")
+    assert "# TYPE mssql_mcp_tool_call_seconds histogram" in text
@@ -0,0 +1,56 @@
+import datetime
+import decimal
+
+import pytest
+from mssql_mcp_server.pagination import build_page_query, decode_key, encode_key, quote_identifier
+from mssql_mcp_server.server import read_resource
+from pydantic import AnyUrl
+
+def test_quote_identifier():
+    """Names are bracket-quoted part by part with ] escaped."""
+    assert quote_identifier("dbo.Orders") == "[dbo].[Orders]"
+    assert quote_identifier("odd]name") == "[odd]]name]"
+
+def test_page_query_for_composite_key():
+    """A composite key expands into a seekable OR of prefixes."""
+    sql, params = build_page_query("t", ["a", "b"], [1, "x"], 50)
+    assert sql == ("SELECT TOP (?) * FROM [t] WHERE ([a] > ?) OR ([a] = ? AND [b] > ?) "
+                   "ORDER BY [a], [b]")
+    assert params == [50, 1, 1, "x"]
+
+def test_key_token_round_trips_types():
+    """Key values keep their Python type through the after token."""
+    values = [7, "x", datetime.datetime(2024, 1, 2, 3, 4, 5, 123000), decimal.Decimal("1.50")]
+    assert decode_key(encode_key(values), values) == values
+
+def test_invalid_key_token():
+    with pytest.raises(ValueError, match="Invalid page token"):
+        decode_key("not-a-token", ["id"])
+
+@pytest.fixture
+def orders(fake_pyodbc):
+    ids = list(range(1, 251))
+
+    def page(params):
+        limit, *after = params
+        start = after[0] if after else 0
+        return [(i, f"order-{i}") for i in ids if i > start][:limit]
+
+    fake_pyodbc.add_catalog({"dbo.orders": {"columns": ["id", "label"], "key": ["id"]}})
+    fake_pyodbc.add_result(r"FROM \[orders\]", ["id", "label"], page)
+    return fake_pyodbc
+
+@pytest.mark.asyncio
+async def test_read_resource_pages_by_key(orders):
+    """Following next-page links visits every row exactly once, in key order."""
+    uri = "mssql://orders/data?limit=100"
+    seen = []
+    while uri:
+        text = await read_resource(AnyUrl(uri))
+        body, _, link = text.partition("\n\nNext page: ")
+        seen.extend(int(line.split(",")[0]) for line in body.split("\n")[1:] if line)
+        uri = link or None
+    assert seen == list(range(1, 251))
+    page_queries = [sql for sql, _ in orders.executed if "[orders]" in sql]
+    assert all("OFFSET" not in sql for sql in page_queries)
+    assert "ORDER BY [id]" in page_queries[-1]
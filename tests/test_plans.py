@@ -0,0 +1,101 @@
+import pytest
+from mssql_mcp_server.plans import format_plan, parse_showplan
+from mssql_mcp_server.server import call_tool, get_pool
+
+SHOWPLAN_COLUMN = "Microsoft SQL Server 2005 XML Showplan"
+
+PLAN_XML = """<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan" Version="1.5">
+<BatchSequence><Batch><Statements>
+<StmtSimple StatementText="SELECT o.id, c.name FROM orders o JOIN customers c ON c.id = o.customer_id WHERE o.status = 2"
+            StatementSubTreeCost="1.0">
+<QueryPlan>
+  <MissingIndexes>
+    <MissingIndexGroup Impact="87.5">
+      <MissingIndex Database="[shop]" Schema="[dbo]" Table="[orders]">
+        <ColumnGroup Usage="EQUALITY"><Column Name="[status]"/></ColumnGroup>
+        <ColumnGroup Usage="INCLUDE"><Column Name="[customer_id]"/></ColumnGroup>
+      </MissingIndex>
+    </MissingIndexGroup>
+  </MissingIndexes>
+  <RelOp NodeId="0" PhysicalOp="Hash Match" LogicalOp="Inner Join" EstimateRows="120"
+         EstimatedTotalSubtreeCost="1.0">
+    <RunTimeInformation>
+      <RunTimeCountersPerThread Thread="0" ActualRows="950" ActualExecutions="1" ActualElapsedms="12"/>
+    </RunTimeInformation>
+    <Hash>
+      <RelOp NodeId="1" PhysicalOp="Clustered Index Scan" LogicalOp="Clustered Index Scan" EstimateRows="120"
+             EstimatedTotalSubtreeCost="0.7">
+        <Warnings NoJoinPredicate="false"/>
+        <RunTimeInformation>
+          <RunTimeCountersPerThread Thread="1" ActualRows="500" ActualExecutions="1" ActualLogicalReads="300"/>
+          <RunTimeCountersPerThread Thread="2" ActualRows="450" ActualExecutions="1" ActualLogicalReads="280"/>
+        </RunTimeInformation>
+        <IndexScan><Object Database="[shop]" Schema="[dbo]" Table="[orders]" Index="[PK_orders]"/></IndexScan>
+      </RelOp>
+      <RelOp NodeId="2" PhysicalOp="Index Seek" LogicalOp="Index Seek" EstimateRows="1"
+             EstimatedTotalSubtreeCost="0.1">
+        <RunTimeInformation>
+          <RunTimeCountersPerThread Thread="0" ActualRows="950" ActualExecutions="1" ActualLogicalReads="4"/>
+        </RunTimeInformation>
+        <IndexScan><Object Database="[shop]" Schema="[dbo]" Table="[customers]" Index="[PK_customers]"/></IndexScan>
+      </RelOp>
+    </Hash>
+  </RelOp>
+</QueryPlan>
+</StmtSimple>
+</Statements></Batch></BatchSequence>
+</ShowPlanXML>"""
+
+def test_parse_showplan_builds_operator_tree():
+    [statement] = parse_showplan(PLAN_XML)
+    root = statement.root
+    assert (root.physical_op, root.logical_op, root.actual_rows) == ("Hash Match", "Inner Join", 950)
+    scan, seek = root.children
+    assert scan.target == "[dbo].[orders].[PK_orders]"
+    assert (scan.actual_rows, scan.logical_reads) == (950, 580)
+    assert root.own_cost == pytest.approx(0.2)
+    assert statement.missing_indexes == ["[dbo].[orders] ([status]) INCLUDE ([customer_id]), estimated impact 88%"]
+    assert statement.warnings == []
+
+def test_format_plan_lists_top_operators():
+    text = format_plan(parse_showplan(PLAN_XML), actual=True, messages=["Table 'orders'. Scan count 2, logical reads 580"])
+    lines = text.splitlines()
+    assert lines[0].startswith("Actual plan for statement 1 (cost 1): SELECT o.id")
+    assert lines[1] == "- [0] Hash Match (Inner Join): est rows 120, actual rows 950, 12 ms, cost 20%"
+    assert lines[2] == ("  - [1] Clustered Index Scan [dbo].[orders].[PK_orders]: est rows 120, "
+                        "actual rows 950, executions 2, logical reads 580, cost 70%")
+    assert lines[5] == "  70% [1] Clustered Index Scan [dbo].[orders].[PK_orders]"
+    assert "Statistics:" in lines
+    assert lines[-1] == "  Table 'orders'. Scan count 2, logical reads 580"
+
+@pytest.mark.asyncio
+async def test_explain_sql_estimated_plan(fake_pyodbc):
+    fake_pyodbc.add_result(r"FROM orders", [SHOWPLAN_COLUMN], [(PLAN_XML,)])
+    result = await call_tool("explain_sql", {"query": "SELECT * FROM orders", "include_xml": True})
+    assert result[0].text.startswith("Estimated plan for statement 1")
+    assert result[1].text == PLAN_XML
+    statements = [sql for sql, _ in fake_pyodbc.executed]
+    assert statements[-3:] == ["SET SHOWPLAN_XML ON", "SELECT * FROM orders", "SET SHOWPLAN_XML OFF"]
+
+@pytest.mark.asyncio
+async def test_explain_sql_actual_plan_rolls_back(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_POOL_HEALTH_CHECK", "no")
+    fake_pyodbc.add_result_sets(r"UPDATE orders", [
+        (None, 1, ["Table 'orders'. Scan count 1, logical reads 3"]),
+        ([SHOWPLAN_COLUMN], [(PLAN_XML,)], [" SQL Server Execution Times:   CPU time = 0 ms,  elapsed time = 1 ms."]),
+    ])
+    result = await call_tool("explain_sql", {"query": "UPDATE orders SET status = 3", "actual": True})
+    text = result[0].text
+    assert text.startswith("Actual plan")
+    assert "  Table 'orders'. Scan count 1, logical reads 3" in text.splitlines()
+    assert "SQL Server Execution Times:   CPU time = 0 ms,  elapsed time = 1 ms." in text
+    conn = fake_pyodbc.connections[0]
+    assert conn.commits == 0 and conn.rollbacks >= 1
+    statements = [sql for sql, _ in fake_pyodbc.executed]
+    assert statements[-2:] == ["SET STATISTICS IO, TIME OFF", "SET STATISTICS XML OFF"]
+
+@pytest.mark.asyncio
+async def test_explain_sql_without_plan_reports_error(fake_pyodbc):
+    result = await call_tool("explain_sql", {"query": "SELECT * FROM nowhere"})
+    assert result[0].text == "Error explaining query: The server returned no execution plan for this query"
+    assert get_pool().stats()["in_use"] == 0
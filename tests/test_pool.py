@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+from mssql_mcp_server.pool import ConnectionPool
+from mssql_mcp_server.server import call_tool, get_pool
+
+def test_connections_are_reused(fake_pyodbc):
+    """Checkouts reuse pooled connections instead of reconnecting."""
+    pool = ConnectionPool("DSN=fake", min_size=1, max_size=2)
+    for _ in range(20):
+        with pool.connection() as conn:
+            assert not conn.closed
+    assert fake_pyodbc.connect_calls == 1
+    stats = pool.stats()
+    assert stats["checkouts"] == 20
+    assert stats["creates"] == 1
+    assert stats["in_use"] == 0
+
+def test_concurrent_checkouts_bounded_by_max_size(fake_pyodbc):
+    """Many threads share at most max_size connections."""
+    pool = ConnectionPool("DSN=fake", min_size=0, max_size=3)
+
+    def worker():
+        for _ in range(25):
+            with pool.connection():
+                time.sleep(0.0005)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert fake_pyodbc.connect_calls <= 3
+    stats = pool.stats()
+    assert stats["checkouts"] == 200
+    assert stats["waits"] > 0
+    assert stats["size"] <= 3
+
+def test_acquire_times_out_when_exhausted(fake_pyodbc):
+    """A caller gives up once acquire_timeout passes with the pool exhausted."""
+    pool = ConnectionPool("DSN=fake", min_size=0, max_size=1, acquire_timeout=0.05)
+    held = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    pool.release(held)
+    assert pool.stats()["timeouts"] == 1
+
+def test_unhealthy_connection_is_replaced(fake_pyodbc):
+    """A connection that fails its checkout health check is evicted."""
+    pool = ConnectionPool("DSN=fake", min_size=1, max_size=1)
+    pool.open()
+    fake_pyodbc.connections[0].close()
+    with pool.connection() as conn:
+        assert conn is fake_pyodbc.connections[1]
+    stats = pool.stats()
+    assert stats["failed_health_checks"] == 1
+    assert stats["evictions"] == 1
+
+def test_idle_connections_are_evicted(fake_pyodbc):
+    """Connections idle past idle_timeout are closed down to min_size."""
+    pool = ConnectionPool("DSN=fake", min_size=0, max_size=2, idle_timeout=0.01)
+    with pool.connection():
+        pass
+    time.sleep(0.02)
+    with pool.connection():
+        pass
+    assert fake_pyodbc.connections[0].closed
+    assert pool.stats()["evictions"] == 1
+
+def test_release_resets_session_state(fake_pyodbc):
+    """Returned connections are rolled back and put back into manual commit."""
+    pool = ConnectionPool("DSN=fake", min_size=0, max_size=1, health_check=False)
+    with pool.connection() as conn:
+        conn.autocommit = True
+    assert conn.rollbacks == 1
+    assert conn.autocommit is False
+
+@pytest.mark.asyncio
+async def test_call_tool_connects_once_per_pool_slot(fake_pyodbc):
+    """Repeated execute_sql calls are served from the server-wide pool."""
+    fake_pyodbc.add_result(r"FROM widgets", ["id", "name"], [(1, "a"), (2, "b")])
+    for _ in range(50):
+        result = await call_tool("execute_sql", {"query": "SELECT id, name FROM widgets"})
+        assert result[0].text == "id,name\n1,a\n2,b"
+    assert fake_pyodbc.connect_calls == 1
+    assert get_pool().stats()["checkouts"] == 50
+
+@pytest.mark.asyncio
+async def test_session_changes_do_not_reach_the_next_checkout(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_POOL_MAX_SIZE", "1")
+    await call_tool("execute_sql", {"query": "USE otherdb; SET ROWCOUNT 1; SELECT 1 AS n"})
+    changed = fake_pyodbc.connections[-1]
+    assert (changed.database, changed.row_limit) == ("otherdb", 1)
+    assert changed.closed
+
+    pool = get_pool()
+    with pool.connection() as conn:
+        assert conn is not changed
+        assert (conn.database, conn.row_limit) == ("test_db", 0)
+    assert pool.stats()["session_discards"] == 1
+
+def test_plain_statements_keep_the_connection(fake_pyodbc):
+    pool = ConnectionPool("DSN=fake", min_size=0, max_size=1)
+    for sql in ("UPDATE t SET x = 1", "SELECT '#1', [use] FROM t -- USE x", "DECLARE @n int; SET @n = 1"):
+        with pool.connection() as conn:
+            pool.note_statement(conn, sql)
+    assert fake_pyodbc.connect_calls == 1
+    assert pool.stats()["session_discards"] == 0
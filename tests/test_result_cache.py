@@ -0,0 +1,78 @@
+import time
+
+import pytest
+from mssql_mcp_server.result_cache import ResultCache, is_cacheable, normalize_query
+from mssql_mcp_server.server import call_tool, get_result_cache
+
+def test_normalize_query_keeps_literals():
+    """Whitespace is collapsed everywhere except inside string literals."""
+    assert normalize_query("SELECT  *\n FROM t WHERE a = 'x  y' ;") == "SELECT * FROM t WHERE a = 'x  y'"
+
+@pytest.mark.parametrize("query, expected", [
+    ("SELECT * FROM t", True),
+    ("select name from t where note = 'GETDATE()'", True),
+    ("SELECT GETDATE()", False),
+    ("SELECT NEWID(), * FROM t", False),
+    ("SELECT @@ROWCOUNT", False),
+    ("SELECT * INTO t2 FROM t", False),
+    ("SELECT 1; DELETE FROM t", False),
+    ("UPDATE t SET a = 1", False),
+])
+def test_is_cacheable(query, expected):
+    assert is_cacheable(query) is expected
+
+def test_lru_respects_entry_and_byte_limits():
+    cache = ResultCache(max_entries=2, max_bytes=10, ttl=60)
+    cache.put("a", "aaaa", 4)
+    cache.put("b", "bbbb", 4)
+    cache.get("a")
+    cache.put("c", "cccc", 4)
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    cache.put("d", "dddddddd", 8)
+    assert cache.stats()["bytes"] <= 10
+    cache.put("huge", "x" * 11, 11)
+    assert cache.get("huge") is None
+
+def test_entries_expire():
+    cache = ResultCache(ttl=0.01)
+    cache.put("a", "value", 5)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+@pytest.fixture
+def cached(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_RESULT_CACHE", "yes")
+    fake_pyodbc.add_result(r"FROM widgets", ["id"], [(1,), (2,)])
+    return fake_pyodbc
+
+def _reads(fake):
+    return sum("widgets" in sql for sql, _ in fake.executed)
+
+@pytest.mark.asyncio
+async def test_repeated_select_served_from_cache(cached):
+    """Equivalent SELECTs hit the server once."""
+    first = await call_tool("execute_sql", {"query": "SELECT id FROM widgets"})
+    second = await call_tool("execute_sql", {"query": "SELECT  id\nFROM widgets;"})
+    assert first[0].text == second[0].text == "id\n1\n2"
+    assert _reads(cached) == 1
+    assert get_result_cache().stats()["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_bypass_cache(cached):
+    await call_tool("execute_sql", {"query": "SELECT id FROM widgets"})
+    await call_tool("execute_sql", {"query": "SELECT id FROM widgets", "bypass_cache": True})
+    assert _reads(cached) == 2
+
+@pytest.mark.asyncio
+async def test_write_clears_cache(cached):
+    await call_tool("execute_sql", {"query": "SELECT id FROM widgets"})
+    await call_tool("execute_sql", {"query": "DELETE FROM gadgets"})
+    await call_tool("execute_sql", {"query": "SELECT id FROM widgets"})
+    assert _reads(cached) == 2
+
+@pytest.mark.asyncio
+async def test_cache_disabled_by_default(fake_pyodbc):
+    await call_tool("execute_sql", {"query": "SELECT 1"})
+    assert get_result_cache() is None
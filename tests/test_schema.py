@@ -0,0 +1,73 @@
+import time
+
+import pytest
+from mssql_mcp_server.server import call_tool, get_schema_cache, list_resources
+
+TABLES = {
+    "dbo.orders": {"columns": ["id", "customer_id", "total"], "key": ["id"], "rows": 1200},
+    "dbo.customers": {"columns": ["id", "name"], "key": ["id"], "rows": 40},
+    "sales.regions": {"columns": ["code", "name"], "key": ["code"], "rows": 5},
+}
+
+def _catalog_queries(fake):
+    return [sql for sql, _ in fake.executed if "sys." in sql]
+
+@pytest.fixture
+def catalog(fake_pyodbc):
+    fake_pyodbc.add_catalog(TABLES)
+    return fake_pyodbc
+
+@pytest.mark.asyncio
+async def test_list_resources_uses_cache_after_warm_up(catalog):
+    """Only the first listing touches the database."""
+    resources = await list_resources()
+    assert sorted(str(r.uri) for r in resources) == [
+        "mssql://customers/data", "mssql://orders/data", "mssql://sales.regions/data", "mssql://statements",
+    ]
+    assert "~1200 rows" in next(r.description for r in resources if r.name == "Table: orders")
+    loaded = len(catalog.executed)
+
+    for _ in range(100):
+        await list_resources()
+    assert len(catalog.executed) == loaded
+    stats = get_schema_cache().stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 100
+    assert stats["tables"] == 3
+
+@pytest.mark.asyncio
+async def test_expired_cache_revalidates_with_version_probe(catalog, monkeypatch):
+    """After the TTL an unchanged schema costs one version query, not a reload."""
+    monkeypatch.setenv("MSSQL_SCHEMA_CACHE_TTL", "0.01")
+    await list_resources()
+    before = len(_catalog_queries(catalog))
+    time.sleep(0.02)
+    await list_resources()
+    assert len(_catalog_queries(catalog)) == before + 1
+    assert get_schema_cache().stats()["revalidations"] == 1
+
+@pytest.mark.asyncio
+async def test_schema_change_triggers_reload(catalog, monkeypatch):
+    """A newer sys.tables.modify_date reloads the catalog."""
+    monkeypatch.setenv("MSSQL_SCHEMA_CACHE_TTL", "0.01")
+    await list_resources()
+    catalog.add_catalog({**TABLES, "dbo.invoices": {"columns": ["id"], "key": ["id"]}},
+                        modified="2024-06-01 00:00:00")
+    time.sleep(0.02)
+    resources = await list_resources()
+    assert len([r for r in resources if str(r.uri).endswith("/data")]) == 4
+    assert get_schema_cache().stats()["misses"] == 2
+
+@pytest.mark.asyncio
+async def test_ddl_invalidates_cache(catalog):
+    """CREATE/ALTER/DROP through execute_sql drop the cached catalog."""
+    await list_resources()
+    await call_tool("execute_sql", {"query": "CREATE TABLE t (id int)"})
+    assert get_schema_cache().stats()["invalidations"] == 1
+    await list_resources()
+    assert get_schema_cache().stats()["misses"] == 2
+
+@pytest.mark.asyncio
+async def test_show_tables_served_from_cache(catalog):
+    result = await call_tool("execute_sql", {"query": "SHOW TABLES"})
+    assert result[0].text == "Tables_in_test_db\ncustomers\norders\nregions"
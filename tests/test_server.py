@@ -10,8 +10,8 @@ def test_server_initialization():
 async def test_list_tools():
     """Test that list_tools returns expected tools."""
     tools = await list_tools()
-    assert len(tools) == 1
-    assert tools[0].name == "execute_sql"
+    assert [tool.name for tool in tools] == ["execute_sql", "bulk_insert", "explain_sql", "submit_query", "job_status",
+                                           "fetch_job_results", "cancel_job", "reload_config"]
     assert "query" in tools[0].inputSchema["properties"]
 
 @pytest.mark.asyncio
@@ -28,15 +28,10 @@ async def test_call_tool_missing_query():
 
 # Skip database-dependent tests if no database connection
 @pytest.mark.asyncio
-@pytest.mark.skipif(
-    not all([
-        pytest.importorskip("pyodbc"),
-        pytest.importorskip("mssql_mcp_server")
-    ]),
-    reason="MSSQL connection not available"
-)
 async def test_list_resources():
     """Test listing resources (requires database connection)."""
+    # Checked here rather than at collection, so the other tests run without the ODBC driver
+    pytest.importorskip("pyodbc", exc_type=ImportError)
     try:
         resources = await list_resources()
         assert isinstance(resources, list)
@@ -0,0 +1,73 @@
+import dataclasses
+import json
+import logging
+
+import pytest
+from mcp_common import RequestLog
+from mssql_mcp_server.server import call_tool, get_db_config, get_pool, get_settings
+from mssql_mcp_server.settings import Settings
+
+def test_all_problems_reported_together(monkeypatch):
+    monkeypatch.delenv("MSSQL_PASSWORD", raising=False)
+    monkeypatch.setenv("MSSQL_USER", "sa")
+    monkeypatch.setenv("MSSQL_DATABASE", "db")
+    monkeypatch.setenv("MSSQL_POOL_MAX_SIZE", "zero")
+    monkeypatch.setenv("MSSQL_RESULT_MAX_ROWS", "0")
+    with pytest.raises(ValueError) as error:
+        Settings.load()
+    message = str(error.value)
+    assert "MSSQL_USER, MSSQL_PASSWORD and MSSQL_DATABASE are required" in message
+    assert "MSSQL_POOL_MAX_SIZE='zero' is not a valid int" in message
+    assert "MSSQL_RESULT_MAX_ROWS='0': must be at least 1" in message
+
+@pytest.mark.asyncio
+async def test_invalid_settings_do_not_hide_tool_errors(fake_pyodbc, monkeypatch):
+    """Logging the call runs after the tool failed and must not replace its exception."""
+    monkeypatch.setenv("MSSQL_POOL_MAX_SIZE", "zero")
+    with pytest.raises(ValueError, match="Unknown tool"):
+        await call_tool("invalid_tool", {})
+
+def test_settings_are_built_once_and_immutable(fake_pyodbc, monkeypatch):
+    config, connection_string = get_db_config()
+    assert "Database=test_db;" in connection_string
+    monkeypatch.setenv("MSSQL_DATABASE", "other_db")
+    assert get_db_config()[1] == connection_string
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        get_settings().query_timeout = 1
+    assert "testpassword" not in repr(get_settings())
+
+@pytest.mark.asyncio
+async def test_reload_picks_up_config_file(fake_pyodbc, monkeypatch, tmp_path):
+    config_file = tmp_path / "mssql.env"
+    config_file.write_text("# pool\nMSSQL_POOL_MAX_SIZE=3\n")
+    monkeypatch.setenv("MSSQL_CONFIG_FILE", str(config_file))
+    old_pool = get_pool()
+    assert old_pool.max_size == 3
+
+    result = await call_tool("reload_config", {})
+    assert result[0].text == "Settings unchanged."
+
+    config_file.write_text("MSSQL_POOL_MAX_SIZE=4\nMSSQL_DATABASE='reporting'\n")
+    result = await call_tool("reload_config", {})
+    assert result[0].text == "Settings reloaded."
+    assert get_pool() is not old_pool and get_pool().max_size == 4
+    assert "Database=reporting;" in get_db_config()[1]
+
+    config_file.write_text("MSSQL_POOL_MAX_SIZE=-1\n")
+    result = await call_tool("reload_config", {})
+    assert result[0].text.startswith("Error reloading settings, current settings kept: Invalid configuration")
+    assert get_pool().max_size == 4
+
+def test_request_log_samples_successes(caplog):
+    log = RequestLog(logging.getLogger("test.requests"), sample_rate=0)
+    with caplog.at_level(logging.INFO, logger="test.requests"):
+        log.record("execute_sql", {"query": "SELECT 1"}, 0.01)
+        assert caplog.records == []
+        log.record("execute_sql", {"query": "SELECT *\n  FROM " + "x" * 500, "params": [1]}, 0.25, "failed")
+    [record] = caplog.records
+    assert record.levelno == logging.WARNING
+    fields = json.loads(record.getMessage().removeprefix("request "))
+    assert fields["tool"] == "execute_sql" and fields["outcome"] == "failed" and fields["ms"] == 250.0
+    assert fields["args"] == ["params", "query"]
+    assert fields["query"].startswith("SELECT * FROM xxx") and len(fields["query"]) == 200
+    assert record.request == fields
@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from mssql_mcp_server.lazy import LazyModule
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def loaded_modules(module):
+    """Top-level modules in ``sys.modules`` after importing ``module`` in a fresh interpreter."""
+    code = f"import json, sys, {module}; print(json.dumps(sorted({{name.split('.')[0] for name in sys.modules}})))"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.join(ROOT, "src"),
+                                                                    os.environ.get("PYTHONPATH")])))
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, timeout=120)
+    assert result.returncode == 0, result.stderr
+    return set(json.loads(result.stdout))
+
+@pytest.mark.parametrize("package, other", [("mssql_mcp_server", "maven_startup_mcp_server"),
+                                            ("maven_startup_mcp_server", "mssql_mcp_server")])
+def test_package_import_defers_heavy_modules(package, other):
+    """Import time itself is measured by benchmarks/bench_startup.py."""
+    loaded = loaded_modules(package)
+    assert {"mcp", "pyodbc", "pyarrow", other}.isdisjoint(loaded)
+
+@pytest.mark.parametrize("server, other", [("mssql_mcp_server.server", "maven_startup_mcp_server"),
+                                           ("maven_startup_mcp_server.server", "mssql_mcp_server")])
+def test_server_import_defers_driver_and_pyarrow(server, other):
+    loaded = loaded_modules(server)
+    assert "mcp" in loaded
+    assert {"pyodbc", "pyarrow", other}.isdisjoint(loaded)
+
+def test_lazy_module_imports_on_first_use():
+    module = LazyModule("colorsys")
+    assert module.available()
+    assert "not loaded" in repr(module)
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert "(loaded)" in repr(module)
+
+    missing = LazyModule("no_such_module_here")
+    assert not missing.available()
+    with pytest.raises(ImportError):
+        missing.anything
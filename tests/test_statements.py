@@ -0,0 +1,67 @@
+import json
+
+import pytest
+from mssql_mcp_server.server import call_tool, get_pool, read_resource
+from mssql_mcp_server.statements import StatementCache
+
+def test_statement_cache_evicts_least_recently_used(fake_pyodbc):
+    conn = fake_pyodbc.connect("DSN=fake")
+    cache = StatementCache(conn, size=2)
+    a, _ = cache.cursor("SELECT a")
+    cache.cursor("SELECT b")
+    assert cache.cursor("SELECT a") == (a, True)
+    cache.cursor("SELECT c")
+    _, reused = cache.cursor("SELECT b")
+    assert not reused
+    assert conn.cursors_opened == 4
+
+@pytest.mark.asyncio
+async def test_params_are_bound_not_interpolated(fake_pyodbc):
+    fake_pyodbc.add_result(r"FROM users", ["id", "name"], lambda params: [(params[0], "ann")])
+    result = await call_tool("execute_sql", {"query": "SELECT id, name FROM users WHERE id = ?", "params": [7]})
+    assert result[0].text == "id,name\n7,ann"
+    assert ("SELECT id, name FROM users WHERE id = ?", (7,)) in fake_pyodbc.executed
+
+@pytest.mark.asyncio
+async def test_repeated_statement_reuses_prepared_cursor(fake_pyodbc, monkeypatch):
+    """The same parameterized statement is prepared once per pooled connection."""
+    monkeypatch.setenv("MSSQL_POOL_HEALTH_CHECK", "no")
+    fake_pyodbc.add_result(r"FROM users", ["id"], lambda params: [(params[0],)])
+    query = "SELECT id FROM users WHERE id = ?"
+    for i in range(10):
+        result = await call_tool("execute_sql", {"query": query, "params": [i]})
+        assert result[0].text == f"id\n{i}"
+    await call_tool("execute_sql", {"query": "UPDATE users SET name = ? WHERE id = ?", "params": ["x", 1]})
+
+    assert fake_pyodbc.connections[0].cursors_opened == 2
+    stats = get_pool().statement_stats.snapshot()
+    assert stats[query] == {"executions": 10, "prepares": 1, "reuses": 9}
+
+    # Visible to clients, most executed statement first
+    report = json.loads(await read_resource("mssql://statements"))
+    assert report[0] == {"statement": query, "executions": 10, "prepares": 1, "reuses": 9, "reuse_ratio": 0.9}
+    assert report[1]["statement"] == "UPDATE users SET name = ? WHERE id = ?"
+
+@pytest.mark.asyncio
+async def test_failed_statement_is_not_reused(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_POOL_HEALTH_CHECK", "no")
+    query = "SELECT id FROM users WHERE id = ?"
+    original = fake_pyodbc.Cursor.execute
+
+    def failing(self, sql, *params):
+        if params == ("boom",):
+            raise fake_pyodbc.ProgrammingError("conversion failed")
+        return original(self, sql, *params)
+
+    monkeypatch.setattr(fake_pyodbc.Cursor, "execute", failing)
+    result = await call_tool("execute_sql", {"query": query, "params": ["boom"]})
+    assert "conversion failed" in result[0].text
+    await call_tool("execute_sql", {"query": query, "params": [1]})
+    # The failed cursor was dropped, so the retry prepared on a fresh one
+    assert fake_pyodbc.connections[0].cursors_opened == 2
+    assert get_pool().statement_stats.snapshot()[query] == {"executions": 1, "prepares": 1, "reuses": 0}
+
+@pytest.mark.asyncio
+async def test_non_scalar_params_rejected(fake_pyodbc):
+    with pytest.raises(ValueError, match="scalar"):
+        await call_tool("execute_sql", {"query": "SELECT ?", "params": [[1, 2]]})
@@ -0,0 +1,78 @@
+import re
+
+import pytest
+from mssql_mcp_server.server import call_tool, get_pool, get_streams
+
+ROWS = [(i, f"name-{i}") for i in range(1, 2501)]
+
+def _token(result):
+    match = re.search(r'continuation_token="([^"]+)"', result[1].text)
+    return match.group(1)
+
+@pytest.fixture
+def big_table(fake_pyodbc, monkeypatch):
+    monkeypatch.setenv("MSSQL_FETCH_BATCH_SIZE", "100")
+    fake_pyodbc.add_result(r"FROM big", ["id", "name"], ROWS)
+    return fake_pyodbc
+
+@pytest.mark.asyncio
+async def test_large_result_is_chunked_with_continuation(big_table):
+    """Rows beyond max_rows come back through continuation tokens."""
+    result = await call_tool("execute_sql", {"query": "SELECT id, name FROM big", "max_rows": 1000})
+    lines = result[0].text.split("\n")
+    assert lines[0] == "id,name"
+    assert len(lines) == 1001
+    token = _token(result)
+
+    seen = lines[1:]
+    while len(result) > 1:
+        result = await call_tool("execute_sql", {"continuation_token": token, "max_rows": 1000})
+        seen.extend(result[0].text.split("\n")[1:])
+
+    assert seen == [f"{i},name-{i}" for i, _ in ROWS]
+    assert len(get_streams()) == 0
+    assert get_pool().stats()["in_use"] == 0
+
+@pytest.mark.asyncio
+async def test_rows_are_fetched_in_batches(big_table, monkeypatch):
+    """The cursor is drained with bounded fetchmany calls, never fetchall."""
+    sizes = []
+    fetchmany = big_table.Cursor.fetchmany
+
+    def spy(self, size=1):
+        sizes.append(size)
+        return fetchmany(self, size)
+
+    monkeypatch.setattr(big_table.Cursor, "fetchmany", spy)
+    monkeypatch.setattr(big_table.Cursor, "fetchall", lambda self: pytest.fail("fetchall called"))
+    await call_tool("execute_sql", {"query": "SELECT id, name FROM big", "max_rows": 1000})
+    assert max(sizes) <= 100
+
+@pytest.mark.asyncio
+async def test_byte_budget_limits_chunk(big_table):
+    """A chunk stops once the next row would exceed max_bytes."""
+    result = await call_tool("execute_sql", {"query": "SELECT id, name FROM big", "max_bytes": 200})
+    assert len(result[0].text.encode("utf-8")) <= 200
+    assert "More rows available" in result[1].text
+
+@pytest.mark.asyncio
+async def test_small_result_has_no_continuation(big_table):
+    """Results that fit the budget exactly are returned in one piece."""
+    big_table.add_result(r"FROM small", ["n"], [(1,), (2,)])
+    result = await call_tool("execute_sql", {"query": "SELECT n FROM small", "max_rows": 2})
+    assert len(result) == 1
+    assert result[0].text == "n\n1\n2"
+
+@pytest.mark.asyncio
+async def test_unknown_continuation_token(big_table):
+    """Expired or made-up tokens produce an error message."""
+    result = await call_tool("execute_sql", {"continuation_token": "nope"})
+    assert "Unknown or expired continuation token" in result[0].text
+
+@pytest.mark.asyncio
+async def test_result_truncated_when_pool_cannot_park_streams(big_table, monkeypatch):
+    """With a single pooled connection, streams are not parked."""
+    monkeypatch.setenv("MSSQL_POOL_MAX_SIZE", "1")
+    result = await call_tool("execute_sql", {"query": "SELECT id, name FROM big", "max_rows": 10})
+    assert result[1].text == "Result truncated after 10 rows."
+    assert get_pool().stats()["in_use"] == 0
@@ -0,0 +1,89 @@
+import datetime
+import json
+
+import pytest
+from mssql_mcp_server import table_stats
+from mssql_mcp_server.server import call_tool, list_resource_templates, read_resource
+
+TABLES = {
+    "dbo.orders": {"columns": [("id", "int"), ("status", "varchar"), ("paid", "bit"), ("notes", "ntext")],
+                   "key": ["id"], "rows": 100000},
+    "dbo.tiny": {"columns": ["id"], "key": ["id"], "rows": 3},
+}
+STATS = [(100000, 100000, 99000, 1, 100000, 75000, 4, "cancelled", "shipped", 100000, 2, 0, 1, 1000, None, None, None)]
+SAMPLE = [(17, "shipped", True, "a"), (4242, None, False, None)]
+
+@pytest.fixture
+def profiled(fake_pyodbc):
+    fake_pyodbc.add_catalog(TABLES)
+    fake_pyodbc.add_result_sets(r"COUNT_BIG\(\*\).*FROM \[dbo\]\.\[orders\]", [
+        (["rows"] + [f"c{i}" for i in range(16)], STATS),
+        (["id", "status", "paid", "notes"], SAMPLE),
+    ])
+    return fake_pyodbc
+
+def _profile_queries(fake):
+    return [sql for sql, _ in fake.executed if "COUNT_BIG(*)" in sql]
+
+@pytest.mark.asyncio
+async def test_profile_reports_column_stats_and_sample(profiled):
+    profile = json.loads(await read_resource("mssql://orders/profile"))
+    assert profile["table"] == "dbo.orders"
+    assert profile["rows"] == 100000
+    status = profile["columns"][1]
+    assert status == {"name": "status", "type": "varchar", "null_fraction": 0.25, "approx_distinct": 4,
+                      "min": "cancelled", "max": "shipped"}
+    assert profile["columns"][3]["null_fraction"] == 0.99
+    assert profile["columns"][3]["approx_distinct"] is None
+    assert profile["sample"] == {"columns": ["id", "status", "paid", "notes"],
+                                 "rows": [[17, "shipped", True, "a"], [4242, None, False, None]]}
+
+    sql = _profile_queries(profiled)[0]
+    assert "APPROX_COUNT_DISTINCT([status])" in sql
+    assert "MIN(CAST([paid] AS tinyint))" in sql
+    assert "MIN([notes])" not in sql
+    assert "SELECT TOP (20) * FROM [dbo].[orders] TABLESAMPLE SYSTEM (0.0800 PERCENT)" in sql
+
+@pytest.mark.asyncio
+async def test_profile_is_cached_per_sample_size(profiled):
+    first = await read_resource("mssql://orders/profile")
+    assert await read_resource("mssql://dbo.orders/profile") == first
+    assert len(_profile_queries(profiled)) == 1
+    await read_resource("mssql://orders/profile?sample=0")
+    assert len(_profile_queries(profiled)) == 2
+    assert "TABLESAMPLE" not in _profile_queries(profiled)[1]
+
+    await call_tool("execute_sql", {"query": "ALTER TABLE orders ADD region INT"})
+    await read_resource("mssql://orders/profile")
+    assert len(_profile_queries(profiled)) == 3
+
+@pytest.mark.asyncio
+async def test_small_tables_are_sampled_whole(profiled):
+    profiled.add_result_sets(r"FROM \[dbo\]\.\[tiny\]", [
+        (["rows", "n", "d", "lo", "hi"], [(3, 3, 3, datetime.date(2024, 1, 1), datetime.date(2024, 3, 1))]),
+        (["id"], [(1,), (2,), (3,)]),
+    ])
+    profile = json.loads(await read_resource("mssql://tiny/profile?sample=5"))
+    assert profile["columns"][0]["min"] == "2024-01-01"
+    assert len(profile["sample"]["rows"]) == 3
+    assert "TABLESAMPLE" not in _profile_queries(profiled)[0]
+
+@pytest.mark.asyncio
+async def test_falls_back_to_exact_distinct_count(profiled, monkeypatch):
+    monkeypatch.setattr(table_stats, "pyodbc", profiled)
+    def no_approx(params):
+        raise profiled.ProgrammingError("42000", "'APPROX_COUNT_DISTINCT' is not a recognized built-in function name.")
+    profiled.add_result(r"APPROX_COUNT_DISTINCT\(\[id\]\).*FROM \[dbo\]\.\[tiny\]", ["x"], no_approx)
+    profiled.add_result_sets(r"COUNT_BIG\(DISTINCT \[id\]\).*FROM \[dbo\]\.\[tiny\]",
+                             [(["rows", "n", "d", "lo", "hi"], [(3, 3, 3, 1, 3)]), (["id"], [(2,)])])
+    profile = json.loads(await read_resource("mssql://tiny/profile"))
+    assert profile["columns"][0]["approx_distinct"] == 3
+
+@pytest.mark.asyncio
+async def test_profile_errors(profiled):
+    with pytest.raises(ValueError, match="Unknown table"):
+        await read_resource("mssql://missing/profile")
+    with pytest.raises(ValueError, match="Invalid sample size"):
+        await read_resource("mssql://orders/profile?sample=many")
+    templates = await list_resource_templates()
+    assert [t.uriTemplate for t in templates] == ["mssql://{table}/profile"]